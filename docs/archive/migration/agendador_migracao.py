@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agendador das etapas da migracao por grafo de dependencias
+
+Cada etapa declara o script que roda, os arquivos de entrada e as tabelas do
+Firebird que le e que grava. As dependencias saem dessas declaracoes: uma
+etapa espera as etapas declaradas antes dela que gravam alguma tabela que
+ela le ou grava (alem das dependencias explicitas em "depois"). Etapas sem
+dependencia entre si rodam ao mesmo tempo, cada uma em seu processo (e com
+sua propria conexao Firebird), e o tempo total cai para o caminho critico.
+
+A saida de cada etapa vai para <pasta_logs>/<etapa>.log. Se uma etapa
+falha, as que dependem dela sao puladas e as independentes continuam.
+
+Uso:
+    from agendador_migracao import Etapa, executar
+
+    etapas = [
+        Etapa('pessoas', 'migrar-pessoas.py', grava=['CAD_PESSOA']),
+        Etapa('produtos', 'migracao-dados.py', ['produtos'], grava=['CAD_PRODUTOS']),
+        Etapa('contas_pagar', 'migracao-dados.py', ['contas_pagar'],
+              le=['CAD_PESSOA'], grava=['FIN_CTAPAGAR']),
+    ]
+    resultados = executar(etapas, pasta_logs='logs')
+"""
+
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+OK = 'ok'
+ERRO = 'erro'
+PULADA = 'pulada'
+
+
+class Etapa:
+    """Um script da migracao com suas entradas e tabelas"""
+
+    def __init__(self, nome, script, argumentos=(), arquivos=(), le=(), grava=(), depois=()):
+        """
+        - argumentos: argumentos de linha de comando do script
+        - arquivos: arquivos que precisam existir antes de rodar (dumps extraidos)
+        - le / grava: tabelas do Firebird
+        - depois: nomes de etapas que precisam terminar antes (alem das tabelas)
+        """
+        self.nome = nome
+        self.script = script
+        self.argumentos = list(argumentos)
+        self.arquivos = list(arquivos)
+        self.le = {t.upper() for t in le}
+        self.grava = {t.upper() for t in grava}
+        self.depois = set(depois)
+
+    def __repr__(self):
+        return f"Etapa({self.nome!r}, {self.script!r})"
+
+
+def montar_grafo(etapas):
+    """{etapa: conjunto de etapas de que ela depende}; ValueError se houver ciclo"""
+    nomes = [e.nome for e in etapas]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError("Nome de etapa repetido")
+
+    grafo = {}
+    for i, etapa in enumerate(etapas):
+        desconhecidas = etapa.depois - set(nomes)
+        if desconhecidas:
+            raise ValueError(f"{etapa.nome}: depende de etapa desconhecida {sorted(desconhecidas)}")
+
+        usadas = etapa.le | etapa.grava
+        grafo[etapa.nome] = set(etapa.depois) | {
+            anterior.nome for anterior in etapas[:i] if anterior.grava & usadas
+        }
+
+    niveis(grafo)
+    return grafo
+
+
+def niveis(grafo):
+    """Etapas agrupadas por nivel: cada nivel so depende dos anteriores"""
+    restantes = {nome: set(deps) for nome, deps in grafo.items()}
+    resultado = []
+    while restantes:
+        prontas = [nome for nome, deps in restantes.items() if not deps]
+        if not prontas:
+            raise ValueError(f"Ciclo entre as etapas: {sorted(restantes)}")
+        resultado.append(prontas)
+        for nome in prontas:
+            del restantes[nome]
+        for deps in restantes.values():
+            deps.difference_update(prontas)
+    return resultado
+
+
+def caminho_critico(grafo, duracoes):
+    """(segundos, [etapas]) do caminho mais longo do grafo segundo as duracoes"""
+    fim = {}
+    anterior = {}
+    for nivel in niveis(grafo):
+        for nome in nivel:
+            antes = max(grafo[nome], key=lambda d: fim[d], default=None)
+            anterior[nome] = antes
+            fim[nome] = (fim[antes] if antes else 0) + duracoes.get(nome, 0)
+
+    if not fim:
+        return 0, []
+    nome = max(fim, key=fim.get)
+    total = fim[nome]
+    caminho = []
+    while nome:
+        caminho.append(nome)
+        nome = anterior[nome]
+    return total, caminho[::-1]
+
+
+def _rodar(etapa, pasta, pasta_logs, python):
+    """Roda o script da etapa com a saida no log; devolve (codigo, segundos, log)"""
+    log = os.path.join(pasta_logs, f"{etapa.nome}.log")
+    ambiente = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+    inicio = time.time()
+    with open(log, 'w', encoding='utf-8') as saida:
+        processo = subprocess.run([python, etapa.script, *etapa.argumentos], cwd=pasta,
+                                  stdout=saida, stderr=subprocess.STDOUT, env=ambiente)
+    return processo.returncode, time.time() - inicio, log
+
+
+def executar(etapas, pasta=None, pasta_logs='logs', processos=None, python=sys.executable):
+    """
+    Roda as etapas respeitando as dependencias, o maximo possivel em paralelo
+
+    - pasta: onde estao os scripts (padrao: pasta deste arquivo)
+    - processos: etapas ao mesmo tempo (= conexoes Firebird); None = sem limite
+
+    Retorna {etapa: {'status', 'codigo', 'segundos', 'log'}}.
+    """
+    pasta = pasta or os.path.dirname(os.path.abspath(__file__))
+    pasta_logs = os.path.join(pasta, pasta_logs)
+    os.makedirs(pasta_logs, exist_ok=True)
+
+    grafo = montar_grafo(etapas)
+    por_nome = {e.nome: e for e in etapas}
+    resultados = {}
+    pendentes = [e.nome for e in etapas]
+    rodando = {}
+    inicio = time.time()
+
+    def decorrido():
+        return f"[{time.time() - inicio:7.1f}s]"
+
+    with ThreadPoolExecutor(max_workers=processos or len(etapas) or 1) as executor:
+        while pendentes or rodando:
+            for nome in list(pendentes):
+                deps = grafo[nome]
+                if any(resultados.get(d, {}).get('status') in (ERRO, PULADA) for d in deps):
+                    # Outra dependencia pode ainda estar rodando (sem resultado)
+                    falhas = sorted(d for d in deps
+                                    if resultados.get(d, {}).get('status') in (ERRO, PULADA))
+                    print(f"{decorrido()} [PULADA] {nome} (depende de {', '.join(falhas)})")
+                    resultados[nome] = {'status': PULADA, 'codigo': None, 'segundos': 0, 'log': None}
+                    pendentes.remove(nome)
+                    continue
+                if not all(resultados.get(d, {}).get('status') == OK for d in deps):
+                    continue
+
+                pendentes.remove(nome)
+                etapa = por_nome[nome]
+                faltando = [a for a in etapa.arquivos if not os.path.exists(a)]
+                if faltando:
+                    print(f"{decorrido()} [ERRO] {nome}: arquivo nao encontrado: {', '.join(faltando)}")
+                    resultados[nome] = {'status': ERRO, 'codigo': None, 'segundos': 0, 'log': None}
+                    continue
+
+                print(f"{decorrido()} [INICIO] {nome}: {etapa.script} {' '.join(etapa.argumentos)}".rstrip())
+                rodando[executor.submit(_rodar, etapa, pasta, pasta_logs, python)] = nome
+
+            if not rodando:
+                continue
+
+            prontos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                nome = rodando.pop(futuro)
+                codigo, segundos, log = futuro.result()
+                status = OK if codigo == 0 else ERRO
+                resultados[nome] = {'status': status, 'codigo': codigo, 'segundos': segundos, 'log': log}
+                if status == OK:
+                    print(f"{decorrido()} [OK] {nome} ({segundos:.1f}s)")
+                else:
+                    print(f"{decorrido()} [ERRO] {nome} (codigo {codigo}, {segundos:.1f}s) -> {log}")
+
+    return resultados
@@ -8,27 +8,18 @@ import sys
 import codecs
 from datetime import datetime, timedelta
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("ANALISE DE CONTAS A PAGAR POR PERIODO")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Total de contas
@@ -8,14 +8,11 @@ import sys
 import codecs
 import re
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("=== ANALISE DE CREDITOS NAO MIGRADOS ===\n")
 
@@ -56,14 +53,7 @@ for linha in linhas:
 print(f"Total de creditos no dump: {total_creditos:,}")
 print(f"Clientes unicos nos creditos: {len(clientes_creditos):,}")
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
-con = fdb.connect(**fbConfig)
+con = conectar('verificacao')
 cur = con.cursor()
 
 # Verificar quantos clientes existem no Firebird
@@ -7,6 +7,9 @@ Analisa o formato do dump PostgreSQL
 import sys
 import codecs
 
+from inspetor_dump import encodings_compativeis, inspecionar
+from leitor_dump import iterar_linhas
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
@@ -16,38 +19,37 @@ print("=== ANALISE DO DUMP POSTGRESQL ===\n")
 print(f"Arquivo: {arquivo_dump}\n")
 
 try:
-    with open(arquivo_dump, 'r', encoding='latin1') as f:
-        linhas = f.readlines()
+    # Diagnostico do arquivo inteiro via mmap (sem decodificar nem ler linha a linha)
+    relatorio = inspecionar(arquivo_dump)
+    secoes = relatorio['secoes']
+    totais = relatorio['totais']
 
-    total_linhas = len(linhas)
-    print(f"Total de linhas: {total_linhas:,}\n")
+    print(f"Tamanho: {relatorio['tamanho']:,} bytes")
+    print(f"Linhas: {relatorio.get('linhas', 0):,}\n")
 
-    # Procurar por COPY statements
+    # COPY statements
     print(">>> Procurando por COPY statements:")
     print("-" * 60)
 
-    copy_statements = []
-    for i, linha in enumerate(linhas):
-        if 'COPY public.' in linha and 'FROM stdin' in linha:
-            copy_statements.append((i, linha.strip()))
-
-    print(f"Encontrados {len(copy_statements)} COPY statements:\n")
-    for num_linha, statement in copy_statements:
-        print(f"Linha {num_linha:,}: {statement[:80]}")
+    print(f"Encontrados {len(secoes)} COPY statements:\n")
+    for s in secoes:
+        statement = f"COPY public.{s['tabela']} ({', '.join(s['colunas'])}) FROM stdin;"
+        print(f"Linha {s['linha']:,}: {statement[:80]} [{s['linhas']:,} linhas]")
 
     # Analisar a primeira secao de dados
-    if copy_statements:
+    if secoes:
         print("\n>>> Analisando primeira secao de dados:")
         print("-" * 60)
 
-        primeira_copy_linha = copy_statements[0][0]
-        print(f"\nInicio da secao: linha {primeira_copy_linha:,}")
-        print(f"Statement: {copy_statements[0][1]}\n")
+        primeira = secoes[0]
+        print(f"\nInicio da secao: byte {primeira['inicio']:,}")
+        print(f"Tabela: {primeira['tabela']}\n")
 
-        # Ler as proximas 20 linhas apos o COPY
+        # Ler as proximas 20 linhas apos o COPY (seek direto para a secao)
         print("Proximas 20 linhas:")
-        for i in range(primeira_copy_linha + 1, min(primeira_copy_linha + 21, total_linhas)):
-            linha = linhas[i]
+        linhas = iterar_linhas(arquivo_dump, inicio=primeira['inicio'])
+        for i, linha_bytes in zip(range(1, 21), linhas):
+            linha = linha_bytes.decode('latin1')
 
             # Verificar se e linha de dados (com tabs)
             tem_tabs = '\t' in linha
@@ -56,7 +58,7 @@ try:
             e_fim = linha.strip() == '\\.'
 
             # Mostrar informacoes
-            preview = linha[:80].replace('\t', '[TAB]').replace('\n', '')
+            preview = linha[:80].replace('\t', '[TAB]')
             if len(linha) > 80:
                 preview += '...'
 
@@ -67,45 +69,49 @@ try:
                 status = f' <- DADOS (contém {linha.count(chr(9))} tabs)'
 
             print(f"  {i:,}: {preview}{status}")
+        linhas.close()
 
-    # Procurar por backslash-ponto
+    # Terminadores (backslash-ponto): um por secao fechada
     print("\n>>> Procurando por terminadores (backslash-ponto):")
     print("-" * 60)
 
-    terminadores = []
-    for i, linha in enumerate(linhas):
-        if linha.strip() == '\\.':
-            terminadores.append(i)
+    print(f"Encontrados {relatorio['terminadores']} terminadores\n")
+    terminadas = [s for s in secoes if s['terminada']]
+    if terminadas:
+        print("Primeiros 5 terminadores nos bytes:")
+        for s in terminadas[:5]:
+            print(f"  - Byte {s['fim']:,} ({s['tabela']})")
+    for s in secoes:
+        if not s['terminada']:
+            print(f"AVISO: secao {s['tabela']} termina sem backslash-ponto (dump truncado?)")
+
+    # Tabs por secao: cada linha deve ter (colunas - 1) tabs
+    print("\n>>> Tabs por secao:")
+    print("-" * 60)
 
-    print(f"Encontrados {len(terminadores)} terminadores\n")
-    if terminadores:
-        print("Primeiros 5 terminadores nas linhas:")
-        for num_linha in terminadores[:5]:
-            print(f"  - Linha {num_linha:,}")
+    for s in secoes:
+        status = 'OK' if s['tabs'] == s['tabs_esperados'] else 'COLUNAS DESALINHADAS'
+        print(f"  {s['tabela']:<25} {s['tabs']:>12,} tabs (esperado {s['tabs_esperados']:,}) {status}")
 
     # Verificar encoding
     print("\n>>> Verificando encoding:")
     print("-" * 60)
 
-    # Tentar ler com diferentes encodings
-    encodings = ['latin1', 'utf-8', 'cp1252', 'iso-8859-1']
-    for enc in encodings:
-        try:
-            with open(arquivo_dump, 'r', encoding=enc) as f:
-                primeira_linha = f.readline()
-            print(f"  {enc}: OK")
-        except Exception as e:
-            print(f"  {enc}: ERRO - {e}")
+    print(f"  client_encoding do dump: {relatorio['client_encoding'] or '(nao informado)'}")
+    print(f"  Bytes fora do ASCII: {totais.get('altos', 0):,}")
+    for enc, ok, motivo in encodings_compativeis(relatorio):
+        print(f"  {enc}: {'OK' if ok else 'ERRO'} - {motivo}")
 
     # Verificar se tem caracteres binarios
     print("\n>>> Verificando caracteres binarios:")
     print("-" * 60)
 
-    with open(arquivo_dump, 'rb') as f:
-        primeiros_1000_bytes = f.read(1000)
-
-    binarios = sum(1 for b in primeiros_1000_bytes if b < 32 and b not in [9, 10, 13])
-    print(f"Caracteres binarios nos primeiros 1000 bytes: {binarios}")
+    binarios = totais.get('binarios', 0)
+    densidade = binarios / relatorio['tamanho'] if relatorio['tamanho'] else 0
+    print(f"Caracteres binarios no arquivo: {binarios:,} ({densidade:.6%})")
+    for s in secoes:
+        if s['binarios']:
+            print(f"  - {s['tabela']}: {s['binarios']:,}")
 
     if binarios > 0:
         print("AVISO: Arquivo pode conter dados binarios!")
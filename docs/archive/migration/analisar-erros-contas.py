@@ -9,23 +9,15 @@ import codecs
 import re
 from datetime import datetime
 
+from conexao_firebird import conectar
+from dinheiro import centavos
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("=== ANALISE DE ERROS - CONTAS A PAGAR ===\n")
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 def limpar_data(data_str):
     if not data_str or data_str == '\\N':
         return None
@@ -131,7 +123,7 @@ for tipo, qtd in erros_tipo.items():
 print("\n>>> VERIFICANDO FORNECEDORES NO FIREBIRD:\n")
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # Contar fornecedores
@@ -150,7 +142,7 @@ try:
 
     conta_teste = contas[0]
     quitado = 'S' if conta_teste.get('pago') in ['t', 'true', True] else 'N'
-    valor = int(float(conta_teste.get('valor') or 0) * 100)
+    valor = centavos(conta_teste.get('valor') or 0)
     data_atual = datetime.now().strftime('%Y-%m-%d')
 
     try:
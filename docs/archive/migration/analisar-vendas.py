@@ -5,14 +5,11 @@ Analisa estrutura de vendas/pedidos no PostgreSQL e Firebird
 """
 
 import sys, codecs
+
+from conexao_firebird import conectar
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("ANALISE DE VENDAS/PEDIDOS")
@@ -59,14 +56,8 @@ for i, ped in enumerate(pedidos_exemplos, 1):
 print("\n\n>> ESTRUTURA DA TABELA PEDIDOS NO FIREBIRD:")
 print("-"*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     cur.execute("""
@@ -6,25 +6,16 @@ Aplica a correção na view VW_RPT_PEDIDOSVENDAS (versão 2 com aliases corretos
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("APLICANDO CORREÇÃO NA VIEW VW_RPT_PEDIDOSVENDAS (V2)")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 sql_alter_view = """
 CREATE OR ALTER VIEW VW_RPT_PEDIDOSVENDAS AS
 SELECT
@@ -81,7 +72,7 @@ FROM (((((pedidos ped
 """
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     print("\n>> Aplicando alteração na view...")
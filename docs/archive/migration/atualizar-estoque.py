@@ -6,67 +6,36 @@ Atualiza estoque dos produtos no Firebird com dados do PostgreSQL
 
 import sys
 import codecs
-import re
+
+from conexao_firebird import conectar
+from dinheiro import centavos
+from leitor_dump import ler_registros
+from temporaria_firebird import AtualizacaoEmConjunto
 
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("=== ATUALIZACAO DE ESTOQUE DOS PRODUTOS ===\n")
 
 # Ler dados de estoque do PostgreSQL
 print("Lendo dados de estoque do PostgreSQL...")
-with open(r'c:\Projeto\Academia\estoque-extraido.sql', 'r', encoding='latin1') as f:
-    conteudo = f.read()
-
-estoques = []
-linhas = conteudo.split('\n')
-lendo_dados = False
-colunas = []
-
-for linha in linhas:
-    # Detectar início de COPY
-    match_copy = re.match(r'COPY public\.estoque \((.*?)\) FROM stdin;', linha)
-    if match_copy:
-        colunas = [c.strip() for c in match_copy.group(1).split(',')]
-        lendo_dados = True
-        continue
-
-    # Detectar fim de dados
-    if linha.strip() == '\\.':
-        lendo_dados = False
-        continue
-
-    # Ler dados
-    if lendo_dados and linha:
-        valores = linha.split('\t')
-        estoque = {}
-        for idx, col in enumerate(colunas):
-            if idx < len(valores):
-                estoque[col] = None if valores[idx] == '\\N' else valores[idx]
-        estoques.append(estoque)
+estoques = list(ler_registros(r'c:\Projeto\Academia\estoque-extraido.sql', 'estoque'))
 
 print(f"Total de estoques lidos: {len(estoques):,}\n")
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
+    # Estoques vao para a tabela temporaria e entram com um unico MERGE
+    # (sem SELECT/UPDATE por produto)
+    atualizacao = AtualizacaoEmConjunto(
+        con, 'CAD_PRODUTOS', ['CODIGO'],
+        ['ESTOQUESALDO', 'PRC_CUSTO', 'PRC_VENDA', 'ESTOQUEMINIMO', 'ESTOQUEMAXIMO'],
+        nome='estoques')
+
     print("Atualizando produtos com dados de estoque...")
-    atualizados = 0
-    nao_encontrados = 0
     erros = 0
 
     for estoque in estoques:
@@ -77,53 +46,29 @@ try:
             qtdest = float(estoque.get('qtdest') or 0)
 
             # Preços em centavos
-            custo = int(float(estoque.get('custo') or 0) * 100)
-            prevenda = int(float(estoque.get('prevenda') or 0) * 100)
+            custo = centavos(estoque.get('custo') or 0)
+            prevenda = centavos(estoque.get('prevenda') or 0)
 
             # Estoque mínimo e máximo
             estmin = float(estoque.get('estmin') or 0)
             estmax = float(estoque.get('estmax') or 0)
 
-            # Verificar se o produto existe
-            cur.execute("SELECT CODIGO FROM CAD_PRODUTOS WHERE CODIGO = ?", [idproduto])
-            if not cur.fetchone():
-                nao_encontrados += 1
-                continue
-
-            # Atualizar produto
-            cur.execute("""
-                UPDATE CAD_PRODUTOS SET
-                    ESTOQUESALDO = ?,
-                    PRC_CUSTO = ?,
-                    PRC_VENDA = ?,
-                    ESTOQUEMINIMO = ?,
-                    ESTOQUEMAXIMO = ?
-                WHERE CODIGO = ?
-            """, [
-                qtdest,
-                custo,
-                prevenda,
-                estmin,
-                estmax,
-                idproduto
-            ])
-
-            atualizados += 1
-            if atualizados % 1000 == 0:
-                print(f"{atualizados} produtos atualizados...")
-                con.commit()
+            atualizacao.adicionar([idproduto, qtdest, custo, prevenda, estmin, estmax],
+                                  origem=idproduto)
 
         except Exception as erro:
             erros += 1
             if erros <= 5:
-                print(f"Erro ao atualizar produto {estoque.get('idproduto')}: {erro}")
+                print(f"Erro ao ler estoque do produto {estoque.get('idproduto')}: {erro}")
 
+    resumo = atualizacao.aplicar()
     con.commit()
 
     print(f"\n[OK] Atualizacao concluida!")
-    print(f"  - Produtos atualizados: {atualizados:,}")
-    print(f"  - Produtos nao encontrados: {nao_encontrados:,}")
-    print(f"  - Erros: {erros}")
+    print(f"  - Produtos atualizados: {resumo['encontradas']:,}")
+    print(f"  - Produtos nao encontrados: {resumo['nao_encontradas']:,}")
+    print(f"  - Estoques repetidos (vale o ultimo): {resumo['repetidas']:,}")
+    print(f"  - Erros: {erros + resumo['erros']}")
 
     # Verificar resultado
     print("\n>> Exemplos de produtos atualizados:")
@@ -7,27 +7,18 @@ Atualiza UNIDADE_ID e IDNCM dos produtos migrados
 import sys
 import codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("ATUALIZANDO IDS DE UNIDADE E NCM NOS PRODUTOS")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # Primeiro, criar um mapa de unidades (sigla -> id)
@@ -158,3 +149,4 @@ except Exception as e:
     print(f"\n[ERRO] {e}")
     import traceback
     traceback.print_exc()
+    exit(1)
@@ -7,27 +7,18 @@ Atualiza o campo FORNECEDOR_NOME nas contas a pagar
 import sys
 import codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("ATUALIZANDO NOMES DE FORNECEDORES NAS CONTAS A PAGAR")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # Buscar todas as contas a pagar que não têm FORNECEDOR_NOME
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do decodificador de campos do COPY (leitor_dump.campos_linha)
+comparado com o split ingenuo usado antes nos scripts
+
+Uso:
+    python benchmark-decodificador-copy.py                      (linhas sinteticas)
+    python benchmark-decodificador-copy.py <dump.sql> [tabela]  (secao real do dump)
+"""
+
+import sys
+import codecs
+import time
+
+from indice_dump import carregar_indice, secao
+from leitor_dump import NULO, campos_linha, iterar_linhas
+
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+
+LINHAS_SINTETICAS = 500000
+REPETICOES = 3
+
+
+def split_ingenuo(linha, encoding='latin1'):
+    """Como os scripts faziam: decode + split + comparacao com \\N (sem escapes)"""
+    return [None if v == NULO else v for v in linha.decode(encoding).split('\t')]
+
+
+def linhas_sinteticas(n, nulos, percentual_escape):
+    """Linhas no formato de pedidos_itens; opcionalmente com \\N e uma fracao com escapes"""
+    a_cada = int(100 / percentual_escape) if percentual_escape else 0
+    qtd = '\\N' if nulos else '1.000'
+    linhas = []
+    for i in range(n):
+        if a_cada and i % a_cada == 0:
+            linhas.append(f'{i}\t{i // 3}\t{i % 5000}\t{qtd}\t12.500\tFORN\\tLTDA\\\\SP\t{i % 97}.90'.encode('latin1'))
+        else:
+            linhas.append(f'{i}\t{i // 3}\t{i % 5000}\t{qtd}\t12.500\tCAIXA C/ 12\t{i % 97}.90'.encode('latin1'))
+    return linhas
+
+
+def medir(funcao, linhas):
+    melhor = None
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        for linha in linhas:
+            funcao(linha)
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor
+
+
+def comparar(titulo, linhas):
+    ingenuo = medir(split_ingenuo, linhas)
+    decodificador = medir(campos_linha, linhas)
+    print(f"{titulo:<35} {len(linhas):>9,} linhas  "
+          f"split: {ingenuo:6.3f}s  campos_linha: {decodificador:6.3f}s  "
+          f"({decodificador / ingenuo:4.2f}x)  {len(linhas) / decodificador:>12,.0f} linhas/s")
+
+
+print("=== BENCHMARK DO DECODIFICADOR COPY ===\n")
+
+if len(sys.argv) > 1:
+    arquivo = sys.argv[1]
+    tabela = sys.argv[2] if len(sys.argv) > 2 else 'pedidos_itens'
+    s = secao(carregar_indice(arquivo), tabela)
+    if s is None:
+        print(f"Tabela {tabela} nao encontrada no dump")
+        sys.exit(1)
+
+    print(f"Carregando {tabela} ({s['linhas']:,} linhas) em memoria...\n")
+    linhas = [l for l in iterar_linhas(arquivo, inicio=s['inicio'], fim=s['fim']) if l]
+    com_barra = sum(1 for l in linhas if b'\\' in l)
+    print(f"Linhas com barra invertida (caminho lento): {com_barra:,} "
+          f"({com_barra / max(len(linhas), 1):.2%})\n")
+    comparar(tabela, linhas)
+else:
+    comparar("sintetico, sem barra invertida", linhas_sinteticas(LINHAS_SINTETICAS, False, 0))
+    comparar("sintetico, \\N em todas", linhas_sinteticas(LINHAS_SINTETICAS, True, 0))
+    for percentual in (1, 10, 100):
+        comparar(f"sintetico, \\N + {percentual}% com escapes",
+                 linhas_sinteticas(LINHAS_SINTETICAS, True, percentual))
+
+# Conferencia rapida: o split ingenuo desloca as colunas quando ha tab escapado
+exemplo = b'10\tFORN\\tLTDA\t\\N'
+print(f"\nsplit ingenuo: {split_ingenuo(exemplo)}")
+print(f"campos_linha:  {campos_linha(exemplo)}")
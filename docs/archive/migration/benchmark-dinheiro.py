@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da conversao de valores monetarios para centavos (dinheiro.py)
+comparada com as conversoes usadas antes nos scripts
+
+- int(float * 100): migracao-dados antigo (trunca: 0.29 -> 28)
+- safe_float + int(* 100): regex por valor (migrar-vendas, migrar-itens-pedidos)
+- round(float * 100): registros_dump / cache_colunar antigos
+- centavos: escalar exato
+- centavos_array: coluna inteira com NumPy
+
+Alem do tempo, conta quantos valores cada conversao antiga grava diferente
+do valor exato.
+
+Uso:
+    python benchmark-dinheiro.py                              (colunas sinteticas)
+    python benchmark-dinheiro.py <dump.sql> [tabela coluna]   (coluna real, padrao pedidos_itens.preco)
+"""
+
+import sys
+import codecs
+import random
+import time
+
+from dinheiro import centavos, centavos_array
+from indice_dump import carregar_indice, ler_secao, secao
+
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+
+LINHAS_SINTETICAS = 500000
+REPETICOES = 3
+
+
+def truncado(valor):
+    return int(float(valor or 0) * 100)
+
+
+def safe_float(valor_str):
+    """Como nos scripts de migracao (com o import re dentro da funcao)"""
+    if not valor_str or valor_str == '\\N' or valor_str == '':
+        return 0.0
+    try:
+        valor_limpo = str(valor_str).strip().replace(',', '.')
+        import re
+        match = re.search(r'[-+]?\d*\.?\d+', valor_limpo)
+        if match:
+            return float(match.group())
+        return 0.0
+    except:
+        return 0.0
+
+
+def regex_truncado(valor):
+    return int(safe_float(valor) * 100)
+
+
+def arredondado(valor):
+    return int(round(float(valor or 0) * 100))
+
+
+def coluna_sintetica(n, casas, maximo):
+    """Textos como no COPY: numeric com 'casas' decimais, ate 'maximo'"""
+    aleatorio = random.Random(casas)
+    escala = 10 ** casas
+    return [f"{aleatorio.randrange(maximo * escala) / escala:.{casas}f}" for _ in range(n)]
+
+
+def medir(funcao):
+    melhor = None
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor, resultado
+
+
+def comparar(titulo, valores):
+    print(f"\n{titulo} ({len(valores):,} valores)")
+    print("-"*90)
+    tempo_array, (exatos, nulos) = medir(lambda: centavos_array(valores))
+    exatos = exatos.tolist()
+
+    conversoes = [
+        ('int(float * 100)', truncado),
+        ('safe_float + int(* 100)', regex_truncado),
+        ('round(float * 100)', arredondado),
+        ('centavos (escalar)', centavos),
+    ]
+    for nome, funcao in conversoes:
+        tempo, convertidos = medir(lambda: [funcao(v) for v in valores])
+        diferentes = sum(1 for a, b, nulo in zip(convertidos, exatos, nulos) if not nulo and a != b)
+        print(f"  {nome:<26} {tempo:7.3f}s  {len(valores) / tempo:>12,.0f} valores/s  "
+              f"{diferentes:>9,} diferentes do exato")
+    print(f"  {'centavos_array (NumPy)':<26} {tempo_array:7.3f}s  "
+          f"{len(valores) / tempo_array:>12,.0f} valores/s  {int(nulos.sum()):>9,} nulos/invalidos")
+
+
+print("=== BENCHMARK DE CONVERSAO PARA CENTAVOS ===")
+
+if len(sys.argv) > 1:
+    arquivo = sys.argv[1]
+    tabela = sys.argv[2] if len(sys.argv) > 2 else 'pedidos_itens'
+    coluna = sys.argv[3] if len(sys.argv) > 3 else 'preco'
+    indice = carregar_indice(arquivo)
+    s = secao(indice, tabela)
+    if s is None or coluna not in s['colunas']:
+        print(f"Coluna {tabela}.{coluna} nao encontrada no dump")
+        sys.exit(1)
+
+    posicao = s['colunas'].index(coluna)
+    valores = [campos[posicao] for campos in ler_secao(arquivo, tabela, indice=indice)
+               if campos[posicao] is not None]
+    comparar(f"{tabela}.{coluna}", valores)
+else:
+    comparar("sintetico, pedidos_itens.preco (3 casas)", coluna_sintetica(LINHAS_SINTETICAS, 3, 5000))
+    comparar("sintetico, documentos.valor (2 casas)", coluna_sintetica(LINHAS_SINTETICAS, 2, 20000))
+
+# Conferencia rapida: o caso que motivou o modulo
+print(f"\nint(float('0.29') * 100) = {truncado('0.29')}    centavos('0.29') = {centavos('0.29')}")
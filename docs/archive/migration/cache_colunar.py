@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache colunar em disco das tabelas extraidas dos dumps PostgreSQL
+
+Cada tabela e convertida uma unica vez (split por tab, float, datas...) e
+gravada como colunas tipadas em "<dump>.cache/<tabela>/":
+
+- colunas numericas/data/bool: arquivos binarios lidos com numpy.memmap,
+  mais uma mascara de nulos (<coluna>.nulos)
+- colunas texto: <coluna>.offsets (int64, n+1 posicoes) + <coluna>.dados
+
+O cache fica amarrado ao SHA-1 do dump (registrado pelo indice_dump) e aos
+tipos pedidos; se o dump mudar, a tabela e reconvertida automaticamente.
+A partir da segunda execucao carregar uma tabela e apenas abrir os memmaps.
+
+Uso:
+    from cache_colunar import carregar_tabela, TIPOS_PEDIDOS
+
+    pedidos = carregar_tabela(arquivo, 'pedidos', TIPOS_PEDIDOS)
+    ids = pedidos['idpedido']          # numpy.ndarray (int64)
+    vlnota = pedidos['vlnota']         # centavos (int64)
+    sem_valor = pedidos.nulos('vlnota')
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from dinheiro import centavos, centavos_array
+from indice_dump import carregar_indice, ler_secao, secao
+
+VERSAO_CACHE = 2
+
+# Tipo -> dtype gravado em disco
+DTYPES = {
+    'int': np.int64,
+    'centavos': np.int64,
+    'float': np.float64,
+    'data': 'datetime64[D]',
+    'bool': np.int8,
+}
+
+# Tipos mais usados pelos scripts de pedidos (demais colunas ficam como texto)
+TIPOS_PEDIDOS = {
+    'idpedido': 'int',
+    'idfilial': 'int',
+    'idfornecedor': 'int',
+    'vlnota': 'centavos',
+    'vlprod': 'centavos',
+    'vlfrete': 'centavos',
+    'vlicms': 'centavos',
+    'vlipi': 'centavos',
+    'vlsubtrib': 'centavos',
+    'vldespesas': 'centavos',
+    'vldescontos': 'centavos',
+    'data': 'data',
+    'lancado': 'bool',
+    'datalan': 'data',
+    'idfuncionario': 'int',
+}
+
+TIPOS_PEDIDOS_ITENS = {
+    'idpedidoitem': 'int',
+    'idpedido': 'int',
+    'idproduto': 'int',
+    'qtdrec': 'float',
+    'qtdemb': 'float',
+    'preco': 'centavos',
+}
+
+
+def _converter(tipo, valor):
+    """Converte um campo do COPY para o valor gravado na coluna"""
+    if tipo == 'int':
+        return int(valor)
+    if tipo == 'float':
+        return float(valor.replace(',', '.'))
+    if tipo == 'centavos':
+        return centavos(valor)
+    if tipo == 'data':
+        return np.datetime64(valor[:10], 'D')
+    if tipo == 'bool':
+        return 1 if valor in ('t', 'true') else 0
+    raise ValueError(f"Tipo desconhecido: {tipo}")
+
+
+# Valor gravado no lugar de nulos (a mascara e que diz se e nulo)
+VAZIO = {'int': 0, 'centavos': 0, 'float': 0.0, 'data': 'NaT', 'bool': 0}
+
+
+class ColunaTexto:
+    """Coluna de texto guardada como offsets + bytes (utf-8)"""
+
+    def __init__(self, offsets, dados, nulos):
+        self.offsets = offsets
+        self.dados = dados
+        self.mascara = nulos
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if self.mascara[i]:
+            return None
+        return bytes(self.dados[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class TabelaColunar:
+    """Tabela carregada do cache: tabela['coluna'] devolve o array da coluna"""
+
+    def __init__(self, nome, linhas, colunas, mascaras):
+        self.nome = nome
+        self.linhas = linhas
+        self.colunas = colunas
+        self.mascaras = mascaras
+
+    def __getitem__(self, coluna):
+        return self.colunas[coluna]
+
+    def __len__(self):
+        return self.linhas
+
+    def nulos(self, coluna):
+        """Mascara booleana dos valores nulos da coluna"""
+        return self.mascaras[coluna]
+
+
+def diretorio_cache(arquivo):
+    """Diretorio do cache ao lado do dump"""
+    return arquivo + '.cache'
+
+
+def _abrir(caminho, dtype, n):
+    if n == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(caminho, dtype=dtype, mode='r', shape=(n,))
+
+
+def _gravar_tabela(destino, arquivo, tabela, colunas, tipos, indice):
+    """Converte a secao da tabela e grava as colunas em destino"""
+    valores = [[] for _ in colunas]
+    nulos = [[] for _ in colunas]
+    tipos_colunas = [tipos.get(c, 'texto') for c in colunas]
+
+    linhas = 0
+    for campos in ler_secao(arquivo, tabela, indice=indice):
+        for i, tipo in enumerate(tipos_colunas):
+            valor = campos[i] if i < len(campos) else None
+            if tipo == 'centavos':
+                # Convertidos de uma vez no fim (centavos_array)
+                valores[i].append(valor)
+                continue
+            if valor is not None and tipo != 'texto':
+                try:
+                    valor = _converter(tipo, valor)
+                except ValueError:
+                    # Valor invalido conta como nulo (mesmo criterio do safe_float)
+                    valor = None
+            nulos[i].append(valor is None)
+            valores[i].append(VAZIO.get(tipo) if valor is None else valor)
+        linhas += 1
+
+    for i, tipo in enumerate(tipos_colunas):
+        if tipo == 'centavos':
+            valores[i], nulos[i] = centavos_array(valores[i])
+
+    temporario = destino + '.tmp'
+    if os.path.exists(temporario):
+        shutil.rmtree(temporario)
+    os.makedirs(temporario)
+
+    for coluna, tipo, vals, mask in zip(colunas, tipos_colunas, valores, nulos):
+        base = os.path.join(temporario, coluna)
+        np.array(mask, dtype=np.bool_).tofile(base + '.nulos')
+
+        if tipo == 'texto':
+            codificados = [(v or '').encode('utf-8') for v in vals]
+            offsets = np.zeros(linhas + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.array([len(b) for b in codificados], dtype=np.int64))
+            offsets.tofile(base + '.offsets')
+            with open(base + '.dados', 'wb') as f:
+                f.write(b''.join(codificados))
+        else:
+            np.array(vals, dtype=DTYPES[tipo]).tofile(base + '.bin')
+
+    with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'versao': VERSAO_CACHE,
+            'sha1': indice['sha1'],
+            'tabela': tabela,
+            'linhas': linhas,
+            'colunas': colunas,
+            'tipos': dict(zip(colunas, tipos_colunas))
+        }, f, indent=1)
+
+    if os.path.exists(destino):
+        shutil.rmtree(destino)
+    os.replace(temporario, destino)
+
+
+def _ler_meta(destino):
+    try:
+        with open(os.path.join(destino, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def carregar_tabela(arquivo, tabela, tipos=None):
+    """
+    Carrega uma tabela do dump pelo cache colunar, convertendo se preciso
+
+    - tipos: {coluna: 'int' | 'centavos' | 'float' | 'data' | 'bool' | 'texto'}
+      (colunas nao informadas ficam como texto)
+    - retorna TabelaColunar, ou None se a tabela nao existir no dump
+    """
+    tipos = tipos or {}
+    indice = carregar_indice(arquivo)
+
+    s = secao(indice, tabela)
+    if s is None:
+        return None
+
+    colunas = s['colunas']
+    esperado = {c: tipos.get(c, 'texto') for c in colunas}
+
+    destino = os.path.join(diretorio_cache(arquivo), tabela)
+    meta = _ler_meta(destino)
+    if (not meta or meta.get('versao') != VERSAO_CACHE or meta.get('sha1') != indice['sha1']
+            or meta.get('tipos') != esperado):
+        print(f"Convertendo {tabela} para o cache colunar...")
+        _gravar_tabela(destino, arquivo, tabela, colunas, tipos, indice)
+        meta = _ler_meta(destino)
+
+    n = meta['linhas']
+    dados = {}
+    mascaras = {}
+    for coluna in colunas:
+        base = os.path.join(destino, coluna)
+        tipo = meta['tipos'][coluna]
+        mascaras[coluna] = _abrir(base + '.nulos', np.bool_, n)
+        if tipo == 'texto':
+            offsets = _abrir(base + '.offsets', np.int64, n + 1)
+            tamanho = int(offsets[-1])
+            blob = _abrir(base + '.dados', np.uint8, tamanho)
+            dados[coluna] = ColunaTexto(offsets, blob, mascaras[coluna])
+        else:
+            dados[coluna] = _abrir(base + '.bin', DTYPES[tipo], n)
+
+    return TabelaColunar(tabela, n, dados, mascaras)
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga em lote no Firebird com comando preparado
+
+O INSERT e preparado uma unica vez (cur.prep) e as linhas sao enviadas em
+lotes com executemany. Cada lote roda sob um savepoint: se alguma linha do
+lote falhar, o lote e desfeito e dividido ao meio ate isolar as linhas com
+erro (bissecao), que vao para o arquivo de quarentena com a tabela, a origem
+e o erro. O resto do lote e gravado normalmente, sem voltar para o
+try/except linha a linha.
+
+O executemany do fdb ainda manda um comando por linha. Para conexoes
+remotas, CarregadorBloco empacota varias linhas em um unico EXECUTE BLOCK
+parametrizado (uma ida ao servidor por bloco), com o numero de linhas por
+bloco calculado a partir dos limites de tamanho do Firebird.
+
+Uso:
+    from carga_firebird import CarregadorLote, Quarentena, criar_carregador
+
+    quarentena = Quarentena(r'c:\Projeto\Academia\quarentena.jsonl')
+    carga = CarregadorLote(con, 'CAD_PRODUTOS', ['CODIGO', 'NOME'], tamanho_lote=1000,
+                           quarentena=quarentena)
+    for produto in produtos:
+        carga.adicionar([produto.idproduto, produto.descricao], origem=produto.idproduto,
+                        fonte=produto)
+    carga.finalizar()
+    con.commit()
+    quarentena.fechar()
+
+    # Mesmo contrato, um EXECUTE BLOCK por lote (tambem serve para UPDATE)
+    carga = criar_carregador(con, 'PEDIDOS', ['VLR_TOTAL', 'CODIGO'], modo='bloco',
+                             sql="UPDATE PEDIDOS SET VLR_TOTAL = ? WHERE CODIGO = ?")
+"""
+
+import json
+import re
+import time
+from datetime import datetime
+
+# Linhas por lote enviado com executemany
+TAMANHO_LOTE = 1000
+
+# Intervalo (em linhas) das mensagens de progresso
+PROGRESSO_A_CADA = 10000
+
+# Erros impressos por tabela (os demais so sao contados)
+MAX_ERROS_IMPRESSOS = 20
+
+SAVEPOINT_LOTE = 'CARGA_LOTE'
+
+# Limites do Firebird usados para dimensionar o EXECUTE BLOCK: texto do
+# comando (64 KB ate o 2.5), mensagem de entrada (64 KB) e campos da mensagem
+# (cada parametro ocupa dois: valor + indicador de nulo). Ficamos abaixo deles
+# com folga para o BLR gerado.
+LIMITE_SQL = 60000
+LIMITE_MENSAGEM = 60000
+LIMITE_PARAMETROS = 8000
+MAX_LINHAS_BLOCO = 500
+
+# Tipos do RDB$FIELDS -> (declaracao, bytes na mensagem)
+TIPOS_FIREBIRD = {
+    7: ('SMALLINT', 2),
+    8: ('INTEGER', 4),
+    10: ('FLOAT', 4),
+    12: ('DATE', 4),
+    13: ('TIME', 4),
+    16: ('BIGINT', 8),
+    23: ('BOOLEAN', 1),
+    27: ('DOUBLE PRECISION', 8),
+    35: ('TIMESTAMP', 8),
+    261: ('BLOB', 8),
+}
+
+
+def sql_insert(tabela, colunas):
+    """INSERT parametrizado para as colunas"""
+    marcadores = ', '.join('?' for _ in colunas)
+    return f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({marcadores})"
+
+
+def tipos_colunas(con, tabela, colunas):
+    """
+    Declaracao SQL e tamanho em bytes de cada coluna, lidos do RDB$FIELDS
+
+    Texto e declarado com o CHARACTER SET da coluna (ou o padrao do banco).
+    Retorna lista [(declaracao, bytes)] na ordem de colunas.
+    """
+    cur = con.cursor()
+    cur.execute("""
+        SELECT
+            TRIM(RF.RDB$FIELD_NAME),
+            F.RDB$FIELD_TYPE,
+            F.RDB$FIELD_SUB_TYPE,
+            F.RDB$FIELD_LENGTH,
+            F.RDB$FIELD_SCALE,
+            F.RDB$FIELD_PRECISION,
+            F.RDB$CHARACTER_LENGTH,
+            TRIM(COALESCE(CS.RDB$CHARACTER_SET_NAME,
+                          (SELECT RDB$CHARACTER_SET_NAME FROM RDB$DATABASE), 'NONE'))
+        FROM RDB$RELATION_FIELDS RF
+        JOIN RDB$FIELDS F ON F.RDB$FIELD_NAME = RF.RDB$FIELD_SOURCE
+        LEFT JOIN RDB$CHARACTER_SETS CS ON CS.RDB$CHARACTER_SET_ID = F.RDB$CHARACTER_SET_ID
+        WHERE RF.RDB$RELATION_NAME = ?
+    """, [tabela.upper()])
+
+    campos = {}
+    for nome, tipo, subtipo, tamanho, escala, precisao, caracteres, charset in cur.fetchall():
+        if tipo in (14, 37):
+            # Mesmo charset da coluna: o texto e transliterado e medido como no
+            # INSERT preparado (sem ele o parametro fica no charset da conexao)
+            declaracao = (f"{'CHAR' if tipo == 14 else 'VARCHAR'}({caracteres or tamanho})"
+                          f" CHARACTER SET {charset}")
+            campos[nome] = (declaracao, tamanho + (2 if tipo == 37 else 0))
+        elif tipo in (7, 8, 16) and escala and escala < 0:
+            declaracao = f"NUMERIC({precisao or 18}, {-escala})"
+            campos[nome] = (declaracao, TIPOS_FIREBIRD[tipo][1])
+        elif tipo == 261:
+            texto = f" CHARACTER SET {charset}" if subtipo == 1 else ''
+            campos[nome] = (f"BLOB SUB_TYPE {subtipo or 0}{texto}", 8)
+        elif tipo in TIPOS_FIREBIRD:
+            campos[nome] = TIPOS_FIREBIRD[tipo]
+        else:
+            raise ValueError(f"{tabela}.{nome}: tipo {tipo} nao suportado no EXECUTE BLOCK")
+    cur.close()
+
+    faltando = [c for c in colunas if c.upper() not in campos]
+    if faltando:
+        raise ValueError(f"Colunas nao encontradas em {tabela}: {', '.join(faltando)}")
+    return [campos[c.upper()] for c in colunas]
+
+
+class Quarentena:
+    """
+    Arquivo (JSON, uma linha por registro) com as linhas rejeitadas na carga
+
+    Cada registro tem a tabela, a origem (codigo ou linha do dump), o erro e
+    os parametros enviados, para conferir e reprocessar depois.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.total = 0
+        self.por_tabela = {}
+        self._arquivo = None
+
+    def registrar(self, tabela, origem, erro, parametros=None):
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+        if hasattr(origem, '_asdict'):
+            origem = origem._asdict()
+        json.dump({
+            'quando': datetime.now().isoformat(timespec='seconds'),
+            'tabela': tabela,
+            'origem': origem,
+            'erro': str(erro),
+            'parametros': parametros,
+        }, self._arquivo, ensure_ascii=False, default=str)
+        self._arquivo.write('\n')
+        self._arquivo.flush()
+        self.total += 1
+        self.por_tabela[tabela] = self.por_tabela.get(tabela, 0) + 1
+
+    def fechar(self):
+        """Fecha o arquivo e imprime quantas linhas foram para a quarentena"""
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+        if self.total:
+            print(f"\n[AVISO] {self.total:,} linhas em quarentena: {self.caminho}")
+            for tabela, quantidade in self.por_tabela.items():
+                print(f"  - {tabela}: {quantidade:,}")
+
+
+class CarregadorLote:
+    """Acumula linhas e envia em lotes um INSERT preparado uma vez"""
+
+    def __init__(self, con, tabela, colunas, tamanho_lote=TAMANHO_LOTE, nome=None, sql=None,
+                 dependencias=None, quarentena=None):
+        """
+        - colunas: colunas da tabela, uma por parametro da linha
+        - sql: comando por linha com ? (padrao: INSERT nas colunas); permite UPDATE
+        - dependencias: carregadores enviados antes deste (ex: pedidos antes dos itens)
+        - quarentena: Quarentena que recebe as linhas rejeitadas
+        """
+        self.con = con
+        self.tabela = tabela
+        self.nome = nome or tabela
+        self.colunas = list(colunas)
+        self.tamanho_lote = tamanho_lote
+        self.sql = sql or sql_insert(tabela, self.colunas)
+        self.dependencias = list(dependencias or [])
+        self.quarentena = quarentena
+        self.cur = con.cursor()
+        self.comando = self.cur.prep(self.sql)
+
+        self.lote = []
+        self.origens = []
+        self.inseridas = 0
+        self.erros = 0
+        self.lotes = 0
+        self.envios = 0
+        self.inicio = time.time()
+        self._proximo_progresso = PROGRESSO_A_CADA
+
+    def adicionar(self, parametros, origem=None, fonte=None):
+        """
+        Enfileira uma linha
+
+        - origem: identifica a linha nas mensagens de erro (ex: codigo)
+        - fonte: linha de origem gravada na quarentena se for rejeitada
+          (padrao: a propria origem)
+        """
+        self.lote.append(parametros)
+        self.origens.append((origem, fonte))
+        if len(self.lote) >= self.tamanho_lote:
+            self.enviar()
+
+    def enviar(self):
+        """Envia o lote pendente"""
+        if not self.lote:
+            return
+
+        for dependencia in self.dependencias:
+            dependencia.enviar()
+
+        lote, origens = self.lote, self.origens
+        self.lote, self.origens = [], []
+        self.lotes += 1
+        self._enviar_lote(lote, origens)
+
+        if self.inseridas >= self._proximo_progresso:
+            print(f"{self.inseridas:,} {self.nome} enviados...")
+            while self._proximo_progresso <= self.inseridas:
+                self._proximo_progresso += PROGRESSO_A_CADA
+
+    def _enviar_lote(self, lote, origens):
+        """Envia o lote; se falhar, divide ao meio ate isolar as linhas com erro"""
+        erro = self._tentar(lote)
+        if erro is None:
+            self.inseridas += len(lote)
+            return
+
+        if len(lote) == 1:
+            self.rejeitar(lote[0], origens[0][0], erro, origens[0][1])
+            return
+
+        meio = len(lote) // 2
+        self._enviar_lote(lote[:meio], origens[:meio])
+        self._enviar_lote(lote[meio:], origens[meio:])
+
+    def _tentar(self, lote):
+        """executemany sob savepoint; devolve o erro (lote desfeito) ou None"""
+        # Um comando isolado que falha e desfeito sozinho pelo Firebird
+        if len(lote) == 1:
+            self.envios += 1
+            try:
+                self.cur.execute(self.comando, lote[0])
+            except Exception as erro:
+                return erro
+            return None
+
+        self.con.savepoint(SAVEPOINT_LOTE)
+        self.envios += len(lote)
+        try:
+            self.cur.executemany(self.comando, lote)
+        except Exception as erro:
+            self.con.rollback(savepoint=SAVEPOINT_LOTE)
+            return erro
+        return None
+
+    def rejeitar(self, parametros, origem, erro, fonte=None):
+        """Conta a linha como erro e manda para a quarentena"""
+        self.erros += 1
+        if self.erros <= MAX_ERROS_IMPRESSOS:
+            print(f"Erro ao migrar {self.nome} {origem}: {erro}")
+        if self.quarentena is not None:
+            self.quarentena.registrar(self.tabela, origem if fonte is None else fonte, erro, parametros)
+
+    def segundos(self):
+        return time.time() - self.inicio
+
+    def finalizar(self):
+        """Envia o que falta e imprime o resumo (linhas/s); nao faz commit"""
+        self.enviar()
+        segundos = self.segundos()
+        taxa = self.inseridas / segundos if segundos > 0 else 0
+        print(f"{self.nome}: {self.inseridas:,} gravados, {self.erros:,} erros "
+              f"em {segundos:.1f}s ({taxa:,.0f} linhas/s, {self.lotes} lotes, "
+              f"{self.envios:,} comandos enviados)")
+        if self.erros > MAX_ERROS_IMPRESSOS:
+            print(f"  ({self.erros - MAX_ERROS_IMPRESSOS} erros nao exibidos)")
+        return {'inseridas': self.inseridas, 'erros': self.erros, 'envios': self.envios,
+                'segundos': segundos, 'linhas_por_segundo': taxa}
+
+
+class CarregadorBloco(CarregadorLote):
+    """
+    Mesmo contrato do CarregadorLote, mas cada lote vira um unico EXECUTE BLOCK
+
+    EXECUTE BLOCK (p0_0 INTEGER = ?, p0_1 VARCHAR(20) CHARACTER SET WIN1252 = ?, p1_0 ...)
+    AS BEGIN
+        INSERT INTO T (A, B) VALUES (:p0_0, :p0_1);
+        INSERT INTO T (A, B) VALUES (:p1_0, :p1_1);
+        ...
+    END
+
+    O bloco e atomico: se uma linha falhar nada do bloco fica gravado e a
+    bissecao segue com blocos menores (linha isolada vai com o comando simples).
+    """
+
+    def __init__(self, con, tabela, colunas, tamanho_lote=None, nome=None, sql=None,
+                 dependencias=None, quarentena=None, tipos=None):
+        """
+        - tipos: [(declaracao, bytes)] por parametro (padrao: lidos do RDB$FIELDS)
+        - tamanho_lote: maximo de linhas por bloco (o limite calculado prevalece)
+        """
+        super().__init__(con, tabela, colunas, 1, nome, sql, dependencias, quarentena)
+        self.tipos = tipos or tipos_colunas(con, tabela, self.colunas)
+        self.linhas_por_bloco = self._calcular_linhas_por_bloco(tamanho_lote or MAX_LINHAS_BLOCO)
+        self.tamanho_lote = self.linhas_por_bloco
+        self._blocos = {}
+
+    def _sql_linha(self, i):
+        """Comando da linha i com os ? trocados por :p<i>_<coluna>"""
+        contador = iter(range(len(self.colunas)))
+        return re.sub(r'\?', lambda _: f":p{i}_{next(contador)}", self.sql)
+
+    def _declaracao_linha(self, i):
+        return ', '.join(f"p{i}_{j} {tipo} = ?" for j, (tipo, _) in enumerate(self.tipos))
+
+    def _calcular_linhas_por_bloco(self, maximo):
+        ultimo = maximo - 1
+        texto_linha = len(self._declaracao_linha(ultimo)) + len(self._sql_linha(ultimo)) + 4
+        # valor + indicador de nulo, alinhados em 4 bytes
+        mensagem_linha = sum((tamanho + 2 + 3) & ~3 for _, tamanho in self.tipos) or 1
+
+        return max(1, min(
+            maximo,
+            (LIMITE_SQL - 40) // texto_linha,
+            LIMITE_MENSAGEM // mensagem_linha,
+            LIMITE_PARAMETROS // max(1, len(self.colunas)),
+        ))
+
+    def _comando_bloco(self, linhas):
+        """EXECUTE BLOCK preparado para um numero de linhas (cache por tamanho)"""
+        comando = self._blocos.get(linhas)
+        if comando is None:
+            declaracoes = ',\n'.join(self._declaracao_linha(i) for i in range(linhas))
+            corpo = '\n'.join(self._sql_linha(i) + ';' for i in range(linhas))
+            comando = self.cur.prep(f"EXECUTE BLOCK (\n{declaracoes}\n) AS BEGIN\n{corpo}\nEND")
+            self._blocos[linhas] = comando
+        return comando
+
+    def _tentar(self, lote):
+        """Um EXECUTE BLOCK com o lote todo (atomico); devolve o erro ou None"""
+        if len(lote) == 1:
+            comando, parametros = self.comando, lote[0]
+        else:
+            comando = self._comando_bloco(len(lote))
+            parametros = [valor for linha in lote for valor in linha]
+        self.envios += 1
+        try:
+            self.cur.execute(comando, parametros)
+        except Exception as erro:
+            return erro
+        return None
+
+
+def criar_carregador(con, tabela, colunas, modo='lote', **opcoes):
+    """
+    Carregador no modo escolhido pelo script
+
+    - modo 'lote': executemany com comando preparado (CarregadorLote)
+    - modo 'bloco': EXECUTE BLOCK com varias linhas por envio (CarregadorBloco)
+    """
+    if modo == 'bloco':
+        return CarregadorBloco(con, tabela, colunas, **opcoes)
+    if modo == 'lote':
+        return CarregadorLote(con, tabela, colunas, **opcoes)
+    raise ValueError(f"Modo de carga desconhecido: {modo}")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chaves ja existentes nas tabelas do Firebird, carregadas uma unica vez
+
+Substitui o "SELECT CODIGO FROM <tabela> WHERE CODIGO = ?" antes de cada
+insert: as chaves da tabela sao lidas de uma vez (fetchmany) para um
+conjunto compacto de inteiros e a pergunta "ja existe?" e respondida em
+memoria. O script acrescenta ao conjunto o que for inserindo, para que ele
+continue valendo durante a carga.
+
+O conjunto usa um bitmap (1 bit por codigo) quando as chaves sao densas,
+como os CODIGO sequenciais, e um array ordenado com busca binaria quando
+sao esparsas; chaves acrescentadas fora da faixa do bitmap/array ficam em
+um set a parte.
+
+Uso:
+    from chaves_firebird import carregar_chaves
+
+    pedidos_existentes = carregar_chaves(con, 'PEDIDOS')
+    if idpedido in pedidos_existentes:
+        continue
+    ...
+    pedidos_existentes.add(idpedido)
+"""
+
+from array import array
+from bisect import bisect_left
+
+# Linhas por fetchmany ao ler as chaves
+LINHAS_POR_LEITURA = 10000
+
+# Usa bitmap quando ele ocupa no maximo isso em bits por chave (64 = mesmo
+# espaco do array de int64)
+BITS_POR_CHAVE_BITMAP = 64
+
+
+class ConjuntoChaves:
+    """Conjunto de chaves inteiras: bitmap (denso) ou array ordenado (esparso)"""
+
+    def __init__(self, chaves=()):
+        valores = chaves if isinstance(chaves, array) else array('q', chaves)
+        self.extras = set()
+        self.bitmap = None
+        self.ordenadas = None
+        self.base = 0
+        self._total = 0
+
+        if not valores:
+            self.ordenadas = array('q')
+            return
+
+        minimo = min(valores)
+        maximo = max(valores)
+        faixa = maximo - minimo + 1
+
+        if faixa <= len(valores) * BITS_POR_CHAVE_BITMAP:
+            self.base = minimo
+            self.bitmap = bytearray((faixa + 7) // 8)
+            for chave in valores:
+                self._add_bitmap(chave)
+        else:
+            self.ordenadas = array('q', sorted(set(valores)))
+            self._total = len(self.ordenadas)
+
+    def _add_bitmap(self, chave):
+        posicao = chave - self.base
+        byte, bit = posicao >> 3, 1 << (posicao & 7)
+        if not self.bitmap[byte] & bit:
+            self.bitmap[byte] |= bit
+            self._total += 1
+
+    def _no_bitmap(self, chave):
+        posicao = chave - self.base
+        return 0 <= posicao < len(self.bitmap) * 8
+
+    def __contains__(self, chave):
+        if chave is None:
+            return False
+        if self.bitmap is not None:
+            if self._no_bitmap(chave):
+                posicao = chave - self.base
+                return bool(self.bitmap[posicao >> 3] & (1 << (posicao & 7)))
+        else:
+            i = bisect_left(self.ordenadas, chave)
+            if i < len(self.ordenadas) and self.ordenadas[i] == chave:
+                return True
+        return chave in self.extras
+
+    def add(self, chave):
+        """Registra uma chave inserida durante a carga"""
+        if chave in self:
+            return
+        if self.bitmap is not None and self._no_bitmap(chave):
+            self._add_bitmap(chave)
+        else:
+            self.extras.add(chave)
+
+    def __len__(self):
+        return self._total + len(self.extras)
+
+    def descricao(self):
+        """Resumo do formato usado (para as mensagens dos scripts)"""
+        if self.bitmap is not None:
+            return f"bitmap de {len(self.bitmap) / 1024:,.0f} KB a partir de {self.base}"
+        return f"array ordenado de {len(self.ordenadas):,} chaves"
+
+
+def carregar_chaves(con, tabela, coluna='CODIGO', filtro=None):
+    """
+    Le todas as chaves da tabela uma unica vez e devolve um ConjuntoChaves
+
+    - filtro: condicao opcional do WHERE (ex: "TIPO = 'FUNCIONARIO'")
+    """
+    sql = f"SELECT {coluna} FROM {tabela} WHERE {coluna} IS NOT NULL"
+    if filtro:
+        sql += f" AND ({filtro})"
+
+    cur = con.cursor()
+    cur.execute(sql)
+    valores = array('q')
+    while True:
+        linhas = cur.fetchmany(LINHAS_POR_LEITURA)
+        if not linhas:
+            break
+        valores.extend(linha[0] for linha in linhas)
+    cur.close()
+
+    conjunto = ConjuntoChaves(valores)
+    print(f"Chaves de {tabela}.{coluna}: {len(conjunto):,} ({conjunto.descricao()})")
+    return conjunto
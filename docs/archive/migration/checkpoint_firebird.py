@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pontos de retomada (checkpoints) das etapas da migracao, no proprio Firebird
+
+Cada etapa grava na tabela MIGRACAO_CHECKPOINT, dentro da mesma transacao do
+lote, a faixa de chaves ja gravada (chave inicial e ultima chave commitada),
+as contagens e a impressao do dump de origem. Como o checkpoint e commitado
+junto com os dados, nunca fica adiantado nem atrasado em relacao a eles.
+
+Ao reiniciar, o script pula (antes de decodificar a linha do dump) e deixa
+de gravar as chaves que ja estao em alguma faixa registrada. Se o dump mudou
+(impressao diferente), os checkpoints da etapa sao descartados.
+
+Uso:
+    from checkpoint_firebird import Checkpoint
+
+    checkpoint = Checkpoint(con, 'itens', arquivo_dump, 'PEDIDOS_ITENS')
+    for chave in sorted(chaves):
+        if checkpoint.feito(chave):
+            continue
+        ...
+        carga.enviar()
+        checkpoint.registrar(chave_inicial, chave, linhas, erros)
+        con.commit()
+    checkpoint.concluir()
+    con.commit()
+"""
+
+import hashlib
+import os
+from datetime import datetime
+
+TABELA_CHECKPOINT = 'MIGRACAO_CHECKPOINT'
+
+DDL_CHECKPOINT = f"""
+    CREATE TABLE {TABELA_CHECKPOINT} (
+        ETAPA VARCHAR(40) NOT NULL,
+        PARTE VARCHAR(40) NOT NULL,
+        DUMP_HASH VARCHAR(64),
+        TABELA VARCHAR(31),
+        CHAVE_INICIAL BIGINT,
+        ULTIMA_CHAVE BIGINT,
+        LINHAS INTEGER,
+        ERROS INTEGER,
+        ATUALIZADO TIMESTAMP,
+        CONSTRAINT PK_MIGRACAO_CHECKPOINT PRIMARY KEY (ETAPA, PARTE)
+    )
+"""
+
+# Parte reservada que marca a etapa inteira como concluida
+PARTE_CONCLUIDA = 'CONCLUIDA'
+
+# Bytes lidos no inicio, no meio e no fim do dump para a impressao
+TAMANHO_AMOSTRA = 1024 * 1024
+
+
+def impressao_dump(arquivo):
+    """
+    SHA-256 do tamanho e de amostras do inicio, meio e fim do dump
+
+    Ler o dump inteiro so para o hash custaria o mesmo que o parse que o
+    checkpoint quer evitar; as amostras mudam com qualquer novo pg_dump.
+    """
+    tamanho = os.path.getsize(arquivo)
+    h = hashlib.sha256(str(tamanho).encode('ascii'))
+    with open(arquivo, 'rb') as f:
+        for posicao in (0, max(tamanho // 2 - TAMANHO_AMOSTRA // 2, 0), max(tamanho - TAMANHO_AMOSTRA, 0)):
+            f.seek(posicao)
+            h.update(f.read(TAMANHO_AMOSTRA))
+    return h.hexdigest()
+
+
+def criar_tabela_checkpoint(con):
+    """Cria MIGRACAO_CHECKPOINT se ainda nao existir (DDL commitado na hora)"""
+    cur = con.cursor()
+    cur.execute("SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", [TABELA_CHECKPOINT])
+    if not cur.fetchone()[0]:
+        cur.execute(DDL_CHECKPOINT)
+        con.commit()
+        print(f"Tabela {TABELA_CHECKPOINT} criada")
+    cur.close()
+
+
+class Checkpoint:
+    """Faixas de chaves ja gravadas por uma etapa"""
+
+    def __init__(self, con, etapa, arquivo_dump, tabela, hash_dump=None):
+        """
+        - tabela: tabela de destino (so informativo)
+        - hash_dump: impressao ja calculada (os processos de uma etapa
+          paralela recebem a do processo principal)
+        """
+        self.con = con
+        self.etapa = etapa
+        self.tabela = tabela
+        self.hash = hash_dump or impressao_dump(arquivo_dump)
+        self.cur = con.cursor()
+
+        criar_tabela_checkpoint(con)
+        self._carregar()
+
+    def _carregar(self):
+        self.cur.execute(f"""
+            SELECT PARTE, DUMP_HASH, CHAVE_INICIAL, ULTIMA_CHAVE, LINHAS, ERROS
+            FROM {TABELA_CHECKPOINT} WHERE ETAPA = ?
+        """, [self.etapa])
+        linhas = self.cur.fetchall()
+
+        if any(linha[1] != self.hash for linha in linhas):
+            print(f"[AVISO] {self.etapa}: dump diferente do checkpoint anterior, recomecando do zero")
+            self.reiniciar()
+            linhas = []
+
+        self.concluida = any(linha[0].strip() == PARTE_CONCLUIDA for linha in linhas)
+        self.intervalos = sorted((linha[2], linha[3]) for linha in linhas
+                                 if linha[0].strip() != PARTE_CONCLUIDA and linha[3] is not None)
+        self.linhas = sum(linha[4] or 0 for linha in linhas)
+        self.erros = sum(linha[5] or 0 for linha in linhas)
+
+    def reiniciar(self):
+        """Descarta os checkpoints da etapa (commitado na hora)"""
+        self.cur.execute(f"DELETE FROM {TABELA_CHECKPOINT} WHERE ETAPA = ?", [self.etapa])
+        self.con.commit()
+        self.concluida = False
+        self.intervalos = []
+        self.linhas = 0
+        self.erros = 0
+
+    def retomando(self):
+        """True se ha trabalho ja gravado de uma execucao anterior"""
+        return bool(self.intervalos)
+
+    def feito(self, chave):
+        """True se a chave esta em alguma faixa ja commitada"""
+        if chave is None:
+            return False
+        for inicial, ultima in self.intervalos:
+            if inicial <= chave <= ultima:
+                return True
+        return False
+
+    def registrar(self, chave_inicial, ultima_chave, linhas, erros=0):
+        """
+        Grava a faixa [chave_inicial, ultima_chave] como feita, sem commit
+
+        Chamar logo antes do commit do lote: o checkpoint entra na mesma
+        transacao dos dados.
+        """
+        self.cur.execute(f"""
+            UPDATE OR INSERT INTO {TABELA_CHECKPOINT}
+                (ETAPA, PARTE, DUMP_HASH, TABELA, CHAVE_INICIAL, ULTIMA_CHAVE, LINHAS, ERROS, ATUALIZADO)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            MATCHING (ETAPA, PARTE)
+        """, [self.etapa, str(chave_inicial), self.hash, self.tabela, chave_inicial, ultima_chave,
+              linhas, erros, datetime.now()])
+
+    def concluir(self):
+        """Marca a etapa inteira como concluida, sem commit"""
+        self.cur.execute(f"""
+            UPDATE OR INSERT INTO {TABELA_CHECKPOINT}
+                (ETAPA, PARTE, DUMP_HASH, TABELA, LINHAS, ERROS, ATUALIZADO)
+            VALUES (?, ?, ?, ?, 0, 0, ?)
+            MATCHING (ETAPA, PARTE)
+        """, [self.etapa, PARTE_CONCLUIDA, self.hash, self.tabela, datetime.now()])
+        self.concluida = True
+
+    def descricao(self):
+        """Resumo para as mensagens dos scripts"""
+        if self.concluida:
+            return f"{self.etapa}: concluida ({self.linhas:,} linhas)"
+        if not self.intervalos:
+            return f"{self.etapa}: sem checkpoint, comecando do inicio"
+        faixas = ', '.join(f"{inicial}-{ultima}" for inicial, ultima in self.intervalos)
+        return f"{self.etapa}: retomando, ja gravados {self.linhas:,} linhas (chaves {faixas})"
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Comparacao em streaming de duas fontes lidas na ordem da chave (merge join)
+
+Em vez de montar um dict com um lado inteiro e fazer fetchall() do outro, o
+dump e o Firebird sao lidos lado a lado, em ordem crescente de chave, como
+no merge join de um banco. A memoria fica limitada ao lote do fetchmany, ao
+run de ordenacao do dump e aos exemplos guardados pelo relatorio, qualquer
+que seja o tamanho da tabela.
+
+- linhas_firebird: SELECT ... ORDER BY <chave> lido com fetchmany
+- ordenar_por_chave: o COPY costuma vir na ordem do id, mas nao ha garantia;
+  as linhas sao ordenadas em runs de TAMANHO_RUN e, com mais de um run,
+  gravadas em arquivos temporarios e intercaladas (heapq.merge)
+- ordenar_colunas: colunas ja convertidas (memmaps do cache_colunar) postas
+  em ordem de chave com um argsort, sem reler o dump; ordenar_por_chave
+  fica para quando o cache nao esta disponivel
+- comparar_ordenados: eventos IGUAL, SO_ESQUERDA, SO_DIREITA e DIFERENTE
+- RelatorioComparacao: conta os eventos, guarda os primeiros exemplos de
+  cada tipo e grava as divergencias em CSV
+
+Os dois lados sao iteraveis de (chave, valores), com valores uma tupla. As
+chaves devem ser inteiras (ou ter a mesma ordem no Python e no ORDER BY).
+
+Uso:
+    from comparador_ordenado import (RelatorioComparacao, comparar_ordenados,
+                                     diferencas_colunas, linhas_firebird, ordenar_por_chave)
+
+    pedidos = carregar_tabela(arquivo, 'pedidos', TIPOS_PEDIDOS)   (cache_colunar)
+    dump = ordenar_colunas(pedidos['idpedido'], [pedidos['vlnota']],
+                           descartar=pedidos.nulos('idpedido'))
+    # sem o cache:
+    dump = ordenar_por_chave((p.idpedido, (p.vlnota,)) for _, p in ler_tipados(...))
+    firebird = linhas_firebird(cur, "SELECT CODIGO, VLR_TOTAL FROM PEDIDOS ORDER BY CODIGO")
+    relatorio = RelatorioComparacao(['VLR_TOTAL'], exemplos=20)
+    for evento in comparar_ordenados(dump, firebird, diferencas_colunas(['VLR_TOTAL'], [1])):
+        relatorio.registrar(evento)
+    relatorio.fechar()
+"""
+
+import csv
+import heapq
+import pickle
+import tempfile
+from collections import namedtuple
+from itertools import zip_longest
+from operator import itemgetter
+
+# Linhas por fetchmany no Firebird
+TAMANHO_FETCH = 5000
+
+# Linhas ordenadas em memoria por run (o resto vai para arquivos temporarios)
+TAMANHO_RUN = 200000
+
+IGUAL = 'igual'
+SO_ESQUERDA = 'so_esquerda'
+SO_DIREITA = 'so_direita'
+DIFERENTE = 'diferente'
+TIPOS_EVENTO = (IGUAL, DIFERENTE, SO_ESQUERDA, SO_DIREITA)
+
+Evento = namedtuple('Evento', 'tipo chave esquerda direita campos')
+
+_chave = itemgetter(0)
+
+
+def linhas_firebird(cur, sql, parametros=None, tamanho=TAMANHO_FETCH):
+    """(chave, valores) de um SELECT cuja primeira coluna e a chave do ORDER BY"""
+    cur.execute(sql, parametros or [])
+    while True:
+        linhas = cur.fetchmany(tamanho)
+        if not linhas:
+            break
+        for linha in linhas:
+            yield linha[0], tuple(linha[1:])
+
+
+def _gravar_run(linhas):
+    arquivo = tempfile.TemporaryFile()
+    for linha in linhas:
+        pickle.dump(linha, arquivo, pickle.HIGHEST_PROTOCOL)
+    arquivo.seek(0)
+    return arquivo
+
+
+def _ler_run(arquivo):
+    try:
+        while True:
+            yield pickle.load(arquivo)
+    except EOFError:
+        pass
+    finally:
+        arquivo.close()
+
+
+def ordenar_por_chave(linhas, tamanho_run=TAMANHO_RUN):
+    """
+    Devolve as linhas (chave, valores) em ordem de chave com memoria limitada
+
+    Ate tamanho_run linhas a ordenacao e feita em memoria; acima disso cada
+    run ordenado vai para um arquivo temporario e os runs sao intercalados.
+    Chaves iguais mantem a ordem de leitura.
+    """
+    runs = []
+    atual = []
+    for linha in linhas:
+        atual.append(linha)
+        if len(atual) >= tamanho_run:
+            atual.sort(key=_chave)
+            runs.append(_gravar_run(atual))
+            atual = []
+    atual.sort(key=_chave)
+
+    if not runs:
+        yield from atual
+        return
+    if atual:
+        runs.append(_gravar_run(atual))
+    yield from heapq.merge(*(_ler_run(run) for run in runs), key=_chave)
+
+
+def ordenar_colunas(chaves, colunas, descartar=None, tamanho=TAMANHO_FETCH):
+    """
+    (chave, valores) a partir de arrays numpy do mesmo tamanho, em ordem de chave
+
+    - chaves: coluna da chave; colunas: arrays dos valores, na ordem da tupla
+    - descartar: mascara das linhas que ficam de fora (ex: chave nula)
+
+    A ordem vem de um argsort estavel da chave (chaves iguais mantem a ordem
+    do dump, como no ordenar_por_chave); as linhas saem em blocos de tamanho.
+    """
+    ordem = chaves.argsort(kind='stable')
+    if descartar is not None:
+        ordem = ordem[~descartar[ordem]]
+
+    for inicio in range(0, len(ordem), tamanho):
+        bloco = ordem[inicio:inicio + tamanho]
+        valores = [coluna[bloco].tolist() for coluna in colunas]
+        yield from zip(chaves[bloco].tolist(), zip(*valores))
+
+
+def _grupos(linhas, lado):
+    """(chave, [valores]) das linhas consecutivas com a mesma chave; confere a ordem"""
+    chave_grupo = None
+    valores_grupo = []
+    for chave, valores in linhas:
+        if valores_grupo and chave == chave_grupo:
+            valores_grupo.append(valores)
+            continue
+        if valores_grupo:
+            if chave < chave_grupo:
+                raise ValueError(f"Lado {lado} fora de ordem: chave {chave} depois de {chave_grupo}")
+            yield chave_grupo, valores_grupo
+        chave_grupo, valores_grupo = chave, [valores]
+    if valores_grupo:
+        yield chave_grupo, valores_grupo
+
+
+def diferencas_colunas(colunas, tolerancias=None):
+    """
+    Funcao(valores_esquerda, valores_direita) -> colunas diferentes
+
+    - tolerancias: diferenca absoluta aceita por coluna (ex: 1 centavo); None = igualdade
+    """
+    tolerancias = list(tolerancias or [None] * len(colunas))
+
+    def diferencas(esquerda, direita):
+        campos = []
+        for coluna, tolerancia, a, b in zip(colunas, tolerancias, esquerda, direita):
+            if tolerancia is not None and a is not None and b is not None:
+                if abs(a - b) > tolerancia:
+                    campos.append(coluna)
+            elif a != b:
+                campos.append(coluna)
+        return campos
+
+    return diferencas
+
+
+def comparar_ordenados(esquerda, direita, diferencas=None):
+    """
+    Merge join de duas fontes (chave, valores) em ordem crescente de chave
+
+    Gera um Evento por par (ou linha sem par). Chaves repetidas sao pareadas
+    na ordem de leitura dentro do grupo; as que sobram viram SO_ESQUERDA ou
+    SO_DIREITA. Fonte fora de ordem gera ValueError.
+
+    - diferencas: funcao(valores_esquerda, valores_direita) -> campos
+      diferentes (padrao: tupla inteira, campos = ['*'])
+    """
+    if diferencas is None:
+        def diferencas(a, b):
+            return [] if a == b else ['*']
+
+    grupos_esquerda = _grupos(esquerda, 'esquerdo')
+    grupos_direita = _grupos(direita, 'direito')
+    grupo_e = next(grupos_esquerda, None)
+    grupo_d = next(grupos_direita, None)
+
+    while grupo_e is not None or grupo_d is not None:
+        if grupo_d is None or (grupo_e is not None and grupo_e[0] < grupo_d[0]):
+            chave, linhas = grupo_e
+            for valores in linhas:
+                yield Evento(SO_ESQUERDA, chave, valores, None, None)
+            grupo_e = next(grupos_esquerda, None)
+        elif grupo_e is None or grupo_d[0] < grupo_e[0]:
+            chave, linhas = grupo_d
+            for valores in linhas:
+                yield Evento(SO_DIREITA, chave, None, valores, None)
+            grupo_d = next(grupos_direita, None)
+        else:
+            chave = grupo_e[0]
+            for a, b in zip_longest(grupo_e[1], grupo_d[1]):
+                if b is None:
+                    yield Evento(SO_ESQUERDA, chave, a, None, None)
+                elif a is None:
+                    yield Evento(SO_DIREITA, chave, None, b, None)
+                else:
+                    campos = diferencas(a, b)
+                    yield Evento(DIFERENTE if campos else IGUAL, chave, a, b, campos)
+            grupo_e = next(grupos_esquerda, None)
+            grupo_d = next(grupos_direita, None)
+
+
+class RelatorioComparacao:
+    """Contagens, primeiros exemplos de cada tipo e CSV das divergencias"""
+
+    def __init__(self, colunas, exemplos=20, arquivo_csv=None, nomes=('PG', 'FB')):
+        """
+        - colunas: nomes dos valores (mesma ordem nos dois lados)
+        - exemplos: eventos guardados por tipo (os demais so sao contados)
+        - arquivo_csv: grava cada evento diferente de IGUAL (None = nao grava)
+        - nomes: rotulos dos lados esquerdo e direito no CSV e no resumo
+        """
+        self.colunas = list(colunas)
+        self.max_exemplos = exemplos
+        self.nomes = nomes
+        self.contagem = {tipo: 0 for tipo in TIPOS_EVENTO}
+        self.exemplos = {tipo: [] for tipo in TIPOS_EVENTO}
+        self.arquivo_csv = arquivo_csv
+        self._arquivo = None
+        self._csv = None
+        if arquivo_csv:
+            self._arquivo = open(arquivo_csv, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._arquivo, delimiter=';')
+            self._csv.writerow(['evento', 'chave', 'campos']
+                               + [f"{nomes[0]}_{c}" for c in self.colunas]
+                               + [f"{nomes[1]}_{c}" for c in self.colunas])
+
+    def registrar(self, evento):
+        self.contagem[evento.tipo] += 1
+        exemplos = self.exemplos[evento.tipo]
+        if len(exemplos) < self.max_exemplos:
+            exemplos.append(evento)
+        if self._csv is not None and evento.tipo != IGUAL:
+            vazio = [''] * len(self.colunas)
+            self._csv.writerow([evento.tipo, evento.chave, ','.join(evento.campos or [])]
+                               + list(evento.esquerda or vazio) + list(evento.direita or vazio))
+
+    def consumir(self, eventos):
+        """Registra todos os eventos (sem guarda-los) e devolve o relatorio"""
+        for evento in eventos:
+            self.registrar(evento)
+        return self
+
+    def fechar(self):
+        """Fecha o CSV e imprime as contagens"""
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+        esquerda, direita = self.nomes
+        print(f"  Iguais: {self.contagem[IGUAL]:,}")
+        print(f"  Com diferencas: {self.contagem[DIFERENTE]:,}")
+        print(f"  So no {esquerda}: {self.contagem[SO_ESQUERDA]:,}")
+        print(f"  So no {direita}: {self.contagem[SO_DIREITA]:,}")
+        if self.arquivo_csv and any(self.contagem[t] for t in (DIFERENTE, SO_ESQUERDA, SO_DIREITA)):
+            print(f"  Divergencias gravadas em: {self.arquivo_csv}")
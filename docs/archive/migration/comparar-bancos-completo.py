@@ -1,118 +1,97 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Compara valores entre PostgreSQL e Firebird em uma mesma consulta
+Compara valores entre PostgreSQL e Firebird lendo os dois em ordem de codigo
+(merge join em streaming, memoria limitada para qualquer tamanho de tabela)
+
+Os pedidos do dump vem do cache colunar (so convertidos na primeira
+execucao); sem numpy, o dump e lido e ordenado a cada execucao.
 """
 
 import sys, codecs
 
-if sys.platform == 'win32':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+from comparador_ordenado import (DIFERENTE, IGUAL, SO_DIREITA, SO_ESQUERDA, RelatorioComparacao,
+                                 comparar_ordenados, diferencas_colunas, linhas_firebird,
+                                 ordenar_colunas, ordenar_por_chave)
+from conexao_firebird import conectar
+from registros_dump import ler_tipados
 
 try:
-    import fdb
+    from cache_colunar import TIPOS_PEDIDOS as TIPOS_CACHE, carregar_tabela
 except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
+    carregar_tabela = None
+
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-def parse_linha(linha):
-    return linha.split('\t')
+
+ARQUIVO_VENDAS = r'c:\Projeto\Academia\vendas-extraidas.sql'
+
+# Pedidos fora do padrao (valores diferentes, so no PG, so no FB)
+ARQUIVO_DIVERGENCIAS = r'c:\Projeto\Academia\divergencias-pedidos.csv'
+
+TIPOS_PEDIDOS = {'idpedido': 'int', 'vlnota': 'centavos'}
 
 print("="*100)
 print("COMPARACAO COMPLETA: POSTGRESQL vs FIREBIRD")
 print("="*100)
 
-# Ler pedidos do PostgreSQL
-with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-    conteudo = f.read()
-
-linhas = conteudo.split('\n')
-
-print("\n>> Lendo pedidos do PostgreSQL...")
-lendo_pedidos = False
-pedidos_pg = {}
-
-for linha in linhas:
-    if 'COPY public.pedidos' in linha:
-        lendo_pedidos = True
-        continue
-    if linha.strip() == '\\.':
-        lendo_pedidos = False
-        if pedidos_pg:
-            break
-    if lendo_pedidos and linha.strip():
-        campos = parse_linha(linha.strip())
-        if len(campos) >= 6:
-            idpedido = int(campos[0])
-            vlnota = float(campos[4]) if campos[4] not in ['\\N', ''] else 0
-            vlprod = float(campos[5]) if campos[5] not in ['\\N', ''] else 0
-
-            pedidos_pg[idpedido] = {
-                'vlnota': vlnota,
-                'vlprod': vlprod
-            }
-
-print(f"Total de pedidos do PostgreSQL: {len(pedidos_pg):,}")
-
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
+
+def pedidos_dump():
+    """(idpedido, (vlnota em centavos,)) do dump, em ordem de idpedido"""
+    if carregar_tabela is not None:
+        # Cache colunar: so abre os memmaps e ordena pelo idpedido (vlnota nulo vale 0)
+        pedidos = carregar_tabela(ARQUIVO_VENDAS, 'pedidos', TIPOS_CACHE)
+        if pedidos is not None:
+            return ordenar_colunas(pedidos['idpedido'], [pedidos['vlnota']],
+                                   descartar=pedidos.nulos('idpedido'))
+
+    linhas = ((pedido.idpedido, (pedido.vlnota or 0,))
+              for _, pedido in ler_tipados(ARQUIVO_VENDAS, {'pedidos': TIPOS_PEDIDOS})
+              if pedido.idpedido is not None)
+    return ordenar_por_chave(linhas)
+
+
+def reais(centavos):
+    return centavos / 100 if centavos else 0
+
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
-    # Buscar todos os pedidos do Firebird que também existem no PostgreSQL
-    print("\n>> Comparando pedidos que existem em ambos os bancos...")
+    # Dump e Firebird lidos lado a lado na ordem do codigo (merge join), sem
+    # dict de um lado nem fetchall do outro
+    print("\n>> Comparando pedidos do PostgreSQL e do Firebird (em ordem de codigo)...")
     print("-"*100)
 
-    cur.execute("SELECT CODIGO, VLR_TOTAL FROM PEDIDOS ORDER BY CODIGO")
-    pedidos_fb = cur.fetchall()
-
-    print(f"Total de pedidos no Firebird: {len(pedidos_fb):,}")
-
-    # Comparar valores
-    comparacoes = []
-    diferencas_encontradas = 0
-    pedidos_so_fb = 0
-    pedidos_ok = 0
-
-    for codigo_fb, vlr_total_fb in pedidos_fb:
-        vlr_fb = float(vlr_total_fb) / 100 if vlr_total_fb else 0
-
-        if codigo_fb in pedidos_pg:
-            vlr_pg = pedidos_pg[codigo_fb]['vlnota']
-            diferenca = abs(vlr_fb - vlr_pg)
-
-            comparacoes.append({
-                'codigo': codigo_fb,
-                'fb': vlr_fb,
-                'pg': vlr_pg,
-                'diferenca': diferenca
-            })
-
-            if diferenca > 0.01:  # Diferença maior que 1 centavo
-                diferencas_encontradas += 1
-            else:
-                pedidos_ok += 1
-        else:
-            pedidos_so_fb += 1
-            if pedidos_so_fb <= 5:
-                comparacoes.append({
-                    'codigo': codigo_fb,
-                    'fb': vlr_fb,
-                    'pg': None,
-                    'diferenca': None
-                })
+    firebird = linhas_firebird(cur, "SELECT CODIGO, COALESCE(VLR_TOTAL, 0) FROM PEDIDOS ORDER BY CODIGO")
+    relatorio = RelatorioComparacao(['VLR_TOTAL'], exemplos=20, arquivo_csv=ARQUIVO_DIVERGENCIAS)
+
+    # Diferença maior que 1 centavo
+    diferencas = diferencas_colunas(['VLR_TOTAL'], [1])
+    min_dif = max_dif = None
+    soma_dif = 0
+
+    for evento in comparar_ordenados(pedidos_dump(), firebird, diferencas):
+        relatorio.registrar(evento)
+        if evento.tipo == DIFERENTE:
+            diferenca = abs(evento.esquerda[0] - evento.direita[0])
+            min_dif = diferenca if min_dif is None else min(min_dif, diferenca)
+            max_dif = diferenca if max_dif is None else max(max_dif, diferenca)
+            soma_dif += diferenca
+
+    pedidos_ok = relatorio.contagem[IGUAL]
+    diferencas_encontradas = relatorio.contagem[DIFERENTE]
+    pedidos_so_fb = relatorio.contagem[SO_DIREITA]
 
     print(f"\nResultados da comparação:")
-    print(f"  Pedidos em ambos os bancos: {len(pedidos_pg):,}")
+    print(f"  Pedidos em ambos os bancos: {pedidos_ok + diferencas_encontradas:,}")
     print(f"  Pedidos com valores OK (diferença < R$ 0,01): {pedidos_ok:,}")
     print(f"  Pedidos com diferenças: {diferencas_encontradas:,}")
     print(f"  Pedidos só no Firebird (novos): {pedidos_so_fb:,}")
+    print(f"  Pedidos só no PostgreSQL: {relatorio.contagem[SO_ESQUERDA]:,}")
+    relatorio.fechar()
 
     # Mostrar exemplos de comparação - pedidos OK
     print("\n>> EXEMPLOS DE PEDIDOS COM VALORES CORRETOS (primeiros 20):")
@@ -121,13 +100,9 @@ try:
     print(f"{'CODIGO':<10} {'FIREBIRD':<20} {'POSTGRES':<20} {'DIFERENCA':<15} {'STATUS'}")
     print("-"*100)
 
-    count_ok = 0
-    for comp in comparacoes:
-        if comp['pg'] is not None and comp['diferenca'] < 0.01:
-            print(f"{comp['codigo']:<10} R$ {comp['fb']:>15,.2f} R$ {comp['pg']:>15,.2f} R$ {comp['diferenca']:>10,.2f}  OK")
-            count_ok += 1
-            if count_ok >= 20:
-                break
+    for evento in relatorio.exemplos[IGUAL]:
+        vlr_pg, vlr_fb = reais(evento.esquerda[0]), reais(evento.direita[0])
+        print(f"{evento.chave:<10} R$ {vlr_fb:>15,.2f} R$ {vlr_pg:>15,.2f} R$ {abs(vlr_fb - vlr_pg):>10,.2f}  OK")
 
     # Mostrar pedidos com diferenças (se houver)
     if diferencas_encontradas > 0:
@@ -137,52 +112,29 @@ try:
         print(f"{'CODIGO':<10} {'FIREBIRD':<20} {'POSTGRES':<20} {'DIFERENCA':<15} {'STATUS'}")
         print("-"*100)
 
-        count_dif = 0
-        for comp in comparacoes:
-            if comp['pg'] is not None and comp['diferenca'] >= 0.01:
-                print(f"{comp['codigo']:<10} R$ {comp['fb']:>15,.2f} R$ {comp['pg']:>15,.2f} R$ {comp['diferenca']:>10,.2f}  DIFERENTE")
-                count_dif += 1
-                if count_dif >= 20:
-                    break
+        for evento in relatorio.exemplos[DIFERENTE]:
+            vlr_pg, vlr_fb = reais(evento.esquerda[0]), reais(evento.direita[0])
+            print(f"{evento.chave:<10} R$ {vlr_fb:>15,.2f} R$ {vlr_pg:>15,.2f} R$ {abs(vlr_fb - vlr_pg):>10,.2f}  DIFERENTE")
 
     # Mostrar alguns pedidos novos (só no Firebird)
     if pedidos_so_fb > 0:
         print(f"\n>> EXEMPLOS DE PEDIDOS NOVOS (só no Firebird - primeiros 10):")
         print("-"*100)
 
-        print(f"{'CODIGO':<10} {'DATA':<12} {'FIREBIRD':<20} {'STATUS'}")
+        print(f"{'CODIGO':<10} {'FIREBIRD':<20} {'STATUS'}")
         print("-"*100)
 
-        cur.execute("""
-            SELECT FIRST 10
-                CODIGO, DATA, VLR_TOTAL
-            FROM PEDIDOS
-            WHERE CODIGO > 50000
-            ORDER BY CODIGO DESC
-        """)
-
-        for row in cur.fetchall():
-            codigo, data, vlr_total = row
-            vlr_fb = float(vlr_total) / 100 if vlr_total else 0
-
-            if codigo not in pedidos_pg:
-                print(f"{codigo:<10} {str(data):<12} R$ {vlr_fb:>15,.2f}  NOVO")
+        for evento in relatorio.exemplos[SO_DIREITA][:10]:
+            print(f"{evento.chave:<10} R$ {reais(evento.direita[0]):>15,.2f}  NOVO")
 
     # Estatísticas de diferenças
     if diferencas_encontradas > 0:
         print("\n>> ESTATISTICAS DAS DIFERENCAS:")
         print("-"*100)
 
-        diferencas_valores = [c['diferenca'] for c in comparacoes if c['diferenca'] is not None and c['diferenca'] >= 0.01]
-
-        if diferencas_valores:
-            min_dif = min(diferencas_valores)
-            max_dif = max(diferencas_valores)
-            media_dif = sum(diferencas_valores) / len(diferencas_valores)
-
-            print(f"  Diferença mínima: R$ {min_dif:,.2f}")
-            print(f"  Diferença máxima: R$ {max_dif:,.2f}")
-            print(f"  Diferença média: R$ {media_dif:,.2f}")
+        print(f"  Diferença mínima: R$ {reais(min_dif):,.2f}")
+        print(f"  Diferença máxima: R$ {reais(max_dif):,.2f}")
+        print(f"  Diferença média: R$ {reais(soma_dif / diferencas_encontradas):,.2f}")
 
     # Percentual de acurácia
     print("\n>> ACURACIA DA MIGRACAO:")
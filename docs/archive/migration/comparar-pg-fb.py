@@ -6,14 +6,11 @@ Compara valores PostgreSQL vs Firebird
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("COMPARACAO POSTGRESQL vs FIREBIRD")
@@ -31,14 +28,8 @@ valores_pg = {
     54276: {'vlnota': 21464.30, 'vlprod': 21464.30},
 }
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     print("\n>> COMPARACAO:")
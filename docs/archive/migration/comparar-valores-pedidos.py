@@ -6,64 +6,33 @@ Compara valores dos pedidos entre PostgreSQL e Firebird
 
 import sys, codecs
 
+from comparador_ordenado import comparar_ordenados, linhas_firebird, ordenar_por_chave
+from conexao_firebird import conectar
+from registros_dump import ler_tipados
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
-def parse_linha(linha):
-    return linha.split('\t')
+ARQUIVO_VENDAS = r'c:\Projeto\Academia\vendas-extraidas.sql'
+
+TIPOS_PEDIDOS = {'idpedido': 'int', 'vlnota': 'float'}
 
 print("="*100)
 print("COMPARACAO DE VALORES: POSTGRESQL vs FIREBIRD")
 print("="*100)
 
-# Ler pedidos do PostgreSQL
-with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-    conteudo = f.read()
-
-linhas = conteudo.split('\n')
-
-print("\n>> Lendo pedidos do PostgreSQL...")
-lendo_pedidos = False
-pedidos_pg = {}
-
-for linha in linhas:
-    if 'COPY public.pedidos' in linha:
-        print(f"Estrutura: {linha[:150]}...")
-        lendo_pedidos = True
-        continue
-    if linha.strip() == '\\.':
-        lendo_pedidos = False
-        if pedidos_pg:
-            break
-    if lendo_pedidos and linha.strip():
-        campos = parse_linha(linha.strip())
-        if len(campos) >= 6:
-            idpedido = int(campos[0])
-            vlnota = float(campos[4]) if campos[4] not in ['\\N', ''] else 0
-            vlprod = float(campos[5]) if campos[5] not in ['\\N', ''] else 0
-
-            pedidos_pg[idpedido] = {
-                'vlnota': vlnota,
-                'vlprod': vlprod
-            }
-
-print(f"Total de pedidos do PostgreSQL: {len(pedidos_pg):,}")
-
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
+
+def pedidos_dump():
+    """(idpedido, (vlnota,)) do dump em ordem de idpedido, sem montar dict"""
+    return ordenar_por_chave(
+        (pedido.idpedido, (pedido.vlnota or 0,))
+        for _, pedido in ler_tipados(ARQUIVO_VENDAS, {'pedidos': TIPOS_PEDIDOS})
+        if pedido.idpedido is not None)
+
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Buscar estatísticas dos pedidos no Firebird
@@ -90,10 +59,7 @@ try:
     print(f"  Valor máximo: R$ {maximo:,.2f}")
     print(f"  Valor médio: R$ {media:,.2f}")
 
-    # Buscar pedidos com valores muito altos (acima de 100.000)
-    print("\n>> PEDIDOS COM VALORES EXORBITANTES (> R$ 100.000):")
-    print("-"*100)
-
+    # Pedidos com valores muito altos (acima de 100.000) e os 10 maiores
     cur.execute("""
         SELECT
             CODIGO, DATA, VLR_TOTAL, VLR_PRODUTOS, QTDE_TOTAL
@@ -101,9 +67,40 @@ try:
         WHERE CAST(VLR_TOTAL AS BIGINT) > 10000000
         ORDER BY VLR_TOTAL DESC
     """)
-
     pedidos_altos = cur.fetchall()
 
+    cur.execute("""
+        SELECT FIRST 10
+            CODIGO, DATA, VLR_TOTAL, VLR_PRODUTOS, QTDE_TOTAL
+        FROM PEDIDOS
+        ORDER BY CAST(VLR_TOTAL AS BIGINT) DESC
+    """)
+    maiores = cur.fetchall()
+
+    # Uma passada em ordem de codigo (dump x Firebird): guarda o VLNOTA so dos
+    # pedidos acima e os 20 primeiros pares para a comparacao detalhada
+    print("\n>> Lendo pedidos do PostgreSQL e do Firebird em ordem de codigo...")
+    interesse = {row[0] for row in pedidos_altos} | {row[0] for row in maiores}
+    pedidos_pg = {}
+    primeiros = []
+    total_pg = 0
+
+    leitura = con.cursor()
+    firebird = linhas_firebird(leitura, "SELECT CODIGO, VLR_TOTAL FROM PEDIDOS ORDER BY CODIGO")
+    for evento in comparar_ordenados(pedidos_dump(), firebird, lambda pg, fb: []):
+        if evento.esquerda is not None:
+            total_pg += 1
+            if evento.chave in interesse:
+                pedidos_pg[evento.chave] = evento.esquerda[0]
+        if evento.direita is not None and len(primeiros) < 20:
+            primeiros.append(evento)
+    leitura.close()
+
+    print(f"Total de pedidos do PostgreSQL: {total_pg:,}")
+
+    print("\n>> PEDIDOS COM VALORES EXORBITANTES (> R$ 100.000):")
+    print("-"*100)
+
     print(f"{'CODIGO':<10} {'DATA':<12} {'VLR_TOTAL':<20} {'VLR_PRODUTOS':<20} {'QTDE':<10} {'PG_VLNOTA'}")
     print("-"*100)
 
@@ -112,8 +109,8 @@ try:
         vlr_total_real = float(vlr_total) / 100 if vlr_total else 0
         vlr_prod_real = float(vlr_produtos) / 100 if vlr_produtos else 0
 
-        # Buscar valor no PostgreSQL
-        vlr_pg = pedidos_pg.get(codigo, {}).get('vlnota', 0) if codigo in pedidos_pg else None
+        # Valor no PostgreSQL
+        vlr_pg = pedidos_pg.get(codigo)
         vlr_pg_str = f"R$ {vlr_pg:,.2f}" if vlr_pg is not None else "NAO ENCONTRADO"
 
         print(f"{codigo:<10} {str(data):<12} R$ {vlr_total_real:>15,.2f} R$ {vlr_prod_real:>15,.2f} {qtde:>8.2f}  {vlr_pg_str}")
@@ -124,24 +121,17 @@ try:
     print("\n>> COMPARACAO DETALHADA (primeiros 20 pedidos):")
     print("-"*100)
 
-    cur.execute("""
-        SELECT FIRST 20
-            CODIGO, DATA, VLR_TOTAL, VLR_PRODUTOS
-        FROM PEDIDOS
-        ORDER BY CODIGO
-    """)
-
     print(f"{'CODIGO':<10} {'FIREBIRD VLR_TOTAL':<20} {'POSTGRES VLNOTA':<20} {'DIFERENCA'}")
     print("-"*100)
 
     diferencas = []
 
-    for row in cur.fetchall():
-        codigo, data, vlr_total_fb, vlr_prod_fb = row
+    for evento in primeiros:
+        codigo, vlr_total_fb = evento.chave, evento.direita[0]
         vlr_fb = float(vlr_total_fb) / 100 if vlr_total_fb else 0
 
-        if codigo in pedidos_pg:
-            vlr_pg = pedidos_pg[codigo]['vlnota']
+        if evento.esquerda is not None:
+            vlr_pg = evento.esquerda[0]
             diferenca = abs(vlr_fb - vlr_pg)
             diferencas.append(diferenca)
 
@@ -192,21 +182,14 @@ try:
     print("\n>> TOP 10 MAIORES VALORES NO FIREBIRD:")
     print("-"*100)
 
-    cur.execute("""
-        SELECT FIRST 10
-            CODIGO, DATA, VLR_TOTAL, VLR_PRODUTOS, QTDE_TOTAL
-        FROM PEDIDOS
-        ORDER BY CAST(VLR_TOTAL AS BIGINT) DESC
-    """)
-
     print(f"{'CODIGO':<10} {'DATA':<12} {'VLR_TOTAL FB':<20} {'VLR_TOTAL PG':<20} {'QTDE'}")
     print("-"*100)
 
-    for row in cur.fetchall():
+    for row in maiores:
         codigo, data, vlr_total, vlr_produtos, qtde = row
         vlr_fb = float(vlr_total) / 100 if vlr_total else 0
 
-        vlr_pg = pedidos_pg.get(codigo, {}).get('vlnota', 0) if codigo in pedidos_pg else None
+        vlr_pg = pedidos_pg.get(codigo)
         vlr_pg_str = f"R$ {vlr_pg:>14,.2f}" if vlr_pg is not None else "NAO ENCONTRADO"
 
         print(f"{codigo:<10} {str(data):<12} R$ {vlr_fb:>15,.2f} {vlr_pg_str:<20} {qtde:>6.2f}")
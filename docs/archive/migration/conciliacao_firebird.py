@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conciliacao dump PostgreSQL x Firebird por digests agregados em faixas de chave
+
+Cada linha vira um texto canonico das colunas mapeadas ("123|2022-06-13|NOME")
+e um digest: HASH() do Firebird sobre esse texto, reduzido e misturado modulo
+um primo (ver MISTURA_DIGEST). O mesmo HASH e reimplementado em Python
+(hash_firebird) para o lado do dump, e conferir_hash() compara os dois antes
+de qualquer conciliacao.
+
+Os digests sao somados por faixa de chave (chave / tamanho). No Firebird isso
+e um SELECT ... GROUP BY: so voltam (faixa, quantidade, soma), nunca as
+linhas. No dump, a leitura em streaming guarda apenas (chave, digest) de
+cada linha, em arrays ordenados. So as faixas com soma ou quantidade
+diferentes sao abertas no nivel seguinte (faixas FATOR_DIVISAO vezes
+menores), ate chegar nas chaves. Uma tabela inteira igual custa um GROUP BY
+no Firebird e uma leitura do dump.
+
+A chave nao precisa ser unica: itens de pedido (chave = pedido) ou titulos
+(chave = fornecedor/cliente) sao comparados como conjuntos por chave.
+
+Tipos canonicos das colunas (iguais nos dois lados):
+- 'int': inteiros e valores em centavos
+- 'data': AAAA-MM-DD
+- 'texto': sem espacos nas pontas; nulo = vazio (o Firebird grava '' no lugar
+  de nulo nos cadastros migrados)
+
+Uso:
+    from conciliacao_firebird import Coluna, Mapeamento, conciliar, conferir_hash
+
+    pedidos = Mapeamento(
+        'pedidos', ARQUIVO_VENDAS, 'pedidos', {'idpedido': 'int', 'vlprod': 'centavos'},
+        'idpedido', 'PEDIDOS', 'CODIGO',
+        [Coluna('VLR_PRODUTOS', 'vlprod', 'int')])
+
+    conferir_hash(cur)
+    resultado = conciliar(cur, pedidos)
+    resultado.so_dump, resultado.so_firebird, resultado.diferentes
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+import time
+
+from registros_dump import ler_tipados
+
+# Digest da linha: x = HASH(texto) mod primo, misturado como x * (x + K) mod
+# primo. O HASH do Firebird e quase linear (trocar um digito soma um multiplo
+# fixo de 16^n), e sem a mistura duas linhas alteradas na mesma faixa podem
+# se anular na soma. O produto cabe no BIGINT e a soma de milhoes de
+# digests tambem.
+PRIMO_DIGEST = 2147483647
+MISTURA_DIGEST = 1000003
+
+# Faixa do primeiro nivel (em chaves) e divisao a cada nivel (4096 -> 256 -> 16 -> 1)
+TAMANHO_FAIXA = 4096
+FATOR_DIVISAO = 16
+
+# Com mais faixas que isso para abrir num nivel, um unico GROUP BY cobre o
+# intervalo todo em vez de uma consulta por faixa
+MAX_CONSULTAS_NIVEL = 50
+
+SEPARADOR = '|'
+NULO = '\\N'
+
+# Encoding das colunas de texto do banco do QRSistema (bytes que o HASH ve)
+ENCODING_FIREBIRD = 'cp1252'
+
+MASCARA_64 = (1 << 64) - 1
+NIBBLE_ALTO = 0xF000000000000000
+EXTENSAO_SINAL = MASCARA_64 ^ 0xFF
+
+# Textos usados para conferir o HASH do servidor (os longos passam pelo
+# nibble alto do acumulador, inclusive com o bit de sinal; os acentuados
+# pegam um charset da conexao que nao entrega os bytes do cp1252)
+AMOSTRAS_HASH = [
+    '',
+    'A',
+    '123|2022-06-13|CLIENTE TESTE',
+    'ZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZ',
+    '~' * 97,
+    '0123456789|' * 20,
+    'JOSÉ DA CONCEIÇÃO|São Paulo',
+    'ÀÉÎÕÜ çñ ªº' * 9,
+]
+
+# Charsets da conexao em que os textos chegam ao HASH com os bytes do cp1252
+CHARSETS_CONEXAO = (None, 'NONE', 'WIN1252')
+
+
+def hash_firebird(dados):
+    """
+    HASH() do Firebird (PJW/ELF de 64 bits) sobre bytes
+
+    Mesma conta do evlHash do servidor, inclusive o deslocamento com sinal
+    de SINT64 quando o bit 63 do acumulador esta ligado.
+    """
+    h = 0
+    for byte in dados:
+        h = ((h << 4) + byte) & MASCARA_64
+        alto = h & NIBBLE_ALTO
+        if alto:
+            deslocado = alto >> 56
+            if alto >> 63:
+                deslocado |= EXTENSAO_SINAL
+            h ^= deslocado
+            h &= ~alto & MASCARA_64
+    return h
+
+
+def conferir_hash(cur):
+    """
+    Compara HASH() do servidor com hash_firebird; RuntimeError se divergir
+
+    Confere antes o charset da conexao (FB_CHARSET): com UTF8, por exemplo,
+    toda linha acentuada apareceria como divergente.
+    """
+    charset = getattr(cur.connection, 'charset', None)
+    if (charset.upper() if charset else None) not in CHARSETS_CONEXAO:
+        raise RuntimeError(f"Charset da conexao {charset} nao entrega os textos em {ENCODING_FIREBIRD}; "
+                           f"use FB_CHARSET=WIN1252")
+    for texto in AMOSTRAS_HASH:
+        cur.execute(f"SELECT HASH(CAST(? AS VARCHAR({max(len(texto), 1)}) CHARACTER SET WIN1252)) "
+                    f"FROM RDB$DATABASE", [texto])
+        servidor = cur.fetchone()[0]
+        local = hash_firebird(texto.encode(ENCODING_FIREBIRD))
+        if servidor != local:
+            raise RuntimeError(f"HASH do Firebird difere do calculado em Python para '{texto[:20]}': "
+                               f"{servidor} x {local}")
+
+
+class Coluna:
+    """Coluna comparada: expressao no Firebird, valor no dump e tipo canonico"""
+
+    def __init__(self, firebird, dump, tipo='int'):
+        """
+        - firebird: expressao SQL (ex: 'VLR_TOTAL')
+        - dump: coluna do registro tipado ou funcao(registro) -> valor
+        - tipo: 'int', 'data' ou 'texto'
+        """
+        if tipo not in ('int', 'data', 'texto'):
+            raise ValueError(f"Tipo canonico desconhecido: {tipo}")
+        self.firebird = firebird
+        self.dump = dump
+        self.tipo = tipo
+
+    def sql(self):
+        """Expressao do texto canonico no Firebird"""
+        if self.tipo == 'int':
+            return f"COALESCE(CAST(CAST({self.firebird} AS BIGINT) AS VARCHAR(20)), '{NULO}')"
+        if self.tipo == 'data':
+            return f"COALESCE(CAST(CAST({self.firebird} AS DATE) AS VARCHAR(10)), '{NULO}')"
+        return f"TRIM(COALESCE({self.firebird}, ''))"
+
+    def valor(self, registro):
+        if callable(self.dump):
+            return self.dump(registro)
+        return getattr(registro, self.dump)
+
+    def texto(self, registro):
+        """Texto canonico do valor do dump (igual ao de sql())"""
+        valor = self.valor(registro)
+        if self.tipo == 'texto':
+            return (valor or '').strip(' ')
+        if valor is None:
+            return NULO
+        if self.tipo == 'int':
+            return str(int(round(valor)))
+        if isinstance(valor, date):
+            return valor.isoformat()
+        return str(valor)[:10]
+
+
+class Mapeamento:
+    """Tabela do dump x tabela do Firebird: chaves e colunas comparadas"""
+
+    def __init__(self, nome, arquivo, tabela_dump, tipos_dump, chave_dump, tabela_firebird,
+                 chave_firebird, colunas, filtro_dump=None, filtro_firebird=None,
+                 encoding=ENCODING_FIREBIRD):
+        """
+        - tipos_dump: {coluna: tipo} do registros_dump para a tabela do dump
+        - chave_dump: coluna ou funcao(registro) -> chave inteira
+        - chave_firebird: expressao inteira (ex: 'CODIGO')
+        - filtro_dump: funcao(registro) -> bool; linhas que a migracao grava
+        - filtro_firebird: condicao SQL; linhas que vieram deste dump
+        - encoding: encoding dos textos no Firebird
+        """
+        self.nome = nome
+        self.arquivo = arquivo
+        self.tabela_dump = tabela_dump
+        self.tipos_dump = tipos_dump
+        self.chave_dump = chave_dump
+        self.tabela_firebird = tabela_firebird
+        self.chave_firebird = chave_firebird
+        self.colunas = list(colunas)
+        self.filtro_dump = filtro_dump
+        self.filtro_firebird = filtro_firebird
+        self.encoding = encoding
+
+    def sql_texto(self):
+        return f" || '{SEPARADOR}' || ".join(coluna.sql() for coluna in self.colunas)
+
+    def sql_hash(self):
+        return f"MOD(HASH({self.sql_texto()}), {PRIMO_DIGEST})"
+
+    def condicao(self, inicio=None, fim=None):
+        """WHERE do Firebird: chave nao nula, filtro e intervalo de chaves"""
+        partes = [f"{self.chave_firebird} IS NOT NULL"]
+        if self.filtro_firebird:
+            partes.append(f"({self.filtro_firebird})")
+        if inicio is not None:
+            partes.append(f"{self.chave_firebird} BETWEEN {int(inicio)} AND {int(fim)}")
+        return ' AND '.join(partes)
+
+    def chave(self, registro):
+        if callable(self.chave_dump):
+            return self.chave_dump(registro)
+        return getattr(registro, self.chave_dump)
+
+    def texto(self, registro):
+        return SEPARADOR.join(coluna.texto(registro) for coluna in self.colunas)
+
+    def digest(self, registro):
+        x = hash_firebird(self.texto(registro).encode(self.encoding, 'replace')) % PRIMO_DIGEST
+        return x * (x + MISTURA_DIGEST) % PRIMO_DIGEST
+
+    def registros(self):
+        """Registros do dump que a migracao grava (filtro_dump)"""
+        for _, registro in ler_tipados(self.arquivo, {self.tabela_dump: self.tipos_dump}):
+            if self.filtro_dump is None or self.filtro_dump(registro):
+                yield registro
+
+
+def faixa_de(chave, tamanho):
+    """Faixa da chave com a divisao inteira do Firebird (trunca em direcao a zero)"""
+    faixa = abs(chave) // tamanho
+    return -faixa if chave < 0 else faixa
+
+
+def limites_faixa(faixa, tamanho):
+    """(primeira, ultima) chave da faixa, inclusive"""
+    if faixa > 0:
+        return faixa * tamanho, faixa * tamanho + tamanho - 1
+    if faixa < 0:
+        return faixa * tamanho - tamanho + 1, faixa * tamanho
+    return -(tamanho - 1), tamanho - 1
+
+
+class DigestsDump:
+    """(chave, digest) de cada linha do dump, ordenados por chave"""
+
+    def __init__(self, mapeamento):
+        pares = []
+        self.sem_chave = 0
+        for registro in mapeamento.registros():
+            chave = mapeamento.chave(registro)
+            if chave is None:
+                self.sem_chave += 1
+                continue
+            pares.append((chave, mapeamento.digest(registro)))
+        pares.sort()
+        self.chaves = array('q', (chave for chave, _ in pares))
+        self.digests = array('q', (digest for _, digest in pares))
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def agregar(self, tamanho, inicio=None, fim=None):
+        """{faixa: (quantidade, soma)} das linhas com chave entre inicio e fim"""
+        de = 0 if inicio is None else bisect_left(self.chaves, inicio)
+        ate = len(self.chaves) if fim is None else bisect_right(self.chaves, fim)
+        faixas = {}
+        for i in range(de, ate):
+            faixa = faixa_de(self.chaves[i], tamanho)
+            quantidade, soma = faixas.get(faixa, (0, 0))
+            faixas[faixa] = (quantidade + 1, soma + self.digests[i])
+        return faixas
+
+
+def agregar_firebird(cur, mapeamento, tamanho, inicio=None, fim=None):
+    """{faixa: (quantidade, soma)} no Firebird: um GROUP BY, sem trazer linhas"""
+    # Tabela derivada: o HASH de cada linha e calculado uma vez so
+    faixa = f"CHAVE / {int(tamanho)}"
+    cur.execute(f"""
+        SELECT {faixa}, COUNT(*), SUM(MOD(X * (X + {MISTURA_DIGEST}), {PRIMO_DIGEST}))
+        FROM (
+            SELECT {mapeamento.chave_firebird} AS CHAVE, {mapeamento.sql_hash()} AS X
+            FROM {mapeamento.tabela_firebird}
+            WHERE {mapeamento.condicao(inicio, fim)}
+        )
+        GROUP BY {faixa}
+    """)
+    return {faixa: (quantidade, soma or 0) for faixa, quantidade, soma in cur.fetchall()}
+
+
+def juntar_intervalos(intervalos):
+    """Une intervalos (inicio, fim) contiguos ou sobrepostos"""
+    juntos = []
+    for inicio, fim in sorted(intervalos):
+        if juntos and inicio <= juntos[-1][1] + 1:
+            juntos[-1] = (juntos[-1][0], max(fim, juntos[-1][1]))
+        else:
+            juntos.append((inicio, fim))
+    return juntos
+
+
+class Resultado:
+    """Chaves divergentes e custo da conciliacao de um mapeamento"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.so_dump = []
+        self.so_firebird = []
+        self.diferentes = []
+        self.linhas_dump = 0
+        self.sem_chave = 0
+        self.consultas = 0
+        self.faixas_iguais = 0
+        self.niveis = 0
+        self.segundos = 0.0
+
+    @property
+    def ok(self):
+        return not (self.so_dump or self.so_firebird or self.diferentes)
+
+
+def conciliar(cur, mapeamento, tamanho_faixa=TAMANHO_FAIXA, fator=FATOR_DIVISAO):
+    """
+    Compara dump e Firebird descendo so pelas faixas divergentes
+
+    Nivel 1: um GROUP BY na tabela toda. Em cada nivel seguinte, as faixas
+    divergentes sao reagrupadas em faixas menores, ate a chave (tamanho 1).
+    """
+    inicio_tempo = time.time()
+    resultado = Resultado(mapeamento.nome)
+    dump = DigestsDump(mapeamento)
+    resultado.linhas_dump = len(dump)
+    resultado.sem_chave = dump.sem_chave
+
+    tamanho = max(1, tamanho_faixa)
+    intervalos = [(None, None)]
+    while True:
+        resultado.niveis += 1
+        if len(intervalos) > MAX_CONSULTAS_NIVEL:
+            # Muitas faixas: um GROUP BY no intervalo todo, filtrado em Python
+            dentro = ([inicio for inicio, _ in intervalos], intervalos)
+            intervalos = [(intervalos[0][0], intervalos[-1][1])]
+        else:
+            dentro = None
+
+        divergentes = []
+        for inicio, fim in intervalos:
+            resultado.consultas += 1
+            firebird = agregar_firebird(cur, mapeamento, tamanho, inicio, fim)
+            local = dump.agregar(tamanho, inicio, fim)
+            for faixa in sorted(firebird.keys() | local.keys()):
+                if dentro is not None and not _em_intervalos(faixa, tamanho, dentro):
+                    continue
+                if firebird.get(faixa) == local.get(faixa):
+                    resultado.faixas_iguais += 1
+                elif tamanho > 1:
+                    divergentes.append(faixa)
+                elif faixa not in firebird:
+                    resultado.so_dump.append(faixa)
+                elif faixa not in local:
+                    resultado.so_firebird.append(faixa)
+                else:
+                    resultado.diferentes.append(faixa)
+
+        if tamanho == 1 or not divergentes:
+            break
+        intervalos = juntar_intervalos(limites_faixa(faixa, tamanho) for faixa in divergentes)
+        tamanho = max(1, tamanho // fator)
+
+    resultado.segundos = time.time() - inicio_tempo
+    return resultado
+
+
+def _em_intervalos(faixa, tamanho, dentro):
+    """
+    True se a faixa sobrepoe algum dos intervalos abertos (inicios, intervalos ordenados)
+
+    Sobreposicao e nao so a primeira chave: quando tamanho_faixa nao e
+    potencia de fator (ex: 1000 / 16), uma faixa menor pode comecar antes de
+    um intervalo divergente e terminar dentro dele.
+    """
+    inicios, intervalos = dentro
+    primeira, ultima = limites_faixa(faixa, tamanho)
+    # Ultimo intervalo que comeca ate a ultima chave da faixa
+    posicao = bisect_right(inicios, ultima) - 1
+    return posicao >= 0 and primeira <= intervalos[posicao][1]
+
+
+def textos_firebird(cur, mapeamento, chaves):
+    """{chave: [textos canonicos]} no Firebird (para mostrar as diferencas)"""
+    textos = {}
+    chaves = list(chaves)
+    # IN do Firebird aceita no maximo 1500 valores
+    for i in range(0, len(chaves), 1500):
+        lista = ', '.join(str(int(chave)) for chave in chaves[i:i + 1500])
+        cur.execute(f"""
+            SELECT {mapeamento.chave_firebird}, {mapeamento.sql_texto()}
+            FROM {mapeamento.tabela_firebird}
+            WHERE {mapeamento.condicao()} AND {mapeamento.chave_firebird} IN ({lista})
+        """)
+        for chave, texto in cur.fetchall():
+            textos.setdefault(chave, []).append(texto)
+    return textos
+
+
+def textos_dump(mapeamento, chaves):
+    """{chave: [textos canonicos]} no dump (nova leitura, so dessas chaves)"""
+    chaves = set(chaves)
+    textos = {}
+    for registro in mapeamento.registros():
+        chave = mapeamento.chave(registro)
+        if chave in chaves:
+            textos.setdefault(chave, []).append(mapeamento.texto(registro))
+    return textos
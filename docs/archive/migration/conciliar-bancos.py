@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Concilia o dump do PostgreSQL com o Firebird: pedidos, itens, pessoas e titulos
+
+Usa conciliacao_firebird: digests por linha somados em faixas de chave, com
+um GROUP BY no Firebird por tabela e novas consultas so nas faixas que
+divergem. Nenhuma das duas tabelas e trazida inteira para o Python.
+
+Cada mapeamento reproduz o que o script de migracao grava (mesmas colunas,
+mesmas conversoes); uma divergencia e um dado que a migracao gravou diferente
+do dump, ou uma linha que falta de um dos lados.
+
+Os mapeamentos sao conciliados ao mesmo tempo (CONCILIACOES_PARALELAS
+threads), cada um numa conexao de verificacao do pool; os exemplos usam de
+novo as conexoes ja abertas.
+
+Uso:
+    python conciliar-bancos.py                     (tudo)
+    python conciliar-bancos.py pedidos itens       (so esses mapeamentos)
+"""
+
+import sys
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+
+from conciliacao_firebird import Coluna, Mapeamento, conciliar, conferir_hash, textos_dump, textos_firebird
+from conexao_firebird import pool
+from dinheiro import centavos_seguro, decimal_seguro, multiplicar
+
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+
+
+PASTA_DADOS = r'c:\Projeto\Academia'
+ARQUIVO_VENDAS = rf'{PASTA_DADOS}\vendas-extraidas.sql'
+ARQUIVO_PESSOAS = rf'{PASTA_DADOS}\fornecedores-clientes.sql'
+ARQUIVO_DADOS = rf'{PASTA_DADOS}\dados-extraidos.sql'
+
+# Mapeamentos conciliados ao mesmo tempo (uma conexao do pool por thread)
+CONCILIACOES_PARALELAS = 4
+
+# Chaves divergentes mostradas (com os textos dos dois lados) por mapeamento
+MAX_EXEMPLOS = 10
+
+# Offset dos clientes em CAD_PESSOA e FIN_CTARECEBER (migrar-pessoas.py)
+OFFSET_CLIENTES = 100000
+
+
+MAPEAMENTOS = [
+    Mapeamento(
+        'pedidos', ARQUIVO_VENDAS, 'pedidos',
+        {'idpedido': 'int', 'idfornecedor': 'int', 'documento': ('texto', 20),
+         'vlprod': 'centavos', 'data': 'data'},
+        'idpedido', 'PEDIDOS', 'CODIGO',
+        [Coluna('CLIENTE', 'idfornecedor'),
+         Coluna('DOCUMENTO', 'documento', 'texto'),
+         Coluna('VLR_PRODUTOS', lambda p: p.vlprod or 0),
+         Coluna('DATA', 'data', 'data')]),
+    # Chave = pedido: os itens de cada pedido sao comparados como conjunto
+    # (mesmas conversoes de migrar-itens-pedidos.py: preco lido como texto,
+    # total = qtdrec x preco em centavos exatos)
+    Mapeamento(
+        'itens', ARQUIVO_VENDAS, 'pedidos_itens',
+        {'idpedido': 'int', 'idproduto': 'int', 'qtdrec': 'float', 'preco': ('texto', 30)},
+        'idpedido', 'PEDIDOS_ITENS', 'CODIGO',
+        [Coluna('IDPRODUTO', 'idproduto'),
+         Coluna('VLR_UNIT', lambda i: centavos_seguro(i.preco)),
+         Coluna('VLR_TOTAL', lambda i: multiplicar(i.qtdrec, decimal_seguro(i.preco)))],
+        filtro_dump=lambda i: i.idproduto and i.qtdrec),
+    Mapeamento(
+        'fornecedores', ARQUIVO_PESSOAS, 'fornecedores',
+        {'idfornecedor': 'int', 'nome': ('texto', 100), 'email': ('texto', 100),
+         'cidade': ('texto', 50)},
+        'idfornecedor', 'CAD_PESSOA', 'CODIGO',
+        [Coluna('NOME', lambda f: f.nome or 'SEM NOME', 'texto'),
+         Coluna('EMAIL', 'email', 'texto'),
+         Coluna('NOMECIDADE', 'cidade', 'texto')],
+        filtro_firebird="TIPO = 'F'"),
+    Mapeamento(
+        'clientes', ARQUIVO_PESSOAS, 'clientes',
+        {'idcliente': 'int', 'nome': ('texto', 100), 'email': ('texto', 100),
+         'cidade': ('texto', 50)},
+        lambda c: (c.idcliente or 0) + OFFSET_CLIENTES, 'CAD_PESSOA', 'CODIGO',
+        [Coluna('NOME', lambda c: c.nome or 'SEM NOME', 'texto'),
+         Coluna('EMAIL', 'email', 'texto'),
+         Coluna('NOMECIDADE', 'cidade', 'texto')],
+        filtro_firebird="TIPO = 'C'"),
+    # Titulos nao guardam o id do PostgreSQL: chave = fornecedor / cliente
+    Mapeamento(
+        'contas_pagar', ARQUIVO_DADOS, 'conta_pagar',
+        {'fornecedor_id': 'int', 'documento': ('texto', 30), 'data_vencimento': 'data',
+         'valor': 'centavos', 'pago': 'bool'},
+        lambda c: c.fornecedor_id or 0, 'FIN_CTAPAGAR', 'FORNECEDOR',
+        [Coluna('DOCUMENTO', 'documento', 'texto'),
+         Coluna('VENCIMENTO', 'data_vencimento', 'data'),
+         Coluna('VALOR', lambda c: c.valor or 0),
+         Coluna('QUITADO', lambda c: 'S' if c.pago else 'N', 'texto')]),
+    Mapeamento(
+        'contas_receber', ARQUIVO_DADOS, 'documentos',
+        {'idcliente': 'int', 'vencimento': 'data', 'valor': 'centavos',
+         'valorpago': 'centavos', 'parcela': 'int'},
+        lambda d: (d.idcliente or 0) + OFFSET_CLIENTES, 'FIN_CTARECEBER', 'CLIENTE',
+        [Coluna('VENCIMENTO', 'vencimento', 'data'),
+         Coluna('VALOR', lambda d: d.valor or 0),
+         Coluna('VALOR_PAGO', lambda d: d.valorpago or 0),
+         Coluna('PARCELA', lambda d: d.parcela or 1)],
+        filtro_firebird="HISTORICO IS NULL OR HISTORICO NOT STARTING WITH 'CREDITO:'"),
+    Mapeamento(
+        'creditos', ARQUIVO_DADOS, 'creditos',
+        {'idcliente': 'int', 'valor': 'centavos', 'saldo': 'centavos'},
+        lambda c: (c.idcliente or 0) + OFFSET_CLIENTES, 'FIN_CTARECEBER', 'CLIENTE',
+        [Coluna('VALOR', lambda c: -(c.valor or 0)),
+         Coluna('VALOR_SALDO', lambda c: -(c.saldo or 0))],
+        filtro_firebird="HISTORICO STARTING WITH 'CREDITO:'"),
+]
+
+
+def conciliar_mapeamento(mapeamento):
+    """Concilia um mapeamento numa conexao de verificacao do pool (roda em thread)"""
+    with pool().conexao('verificacao') as con:
+        return conciliar(con.cursor(), mapeamento)
+
+
+def mostrar_exemplos(cur, mapeamento, resultado):
+    """Textos canonicos dos dois lados para as primeiras chaves divergentes"""
+    chaves = (resultado.diferentes[:MAX_EXEMPLOS] + resultado.so_dump[:MAX_EXEMPLOS]
+              + resultado.so_firebird[:MAX_EXEMPLOS])
+    if not chaves:
+        return
+    colunas = ' | '.join(coluna.firebird for coluna in mapeamento.colunas)
+    print(f"\n  Exemplos ({colunas}):")
+    firebird = textos_firebird(cur, mapeamento, chaves)
+    dump = textos_dump(mapeamento, chaves)
+    for chave in chaves:
+        print(f"  {mapeamento.chave_firebird} {chave}:")
+        for texto in sorted(dump.get(chave, [])):
+            print(f"    PG {texto}")
+        for texto in sorted(firebird.get(chave, [])):
+            print(f"    FB {texto}")
+
+
+print("="*100)
+print("CONCILIACAO POSTGRESQL x FIREBIRD (DIGESTS POR FAIXA DE CHAVE)")
+print("="*100)
+
+escolhidos = sys.argv[1:]
+desconhecidos = [nome for nome in escolhidos if nome not in {m.nome for m in MAPEAMENTOS}]
+if desconhecidos:
+    print(f"[ERRO] Mapeamento desconhecido: {', '.join(desconhecidos)}")
+    print(f"       Opcoes: {', '.join(m.nome for m in MAPEAMENTOS)}")
+    exit(1)
+
+try:
+    with pool().conexao('verificacao') as con:
+        conferir_hash(con.cursor())
+
+    selecionados = [m for m in MAPEAMENTOS if not escolhidos or m.nome in escolhidos]
+    resumo = []
+    with ThreadPoolExecutor(max_workers=CONCILIACOES_PARALELAS) as executor:
+        # Resultados na ordem dos mapeamentos, impressos conforme ficam prontos
+        for mapeamento, resultado in zip(selecionados, executor.map(conciliar_mapeamento, selecionados)):
+            resumo.append(resultado)
+
+            print(f"\n>> {mapeamento.nome}: {mapeamento.tabela_dump} x {mapeamento.tabela_firebird}")
+            print("-"*100)
+            print(f"  Linhas no dump: {resultado.linhas_dump:,} ({resultado.sem_chave:,} sem chave)")
+            print(f"  Consultas no Firebird: {resultado.consultas} em {resultado.niveis} niveis "
+                  f"({resultado.faixas_iguais:,} faixas iguais) - {resultado.segundos:.1f}s")
+            if resultado.ok:
+                print("  [OK] Dump e Firebird iguais")
+                continue
+            print(f"  Chaves com diferencas: {len(resultado.diferentes):,}")
+            print(f"  So no dump: {len(resultado.so_dump):,}")
+            print(f"  So no Firebird: {len(resultado.so_firebird):,}")
+            with pool().conexao('verificacao') as con:
+                mostrar_exemplos(con.cursor(), mapeamento, resultado)
+
+    pool().fechar()
+
+    print("\n" + "="*100)
+    print(f"{'MAPEAMENTO':<18} {'DIFERENTES':>12} {'SO PG':>10} {'SO FB':>10} {'CONSULTAS':>10}")
+    print("-"*100)
+    for resultado in resumo:
+        print(f"{resultado.nome:<18} {len(resultado.diferentes):>12,} {len(resultado.so_dump):>10,} "
+              f"{len(resultado.so_firebird):>10,} {resultado.consultas:>10}")
+
+    if not all(resultado.ok for resultado in resumo):
+        exit(1)
+
+except Exception as e:
+    print(f"\n[ERRO] {e}")
+    import traceback
+    traceback.print_exc()
+    exit(1)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conexao com o Firebird para todos os scripts da migracao
+
+Um unico lugar para a configuracao (banco, usuario, senha, charset), lida
+das variaveis de ambiente FB_DATABASE, FB_USER, FB_PASSWORD, FB_CHARSET e
+FB_HOST, com os valores do QRSistema como padrao.
+
+Cada conexao sai com um TPB (parametros da transacao) conforme o uso:
+- 'carga': snapshot, leitura e escrita, espera nos locks (padrao do fdb)
+- 'verificacao': read committed (rec_version), somente leitura; nao segura
+  versoes antigas e nao bloqueia a carga que esta rodando
+
+O PoolConexoes guarda conexoes abertas para reaproveitar entre threads do
+mesmo processo (conferencias em paralelo, etapas que abrem varias conexoes),
+sem pagar o attach a cada uso.
+
+Uso:
+    from conexao_firebird import conectar, pool
+
+    con = conectar()                    # carga
+    con = conectar('verificacao')       # conferencia, somente leitura
+    con = conectar(charset='WIN1252')   # sobrepoe a configuracao
+
+    with pool().conexao('verificacao') as con:
+        cur = con.cursor()
+        ...
+"""
+
+import os
+import queue
+import threading
+
+try:
+    import fdb
+except ImportError:
+    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
+    print("       Instale com: pip install fdb")
+    exit(1)
+
+# Padrao do QRSistema; cada chave pode vir de uma variavel de ambiente
+CONFIG_PADRAO = {
+    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
+    'user': 'sysdba',
+    'password': 'masterkey',
+}
+
+VARIAVEIS_AMBIENTE = {
+    'FB_DATABASE': 'database',
+    'FB_USER': 'user',
+    'FB_PASSWORD': 'password',
+    'FB_CHARSET': 'charset',
+    'FB_HOST': 'host',
+}
+
+# Conexoes guardadas no pool (por processo)
+TAMANHO_POOL = 8
+
+
+def configuracao(**extras):
+    """Parametros do fdb.connect: padrao, variaveis de ambiente e extras, nessa ordem"""
+    config = dict(CONFIG_PADRAO)
+    for variavel, chave in VARIAVEIS_AMBIENTE.items():
+        if os.environ.get(variavel):
+            config[chave] = os.environ[variavel]
+    config.update(extras)
+    return config
+
+
+def criar_tpb(somente_leitura=False, isolamento='snapshot', esperar=True, timeout=None):
+    """
+    TPB do fdb
+
+    - isolamento: 'snapshot', 'read_committed' (rec_version) ou 'consistency'
+    - esperar: espera locks (wait) ou falha na hora (nowait)
+    - timeout: segundos de espera por lock (com esperar=True)
+    """
+    niveis = {
+        'snapshot': fdb.isc_tpb_concurrency,
+        'read_committed': (fdb.isc_tpb_read_committed, fdb.isc_tpb_rec_version),
+        'consistency': fdb.isc_tpb_consistency,
+    }
+    tpb = fdb.TPB()
+    tpb.access_mode = fdb.isc_tpb_read if somente_leitura else fdb.isc_tpb_write
+    tpb.isolation_level = niveis[isolamento]
+    tpb.lock_resolution = fdb.isc_tpb_wait if esperar else fdb.isc_tpb_nowait
+    if timeout and esperar:
+        tpb.lock_timeout = timeout
+    return tpb.render()
+
+
+TPBS = {
+    'carga': criar_tpb(),
+    'verificacao': criar_tpb(somente_leitura=True, isolamento='read_committed'),
+}
+
+
+def conectar(uso='carga', **extras):
+    """Nova conexao com o TPB do uso ('carga', 'verificacao' ou TPB pronto)"""
+    con = fdb.connect(**configuracao(**extras))
+    con.default_tpb = TPBS.get(uso, uso)
+    return con
+
+
+class PoolConexoes:
+    """Conexoes abertas reaproveitadas entre threads (uma thread por conexao por vez)"""
+
+    def __init__(self, tamanho=TAMANHO_POOL, **extras):
+        self.tamanho = tamanho
+        self.extras = extras
+        self.livres = queue.LifoQueue()
+        self.abertas = 0
+        self.trava = threading.Lock()
+        self.disponivel = threading.Semaphore(tamanho)
+
+    def obter(self, uso='carga'):
+        """Conexao livre (ou nova, ate o tamanho do pool) com o TPB do uso"""
+        self.disponivel.acquire()
+        try:
+            try:
+                con = self.livres.get_nowait()
+            except queue.Empty:
+                con = conectar(uso, **self.extras)
+                with self.trava:
+                    self.abertas += 1
+                return con
+            con.default_tpb = TPBS.get(uso, uso)
+            return con
+        except Exception:
+            self.disponivel.release()
+            raise
+
+    def devolver(self, con, erro=False):
+        """Devolve a conexao; transacao aberta e desfeita (ou commitada, sem erro)"""
+        try:
+            if con.main_transaction.active:
+                if erro:
+                    con.rollback()
+                else:
+                    con.commit()
+            self.livres.put(con)
+        except Exception:
+            # Conexao quebrada nao volta para o pool
+            with self.trava:
+                self.abertas -= 1
+            try:
+                con.close()
+            except Exception:
+                pass
+        finally:
+            self.disponivel.release()
+
+    def conexao(self, uso='carga'):
+        """Context manager: obter + devolver (commit no fim, rollback com erro)"""
+        return _ConexaoDoPool(self, uso)
+
+    def fechar(self):
+        """Fecha as conexoes livres"""
+        while True:
+            try:
+                con = self.livres.get_nowait()
+            except queue.Empty:
+                break
+            con.close()
+            with self.trava:
+                self.abertas -= 1
+
+
+class _ConexaoDoPool:
+    def __init__(self, pool, uso):
+        self.pool = pool
+        self.uso = uso
+        self.con = None
+
+    def __enter__(self):
+        self.con = self.pool.obter(self.uso)
+        return self.con
+
+    def __exit__(self, tipo_erro, erro, traceback):
+        self.pool.devolver(self.con, erro=tipo_erro is not None)
+        return False
+
+
+_pool = None
+_trava_pool = threading.Lock()
+
+
+def pool():
+    """Pool do processo (criado no primeiro uso)"""
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            _pool = PoolConexoes()
+        return _pool
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conferencia "valor gravado no pedido x soma dos itens" calculada no Firebird
+
+A soma dos itens e feita com GROUP BY no proprio Firebird e juntada com a
+tabela do pedido no servidor; para o Python so voltam os pedidos que
+divergem (normalmente algumas centenas), nunca os milhoes de itens. A
+correcao e um unico MERGE com o agregado, restrito aos pedidos divergentes.
+
+Vale para qualquer par cabecalho/itens: a tabela (alias P) com a chave e a
+coluna conferida, e a tabela de itens com a chave de ligacao e o agregado
+(SUM, COUNT...). Valores em centavos; filtro e uma condicao SQL sobre P.
+
+Uso:
+    from consistencia_firebird import ConferenciaAgregado
+
+    conferencia = ConferenciaAgregado('PEDIDOS', 'CODIGO', 'VLR_PRODUTOS',
+                                      'PEDIDOS_ITENS', 'CODIGO', 'SUM(VLR_TOTAL)',
+                                      colunas=['VLR_TOTAL'])
+    for d in conferencia.divergentes(cur, tolerancia=100):
+        d.chave, d.valor, d.agregado, d.diferenca, d.extras
+    corrigidos = conferencia.corrigir(cur)
+    con.commit()
+"""
+
+from collections import namedtuple
+
+Divergencia = namedtuple('Divergencia', 'chave valor agregado diferenca extras')
+
+
+class ConferenciaAgregado:
+    """Coluna de uma tabela x agregado da tabela de itens, tudo no servidor"""
+
+    def __init__(self, tabela, chave, coluna, tabela_itens, chave_itens, agregado, colunas=()):
+        """
+        - tabela / chave / coluna: cabecalho e a coluna conferida (ex: VLR_PRODUTOS)
+        - tabela_itens / chave_itens: itens e a coluna que liga ao cabecalho
+        - agregado: expressao de agregacao sobre os itens (ex: 'SUM(VLR_TOTAL)')
+        - colunas: colunas extras do cabecalho devolvidas nas divergencias
+        """
+        self.tabela = tabela
+        self.chave = chave
+        self.coluna = coluna
+        self.tabela_itens = tabela_itens
+        self.chave_itens = chave_itens
+        self.agregado = agregado
+        self.colunas = list(colunas)
+
+    def _sql_agregado(self):
+        return (f"SELECT {self.chave_itens} AS CHAVE, COALESCE({self.agregado}, 0) AS VALOR "
+                f"FROM {self.tabela_itens} GROUP BY {self.chave_itens}")
+
+    def _sql_diferenca(self):
+        return f"ABS(COALESCE(P.{self.coluna}, 0) - A.VALOR)"
+
+    def _sql_juncao(self, tolerancia, filtro):
+        """FROM/WHERE dos cabecalhos com itens cujo valor difere do agregado"""
+        condicao = f"{self._sql_diferenca()} > {tolerancia}"
+        if filtro:
+            condicao += f" AND ({filtro})"
+        return (f"FROM {self.tabela} P\n"
+                f"JOIN ({self._sql_agregado()}) A ON A.CHAVE = P.{self.chave}\n"
+                f"WHERE {condicao}")
+
+    def divergentes(self, cur, tolerancia=0, filtro=None):
+        """Divergencias (maior diferenca primeiro); so elas saem do servidor"""
+        extras = ''.join(f", P.{coluna}" for coluna in self.colunas)
+        cur.execute(f"""
+            SELECT P.{self.chave}, P.{self.coluna}, A.VALOR, {self._sql_diferenca()}{extras}
+            {self._sql_juncao(tolerancia, filtro)}
+            ORDER BY 4 DESC
+        """)
+        return [Divergencia(linha[0], linha[1], linha[2], linha[3], tuple(linha[4:]))
+                for linha in cur.fetchall()]
+
+    def contar(self, cur, tolerancia=0, filtro=None):
+        """Quantidade de divergencias"""
+        cur.execute(f"SELECT COUNT(*) {self._sql_juncao(tolerancia, filtro)}")
+        return cur.fetchone()[0]
+
+    def corrigir(self, cur, tolerancia=0, filtro=None):
+        """
+        Grava o agregado na coluna dos cabecalhos divergentes com um MERGE
+
+        Devolve quantos cabecalhos foram corrigidos (contados antes, na mesma
+        transacao). Nao faz commit.
+        """
+        corrigir = self.contar(cur, tolerancia, filtro)
+        if not corrigir:
+            return 0
+        cur.execute(f"""
+            MERGE INTO {self.tabela} D
+            USING (
+                SELECT P.{self.chave} AS CHAVE, A.VALOR
+                {self._sql_juncao(tolerancia, filtro)}
+            ) C
+            ON D.{self.chave} = C.CHAVE
+            WHEN MATCHED THEN UPDATE SET {self.coluna} = C.VALOR
+        """)
+        return corrigir
@@ -6,14 +6,12 @@ Corrige FRETE e DESCONTO de todos os pedidos (migração do PostgreSQL)
 
 import sys, codecs
 
+from conexao_firebird import conectar
+from pgdmp import ler_tabela_pgdmp
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("CORRIGINDO FRETE E DESCONTO DE TODOS OS PEDIDOS")
@@ -25,61 +23,36 @@ print("="*100)
 print("\n>> 1. LENDO DADOS DO POSTGRESQL...")
 print("-"*100)
 
-import os
-
-# Extrair dados do backup PostgreSQL
-dump_file = r'c:\Projeto\Academia\pedidos-54329.sql'
-
-# Buscar dados do PostgreSQL
-print("  Extraindo dados do PostgreSQL...")
-
-import subprocess
-
-pg_restore = r'c:\Projeto\Academia\pg-tools\pgsql\bin\pg_restore.exe'
 backup_file = r'C:\Mac\Home\Documents\bkp brabancia\bmcmdb.bkp'
 
-# Extrair dados da tabela pedidos
-cmd = f'"{pg_restore}" --data-only --table=pedidos -f "{dump_file}" "{backup_file}"'
-
-try:
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=120)
-    print(f"  ✓ Dados extraídos para: {dump_file}")
-except Exception as e:
-    print(f"  Erro ao extrair: {e}")
+# Ler a tabela pedidos direto do backup (sem pg_restore / .sql intermediario)
+print("  Extraindo dados do PostgreSQL...")
 
-# Ler arquivo SQL e extrair valores
 pedidos_pg = {}
 
-if os.path.exists(dump_file):
-    print(f"\n  Lendo arquivo: {dump_file}")
-
-    with open(dump_file, 'r', encoding='utf-8', errors='ignore') as f:
-        for line in f:
-            # Linhas que começam com números são dados
-            if line and line[0].isdigit():
-                parts = line.strip().split('\t')
-
-                if len(parts) >= 12:
-                    try:
-                        # Estrutura: idpedido, idfilial, idfornecedor, documento, vlnota, vlprod, vlfrete, vlicms, vlipi, vlsubtrib, vldespesas, vldescontos
-                        idpedido = int(parts[0])
-                        vlnota = float(parts[4]) if parts[4] != '\\N' else 0
-                        vlprod = float(parts[5]) if parts[5] != '\\N' else 0
-                        vlfrete = float(parts[6]) if parts[6] != '\\N' else 0
-                        vldesc = float(parts[11]) if parts[11] != '\\N' else 0  # vldescontos
-
-                        pedidos_pg[idpedido] = {
-                            'vlnota': vlnota,
-                            'vlprod': vlprod,
-                            'vlfrete': vlfrete,
-                            'vldesc': vldesc
-                        }
-                    except (ValueError, IndexError):
-                        continue
+try:
+    for parts in ler_tabela_pgdmp(backup_file, 'pedidos'):
+        if len(parts) >= 12:
+            try:
+                # Estrutura: idpedido, idfilial, idfornecedor, documento, vlnota, vlprod, vlfrete, vlicms, vlipi, vlsubtrib, vldespesas, vldescontos
+                idpedido = int(parts[0])
+                vlnota = float(parts[4]) if parts[4] is not None else 0
+                vlprod = float(parts[5]) if parts[5] is not None else 0
+                vlfrete = float(parts[6]) if parts[6] is not None else 0
+                vldesc = float(parts[11]) if parts[11] is not None else 0  # vldescontos
+
+                pedidos_pg[idpedido] = {
+                    'vlnota': vlnota,
+                    'vlprod': vlprod,
+                    'vlfrete': vlfrete,
+                    'vldesc': vldesc
+                }
+            except (ValueError, TypeError):
+                continue
 
     print(f"  ✓ {len(pedidos_pg):,} pedidos lidos do PostgreSQL")
-else:
-    print(f"  ✗ Arquivo não encontrado: {dump_file}")
+except Exception as e:
+    print(f"  ✗ Erro ao ler backup {backup_file}: {e}")
     pedidos_pg = {}
 
 # =======================
@@ -88,14 +61,8 @@ else:
 print("\n>> 2. ATUALIZANDO FIREBIRD...")
 print("-"*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # Contar pedidos com frete/desconto zerados
@@ -204,5 +171,6 @@ except Exception as e:
     print(f"\n[ERRO] {e}")
     import traceback
     traceback.print_exc()
+    exit(1)
 
 print("\n" + "="*100)
@@ -2,48 +2,39 @@
 # -*- coding: utf-8 -*-
 """
 Corrige o campo QTDE_TOTAL dos pedidos baseado nos itens já migrados
+
+Incremental (ver totais_firebird): so os pedidos com itens alterados desde
+a ultima execucao, com fila propria no log.
+
+Uso:
+    python corrigir-qtde-pedidos-v2.py            (pedidos alterados)
+    python corrigir-qtde-pedidos-v2.py --todos    (confere todos os pedidos)
 """
 
 import sys, codecs
 
+from conexao_firebird import conectar
+from totais_firebird import TOTAIS_PEDIDOS, TotaisIncrementais
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("CORRIGINDO QUANTIDADE TOTAL DOS PEDIDOS")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
-    # Fazer UPDATE direto com subquery
     print("\n>> Atualizando quantidades totais...")
 
-    cur.execute("""
-        UPDATE PEDIDOS P
-        SET P.QTDE_TOTAL = (
-            SELECT COALESCE(SUM(I.QTDE), 0)
-            FROM PEDIDOS_ITENS I
-            WHERE I.CODIGO = P.CODIGO
-        )
-    """)
+    totais = TotaisIncrementais(con, 'qtde_pedidos', 'PEDIDOS', 'CODIGO', 'PEDIDOS_ITENS', 'CODIGO',
+                                {'QTDE_TOTAL': TOTAIS_PEDIDOS['QTDE_TOTAL']})
+    resumo = totais.processar(todos='--todos' in sys.argv[1:])
 
-    con.commit()
-
-    print("  Atualização concluída!")
+    print(f"  {resumo['atualizados']:,} de {resumo['verificados']:,} pedidos verificados atualizados")
 
     # Mostrar exemplos após correção
     print(f"\n>> EXEMPLOS APÓS CORREÇÃO:")
@@ -98,3 +89,4 @@ except Exception as e:
     print(f"\n[ERRO] {e}")
     import traceback
     traceback.print_exc()
+    exit(1)
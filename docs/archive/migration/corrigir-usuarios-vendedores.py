@@ -6,14 +6,11 @@ Corrige os nomes dos usuários e marca vendedores corretamente
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 def parse_linha(linha):
     return linha.split('\t')
@@ -80,15 +77,8 @@ for linha in linhas:
 
 print(f"Total de usuarios encontrados: {len(usuarios_pg):,}")
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # ==================== PASSO 1: CORRIGIR NOMES DOS USUARIOS ====================
@@ -7,25 +7,16 @@ Cria unidades faltantes na tabela CAD_UNIDADE
 import sys
 import codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("CRIANDO UNIDADES FALTANTES")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 # Unidades faltantes com suas descrições
 unidades_faltantes = {
     'BD': 'Balde',
@@ -46,7 +37,7 @@ unidades_faltantes = {
 }
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # Pegar o maior ID atual
@@ -117,3 +108,4 @@ except Exception as e:
     print(f"\n[ERRO] {e}")
     import traceback
     traceback.print_exc()
+    exit(1)
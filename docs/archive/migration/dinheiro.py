@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Valores monetarios em centavos inteiros, convertidos do texto sem float
+
+O Firebird guarda dinheiro em centavos (BIGINT). Os scripts faziam
+int(float(texto) * 100), que trunca o erro binario do float (0.29 * 100 =
+28.999... -> 28), ou round(float * 100), exato so ate ~15 digitos. Aqui o
+texto decimal do dump ("1234.56", "12,500", "-0.5") vira centavos com
+aritmetica inteira; a partir da terceira casa arredonda meio para cima
+(0.125 -> 13, -0.125 -> -13).
+
+- centavos: um valor (str, bytes ou numero); invalido (inclusive fora do
+  int64, como "9e99999999" ou "99999999999999999.99") gera ValueError
+- centavos_seguro: mesmo criterio do antigo safe_float (nulo/invalido = 0,
+  extrai o numero de textos como "R$ 12,50")
+- multiplicar: quantidade x preco (em reais) direto em centavos, com Decimal
+  (decimal_seguro le o preco com o criterio do centavos_seguro)
+- centavos_array: coluna inteira com NumPy, em blocos de TAMANHO_BLOCO
+  linhas; o que o caminho vetorizado nao reconhece (notacao cientifica,
+  mais de 16 digitos inteiros) passa pelo escalar. Mesmo resultado de
+  centavos() linha a linha, com nulos/invalidos na mascara.
+
+Uso:
+    from dinheiro import centavos, centavos_array, centavos_seguro, decimal_seguro, multiplicar
+
+    centavos('0.29')                 -> 29
+    centavos_seguro('\\N')            -> 0
+    multiplicar(1.5, '12.345')       -> 1852
+    multiplicar(2, decimal_seguro('R$ 1,50'))  -> 300
+    valores, nulos = centavos_array(coluna)    (int64, bool)
+"""
+
+import re
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+# Linhas convertidas por vez em centavos_array (matriz de bytes n x largura)
+TAMANHO_BLOCO = 20000
+
+# Digitos inteiros aceitos no caminho vetorizado (10**16 * 100 < 2**63)
+MAX_DIGITOS_INTEIROS = 16
+
+# Maior expoente decimal (em reais) aceito: acima dele os centavos passam de
+# 2**63 com certeza, e um "9e99999999" estouraria o Decimal
+MAX_EXPOENTE = 16
+
+# Centavos cabem no BIGINT do Firebird so abaixo disso (em modulo)
+LIMITE_CENTAVOS = 2 ** 63
+
+_NUMERO = re.compile(rb'\s*([-+]?)(\d*)(?:\.(\d*))?\s*$')
+_NUMERO_SOLTO = re.compile(r'[-+]?\d*\.?\d+')
+
+_POTENCIAS = 10 ** np.arange(19, dtype=np.int64)
+
+_MENOS, _MAIS, _PONTO, _VIRGULA, _ZERO = (ord(c) for c in '-+.,0')
+
+
+def _centavos_decimal(valor):
+    """Numero (Decimal, int, float) -> centavos; float passa pelo repr"""
+    if isinstance(valor, float):
+        valor = repr(valor)
+    try:
+        numero = Decimal(valor)
+        if not numero.is_finite() or (numero and numero.adjusted() > MAX_EXPOENTE):
+            raise ValueError
+        resultado = int((numero * 100).to_integral_value(ROUND_HALF_UP))
+    except (ValueError, ArithmeticError):
+        raise ValueError(f"Valor monetario invalido: {valor!r}") from None
+    return _no_int64(resultado, valor)
+
+
+def _no_int64(resultado, valor):
+    """ValueError se os centavos nao cabem no BIGINT"""
+    if abs(resultado) >= LIMITE_CENTAVOS:
+        raise ValueError(f"Valor monetario fora do int64: {valor!r}")
+    return resultado
+
+
+def centavos(valor):
+    """Texto decimal (str ou bytes, ponto ou virgula) ou numero -> centavos (int)"""
+    if isinstance(valor, str):
+        valor = valor.encode('ascii')
+    elif not isinstance(valor, (bytes, bytearray)):
+        return _centavos_decimal(valor)
+
+    correspondencia = _NUMERO.match(valor.replace(b',', b'.'))
+    if correspondencia is None:
+        # Notacao cientifica e afins ("1e3")
+        return _centavos_decimal(valor.decode('ascii').strip().replace(',', '.'))
+    sinal, inteiro, fracao = correspondencia.groups()
+    fracao = fracao or b''
+    if not inteiro and not fracao:
+        raise ValueError(f"Valor monetario invalido: {valor!r}")
+
+    resultado = int(inteiro or b'0') * 100 + int(fracao[:2].ljust(2, b'0'))
+    if fracao[2:3] >= b'5':
+        resultado += 1
+    return _no_int64(-resultado if sinal == b'-' else resultado, valor)
+
+
+def _numero_solto(valor):
+    """Numero extraido como no safe_float (None se nulo ou sem numero)"""
+    if valor is None or valor in ('', '\\N', b'', b'\\N'):
+        return None
+    if isinstance(valor, (bytes, bytearray)):
+        valor = valor.decode('latin1')
+    correspondencia = _NUMERO_SOLTO.search(valor.strip().replace(',', '.'))
+    return correspondencia.group() if correspondencia else None
+
+
+def centavos_seguro(valor):
+    """Como o safe_float dos scripts de migracao, mas em centavos exatos"""
+    if not isinstance(valor, (str, bytes, bytearray, type(None))):
+        return centavos(valor)
+    numero = _numero_solto(valor)
+    return centavos(numero) if numero is not None else 0
+
+
+def decimal_seguro(valor):
+    """Mesmo criterio do centavos_seguro, em reais (Decimal) para multiplicar"""
+    if not isinstance(valor, (str, bytes, bytearray, type(None))):
+        return _decimal(valor)
+    return Decimal(_numero_solto(valor) or 0)
+
+
+def _decimal(valor):
+    if valor is None:
+        return Decimal(0)
+    if isinstance(valor, float):
+        valor = repr(valor)
+    elif isinstance(valor, (bytes, bytearray)):
+        valor = valor.decode('ascii')
+    if isinstance(valor, str):
+        valor = valor.strip().replace(',', '.')
+    try:
+        numero = Decimal(valor)
+    except ArithmeticError:
+        raise ValueError(f"Numero invalido: {valor!r}") from None
+    if not numero.is_finite():
+        raise ValueError(f"Numero invalido: {valor!r}")
+    return numero
+
+
+def multiplicar(quantidade, preco):
+    """
+    quantidade x preco (em reais) em centavos, sem arredondar o preco antes
+
+    Aceita str, bytes, int, float (pelo repr) ou Decimal; nulo conta 0.
+    """
+    quantidade, preco = _decimal(quantidade), _decimal(preco)
+    try:
+        total = quantidade * preco * 100
+        if total and total.adjusted() > MAX_EXPOENTE + 2:
+            raise ValueError
+        return int(total.to_integral_value(ROUND_HALF_UP))
+    except (ValueError, ArithmeticError):
+        raise ValueError(f"Total fora da faixa: {quantidade} x {preco}") from None
+
+
+def _como_bytes(valores):
+    """Coluna -> array numpy 'S' (nulos viram b'', texto nao ASCII vira '?')"""
+    if isinstance(valores, np.ndarray) and valores.dtype.kind == 'S':
+        return valores
+    lista = [b'' if v is None else v for v in valores]
+    try:
+        return np.array(lista, dtype='S')
+    except (UnicodeEncodeError, TypeError):
+        return np.array([v.encode('ascii', 'replace') if isinstance(v, str) else bytes(v)
+                         for v in lista], dtype='S')
+
+
+def _bloco_centavos(textos):
+    """Caminho vetorizado: (centavos, reconhecidos) de um array 'S'"""
+    n = len(textos)
+    largura = textos.dtype.itemsize
+    if largura == 0:
+        return np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.bool_)
+
+    matriz = textos.view(np.uint8).reshape(n, largura)
+    comprimento = np.char.str_len(textos)
+    negativo = matriz[:, 0] == _MENOS
+    inicio = (negativo | (matriz[:, 0] == _MAIS)).astype(np.int64)
+
+    ponto = (matriz == _PONTO) | (matriz == _VIRGULA)
+    pontos = ponto.sum(axis=1)
+    posicao_ponto = np.where(pontos == 1, ponto.argmax(axis=1), comprimento)
+    reconhecido = ((pontos <= 1) & (comprimento > inicio + (pontos == 1))
+                   & (posicao_ponto - inicio <= MAX_DIGITOS_INTEIROS))
+
+    # Uma coluna de caracteres por vez (largura = maior texto, poucas dezenas)
+    resultado = np.zeros(n, dtype=np.int64)
+    for j in range(largura):
+        digito = (matriz[:, j] - np.uint8(_ZERO)).astype(np.int64)
+        e_digito = digito <= 9
+        dentro = (j >= inicio) & (j < comprimento)
+        reconhecido &= ~dentro | e_digito | (j == posicao_ponto)
+
+        # Expoente (em centavos) do digito: unidade = 2, decimos = 1,
+        # centesimos = 0, terceira casa = -1 (so decide o arredondamento)
+        deslocamento = j - posicao_ponto
+        expoente = np.where(deslocamento < 0, 1 - deslocamento, 2 - deslocamento)
+        usado = dentro & e_digito
+        resultado += np.where(usado & (expoente >= 0),
+                              digito * _POTENCIAS[np.clip(expoente, 0, 18)], 0)
+        resultado += usado & (expoente == -1) & (digito >= 5)
+
+    resultado = np.where(negativo, -resultado, resultado)
+    return np.where(reconhecido, resultado, 0), reconhecido
+
+
+def centavos_array(valores, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Coluna de textos (lista, array numpy 'S'/'U'/object) -> (centavos, nulos)
+
+    centavos e int64 (0 nas posicoes nulas); nulos e a mascara dos valores
+    None, vazios, invalidos ou fora do int64.
+    """
+    textos = _como_bytes(valores)
+    textos = np.char.strip(textos)
+    n = len(textos)
+    resultado = np.zeros(n, dtype=np.int64)
+    nulos = np.zeros(n, dtype=np.bool_)
+
+    for inicio in range(0, n, tamanho_bloco):
+        bloco = textos[inicio:inicio + tamanho_bloco]
+        convertidos, reconhecidos = _bloco_centavos(bloco)
+        resultado[inicio:inicio + len(bloco)] = convertidos
+
+        for i in np.flatnonzero(~reconhecidos):
+            try:
+                resultado[inicio + i] = centavos(bloco[i])
+            except (ValueError, OverflowError):
+                nulos[inicio + i] = True
+
+    return resultado, nulos
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Executa a migracao completa PostgreSQL -> Firebird pelo grafo de dependencias
+
+As etapas declaram as tabelas que leem e gravam; as que nao dependem uma da
+outra (ex: CAD_PRODUTOS e FIN_CTAPAGAR) rodam ao mesmo tempo, cada uma com
+sua conexao Firebird. O log de cada etapa fica em logs/<etapa>.log.
+
+Uso:
+    python executar-migracao.py            (executa)
+    python executar-migracao.py --listar   (so mostra as etapas e dependencias)
+    python executar-migracao.py --em-massa (cargas grandes com indices/triggers desativados)
+"""
+
+import sys
+import codecs
+import time
+
+from agendador_migracao import OK, Etapa, caminho_critico, executar, montar_grafo, niveis
+
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+
+PASTA_DADOS = r'c:\Projeto\Academia'
+BACKUP_PGDMP = r'C:\Mac\Home\Documents\bkp brabancia\bmcmdb.bkp'
+
+# Etapas ao mesmo tempo (cada uma abre sua conexao com o Firebird)
+MAX_PROCESSOS = 4
+
+# Ordem de declaracao = ordem da migracao manual. Uma etapa espera as
+# anteriores que gravam alguma tabela que ela le ou grava; as atualizacoes de
+# CAD_PRODUTOS (estoque, unidades, NCM) vem depois de vendas/itens porque nao
+# mudam o CODIGO que essas etapas consultam.
+ETAPAS = [
+    Etapa('pessoas', 'migrar-pessoas.py',
+          arquivos=[rf'{PASTA_DADOS}\fornecedores-clientes.sql'],
+          grava=['CAD_PESSOA']),
+    Etapa('produtos', 'migracao-dados.py', ['produtos'],
+          arquivos=[rf'{PASTA_DADOS}\dados-extraidos.sql'],
+          grava=['CAD_PRODUTOS']),
+    Etapa('contas_pagar', 'migracao-dados.py', ['contas_pagar'],
+          arquivos=[rf'{PASTA_DADOS}\dados-extraidos.sql'],
+          le=['CAD_PESSOA'], grava=['FIN_CTAPAGAR']),
+    Etapa('contas_receber', 'migracao-dados.py', ['contas_receber'],
+          arquivos=[rf'{PASTA_DADOS}\dados-extraidos.sql'],
+          le=['CAD_PESSOA'], grava=['FIN_CTARECEBER']),
+    Etapa('funcionarios', 'migrar-funcionarios-usuarios-vendas.py',
+          arquivos=[rf'{PASTA_DADOS}\funcionarios-usuarios.sql'],
+          grava=['USUARIO_CARGO', 'CAD_PESSOA', 'USUARIO']),
+    Etapa('vendas', 'migrar-vendas.py',
+          arquivos=[rf'{PASTA_DADOS}\vendas-extraidas.sql'],
+          le=['CAD_PESSOA', 'CAD_PRODUTOS', 'USUARIO'], grava=['PEDIDOS', 'PEDIDOS_ITENS']),
+    Etapa('itens', 'migrar-itens-pedidos.py',
+          arquivos=[rf'{PASTA_DADOS}\vendas-extraidas.sql'],
+          le=['PEDIDOS', 'CAD_PRODUTOS'], grava=['PEDIDOS_ITENS']),
+    Etapa('estoque', 'atualizar-estoque.py',
+          arquivos=[rf'{PASTA_DADOS}\estoque-extraido.sql'],
+          grava=['CAD_PRODUTOS']),
+    Etapa('unidades', 'criar-unidades-faltantes.py',
+          grava=['CAD_UNIDADE', 'CAD_PRODUTOS']),
+    Etapa('ids_produtos', 'atualizar-ids-produtos.py',
+          le=['CAD_UNIDADE', 'CAD_NCM'], grava=['CAD_PRODUTOS']),
+    Etapa('qtde_pedidos', 'corrigir-qtde-pedidos-v2.py',
+          le=['PEDIDOS_ITENS'], grava=['PEDIDOS']),
+    Etapa('frete_desconto', 'corrigir-frete-desconto.py',
+          arquivos=[BACKUP_PGDMP],
+          grava=['PEDIDOS']),
+    Etapa('valores_pedidos', 'recalcular-valores-v2.py',
+          le=['PEDIDOS_ITENS'], grava=['PEDIDOS']),
+]
+
+
+# Etapas que aceitam --em-massa (ver indices_firebird)
+ETAPAS_EM_MASSA = ['pessoas', 'contas_receber', 'vendas', 'itens']
+
+
+def listar(grafo):
+    print("Etapas por nivel (as de um mesmo nivel rodam em paralelo):\n")
+    for i, nivel in enumerate(niveis(grafo), 1):
+        print(f"Nivel {i}:")
+        for nome in nivel:
+            deps = ', '.join(sorted(grafo[nome])) or '-'
+            print(f"  {nome:<18} depende de: {deps}")
+
+
+if __name__ == '__main__':
+    print("=== MIGRACAO POSTGRESQL -> FIREBIRD (ETAPAS EM PARALELO) ===\n")
+    grafo = montar_grafo(ETAPAS)
+
+    if '--listar' in sys.argv[1:]:
+        listar(grafo)
+        sys.exit(0)
+
+    if '--em-massa' in sys.argv[1:]:
+        for etapa in ETAPAS:
+            if etapa.nome in ETAPAS_EM_MASSA:
+                etapa.argumentos.append('--em-massa')
+
+    inicio = time.time()
+    resultados = executar(ETAPAS, processos=MAX_PROCESSOS)
+    total = time.time() - inicio
+
+    duracoes = {nome: r['segundos'] for nome, r in resultados.items()}
+    critico, caminho = caminho_critico(grafo, duracoes)
+
+    print("\n=== RESUMO ===")
+    for etapa in ETAPAS:
+        r = resultados[etapa.nome]
+        print(f"  {etapa.nome:<18} {r['status']:<7} {r['segundos']:>8.1f}s")
+    print(f"\n  Tempo total:            {total:,.1f}s")
+    print(f"  Soma das etapas:        {sum(duracoes.values()):,.1f}s (execucao em sequencia)")
+    print(f"  Caminho critico:        {critico:,.1f}s ({' -> '.join(caminho)})")
+
+    falhas = [nome for nome, r in resultados.items() if r['status'] != OK]
+    if falhas:
+        print(f"\n[ERRO] Etapas com erro ou puladas: {', '.join(falhas)}")
+        sys.exit(1)
+    print("\n=== MIGRACAO CONCLUIDA ===")
@@ -7,7 +7,8 @@ Procura por seções de dados em formato texto (tab-delimited)
 
 import sys
 import codecs
-import re
+
+from leitor_dump import distribuir_copy
 
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
@@ -24,160 +25,43 @@ dados = {
 }
 
 try:
-    with open(arquivo_dump, 'r', encoding='latin1', errors='ignore') as f:
-        linhas = f.readlines()
-
-    total_linhas = len(linhas)
-    print(f"Total de linhas: {total_linhas:,}\n")
-
-    # Procurar por seções específicas
+    # Tabela do PostgreSQL -> chave em dados
+    destinos = {
+        'produtos': 'produtos',
+        'conta_pagar': 'contas_pagar',
+        'documentos': 'contas_receber',
+        'creditos': 'creditos'
+    }
+    descartadas = {tabela: 0 for tabela in destinos}
+    exemplos_descartados = []
+
+    def consumidor(tabela):
+        lista = dados[destinos[tabela]]
+
+        def guardar(colunas, valores):
+            # Com os escapes do COPY tratados pelo leitor, numero de colunas
+            # diferente so acontece com linha corrompida: conta e guarda exemplo
+            if len(valores) != len(colunas):
+                descartadas[tabela] += 1
+                if len(exemplos_descartados) < 5:
+                    exemplos_descartados.append((tabela, len(valores), len(colunas), valores[:3]))
+                return
+            lista.append(dict(zip(colunas, valores)))
+
+        return guardar
+
+    # Uma unica passada pelo dump para as quatro tabelas
     print("Procurando dados das tabelas...\n")
+    contagem = distribuir_copy(arquivo_dump, {tabela: consumidor(tabela) for tabela in destinos})
 
-    # Função para verificar se uma linha parece conter dados tabulares
-    def e_linha_dados(linha):
-        # Deve ter tabs
-        if '\t' not in linha:
-            return False
-        # Não deve ter muitos caracteres de controle binários
-        controle = sum(1 for c in linha if ord(c) < 32 and ord(c) not in [9, 10, 13])
-        return controle < 5  # Permite alguns caracteres de controle
-
-    # Procurar por produtos
-    print(">>> Procurando PRODUTOS...")
-    for i, linha in enumerate(linhas):
-        if 'COPY public.produtos' in linha and 'FROM stdin' in linha:
-            print(f"  Encontrado COPY produtos na linha {i:,}")
-
-            # Extrair nomes das colunas
-            match = re.search(r'COPY public\.produtos\s+\((.*?)\)', linha)
-            if match:
-                colunas = [c.strip() for c in match.group(1).split(',')]
-                print(f"  Colunas: {len(colunas)}")
-
-                # Procurar dados nas próximas linhas
-                for j in range(i + 1, min(i + 200000, total_linhas)):
-                    linha_dado = linhas[j]
-
-                    # Fim de dados
-                    if linha_dado.strip() == '\\.':
-                        print(f"  Fim dos dados na linha {j:,}")
-                        break
-
-                    # Se parece linha de dados
-                    if e_linha_dados(linha_dado):
-                        valores = linha_dado.rstrip('\n').split('\t')
-
-                        # Se tem número correto de colunas
-                        if len(valores) == len(colunas):
-                            produto = {}
-                            for idx, col in enumerate(colunas):
-                                produto[col] = None if valores[idx] == '\\N' else valores[idx]
-                            dados['produtos'].append(produto)
-
-                            if len(dados['produtos']) % 1000 == 0:
-                                print(f"    {len(dados['produtos'])} produtos extraidos...")
-
-                print(f"  Total produtos: {len(dados['produtos'])}")
-                break
-
-    # Procurar por conta_pagar
-    print("\n>>> Procurando CONTA_PAGAR...")
-    for i, linha in enumerate(linhas):
-        if 'COPY public.conta_pagar' in linha and 'FROM stdin' in linha:
-            print(f"  Encontrado COPY conta_pagar na linha {i:,}")
-
-            match = re.search(r'COPY public\.conta_pagar\s+\((.*?)\)', linha)
-            if match:
-                colunas = [c.strip() for c in match.group(1).split(',')]
-                print(f"  Colunas: {len(colunas)}")
-
-                for j in range(i + 1, min(i + 100000, total_linhas)):
-                    linha_dado = linhas[j]
-
-                    if linha_dado.strip() == '\\.':
-                        print(f"  Fim dos dados na linha {j:,}")
-                        break
-
-                    if e_linha_dados(linha_dado):
-                        valores = linha_dado.rstrip('\n').split('\t')
-
-                        if len(valores) == len(colunas):
-                            conta = {}
-                            for idx, col in enumerate(colunas):
-                                conta[col] = None if valores[idx] == '\\N' else valores[idx]
-                            dados['contas_pagar'].append(conta)
-
-                            if len(dados['contas_pagar']) % 100 == 0:
-                                print(f"    {len(dados['contas_pagar'])} contas a pagar extraidas...")
-
-                print(f"  Total contas a pagar: {len(dados['contas_pagar'])}")
-                break
-
-    # Procurar por documentos (contas a receber)
-    print("\n>>> Procurando DOCUMENTOS...")
-    for i, linha in enumerate(linhas):
-        if 'COPY public.documentos' in linha and 'FROM stdin' in linha:
-            print(f"  Encontrado COPY documentos na linha {i:,}")
-
-            match = re.search(r'COPY public\.documentos\s+\((.*?)\)', linha)
-            if match:
-                colunas = [c.strip() for c in match.group(1).split(',')]
-                print(f"  Colunas: {len(colunas)}")
-
-                for j in range(i + 1, min(i + 200000, total_linhas)):
-                    linha_dado = linhas[j]
-
-                    if linha_dado.strip() == '\\.':
-                        print(f"  Fim dos dados na linha {j:,}")
-                        break
-
-                    if e_linha_dados(linha_dado):
-                        valores = linha_dado.rstrip('\n').split('\t')
-
-                        if len(valores) == len(colunas):
-                            doc = {}
-                            for idx, col in enumerate(colunas):
-                                doc[col] = None if valores[idx] == '\\N' else valores[idx]
-                            dados['contas_receber'].append(doc)
-
-                            if len(dados['contas_receber']) % 100 == 0:
-                                print(f"    {len(dados['contas_receber'])} documentos extraidos...")
-
-                print(f"  Total documentos: {len(dados['contas_receber'])}")
-                break
-
-    # Procurar por creditos
-    print("\n>>> Procurando CREDITOS...")
-    for i, linha in enumerate(linhas):
-        if 'COPY public.creditos' in linha and 'FROM stdin' in linha:
-            print(f"  Encontrado COPY creditos na linha {i:,}")
-
-            match = re.search(r'COPY public\.creditos\s+\((.*?)\)', linha)
-            if match:
-                colunas = [c.strip() for c in match.group(1).split(',')]
-                print(f"  Colunas: {len(colunas)}")
-
-                for j in range(i + 1, min(i + 50000, total_linhas)):
-                    linha_dado = linhas[j]
-
-                    if linha_dado.strip() == '\\.':
-                        print(f"  Fim dos dados na linha {j:,}")
-                        break
-
-                    if e_linha_dados(linha_dado):
-                        valores = linha_dado.rstrip('\n').split('\t')
-
-                        if len(valores) == len(colunas):
-                            credito = {}
-                            for idx, col in enumerate(colunas):
-                                credito[col] = None if valores[idx] == '\\N' else valores[idx]
-                            dados['creditos'].append(credito)
-
-                            if len(dados['creditos']) % 100 == 0:
-                                print(f"    {len(dados['creditos'])} creditos extraidos...")
+    for tabela, chave in destinos.items():
+        print(f">>> {tabela.upper()}: {len(dados[chave])} registros extraidos "
+              f"({contagem[tabela]} lidos, {descartadas[tabela]} descartados)")
 
-                print(f"  Total creditos: {len(dados['creditos'])}")
-                break
+    if exemplos_descartados:
+        print("\nAVISO: linhas descartadas por numero de colunas diferente:")
+        for tabela, recebidas, esperadas, inicio in exemplos_descartados:
+            print(f"  - {tabela}: {recebidas} campos (esperado {esperadas}) {inicio}")
 
     # Salvar dados extraídos em arquivo pickle para usar depois
     print("\n>>> Salvando dados extraidos...")
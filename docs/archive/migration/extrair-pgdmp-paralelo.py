@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extrai as tabelas da migracao direto do backup PGDMP, em paralelo
+Cada tabela e descomprimida em um processo separado e gravada em
+<destino>/<tabela>.sql (COPY texto, legivel pelo leitor_dump)
+"""
+
+import sys
+import codecs
+import time
+
+from pgdmp import extrair_paralelo
+
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+
+arquivo_bkp = r'C:\Mac\Home\Documents\bkp brabancia\bmcmdb.bkp'
+destino = r'c:\Projeto\Academia\extraido'
+
+tabelas = ['pedidos', 'pedidos_itens', 'documentos', 'creditos', 'produtos', 'conta_pagar']
+
+if __name__ == '__main__':
+    print("=== EXTRACAO PARALELA DO BACKUP PGDMP ===\n")
+    print(f"Arquivo: {arquivo_bkp}")
+    print(f"Destino: {destino}\n")
+
+    try:
+        inicio = time.time()
+        resultados = extrair_paralelo(arquivo_bkp, tabelas, destino=destino)
+        total = time.time() - inicio
+
+        print("\n=== RESUMO ===")
+        for tabela in tabelas:
+            r = resultados.get(tabela)
+            if r:
+                print(f"{tabela:<15} {r['linhas']:>10,} linhas  {r['bytes'] / 1024 / 1024:>8.1f} MB  "
+                      f"{r['segundos']:>6.1f}s  -> {r['arquivo']}")
+            else:
+                print(f"{tabela:<15} nao encontrada")
+
+        soma = sum(r['segundos'] for r in resultados.values())
+        print(f"\nTempo total: {total:.1f}s (soma das tabelas: {soma:.1f}s)")
+
+    except Exception as e:
+        print(f"ERRO: {e}")
+        import traceback
+        traceback.print_exc()
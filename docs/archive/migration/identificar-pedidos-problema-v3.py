@@ -1,91 +1,49 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Identifica pedidos com problema (agregação em Python)
+Identifica pedidos com problema (agregação no Firebird)
 """
 
 import sys, codecs
 
+from conexao_firebird import conectar
+from consistencia_firebird import ConferenciaAgregado
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("IDENTIFICANDO PEDIDOS COM VALORES INCORRETOS (V3)")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
-    # Buscar TODOS os itens
-    print("\n>> Buscando todos os itens...")
-    cur.execute("SELECT CODIGO, VLR_TOTAL FROM PEDIDOS_ITENS")
-    todos_itens = cur.fetchall()
-
-    print(f"  {len(todos_itens):,} itens encontrados")
-
-    # Agregar em Python
-    print("\n>> Agregando valores por pedido...")
-    soma_por_pedido = {}
-
-    for codigo, vlr_total in todos_itens:
-        vlr = float(vlr_total) / 100 if vlr_total else 0
-
-        if codigo not in soma_por_pedido:
-            soma_por_pedido[codigo] = 0
-        soma_por_pedido[codigo] += vlr
-
-    print(f"  {len(soma_por_pedido):,} pedidos com itens")
-
-    # Buscar dados dos pedidos
-    print("\n>> Buscando dados dos pedidos...")
-    cur.execute("SELECT CODIGO, VLR_PRODUTOS, VLR_TOTAL FROM PEDIDOS WHERE VLR_PRODUTOS > 0")
-    pedidos = cur.fetchall()
-
-    print(f"  {len(pedidos):,} pedidos")
-
-    # Comparar
-    print("\n>> Comparando valores...")
+    # Soma dos itens por pedido e comparacao feitas no Firebird: so voltam
+    # os pedidos com diferença maior que R$ 1,00
+    print("\n>> Comparando VLR_PRODUTOS com a soma dos itens (no Firebird)...")
+    conferencia = ConferenciaAgregado('PEDIDOS', 'CODIGO', 'VLR_PRODUTOS',
+                                      'PEDIDOS_ITENS', 'CODIGO', 'SUM(VLR_TOTAL)',
+                                      colunas=['VLR_TOTAL'])
     pedidos_problema = []
 
-    for codigo, vlr_produtos, vlr_total in pedidos:
-        vlr_prod_real = float(vlr_produtos) / 100 if vlr_produtos else 0
-        vlr_total_real = float(vlr_total) / 100 if vlr_total else 0
-
-        if codigo in soma_por_pedido:
-            soma_itens = soma_por_pedido[codigo]
-            diferenca = abs(vlr_prod_real - soma_itens)
-
-            # Se diferença for maior que R$ 1,00
-            if diferenca > 1.00:
-                pedidos_problema.append({
-                    'codigo': codigo,
-                    'vlr_produtos': vlr_prod_real,
-                    'vlr_total': vlr_total_real,
-                    'soma_itens': soma_itens,
-                    'diferenca': diferenca
-                })
+    for divergencia in conferencia.divergentes(cur, tolerancia=100, filtro='P.VLR_PRODUTOS > 0'):
+        vlr_total = divergencia.extras[0]
+        pedidos_problema.append({
+            'codigo': divergencia.chave,
+            'vlr_produtos': float(divergencia.valor) / 100 if divergencia.valor else 0,
+            'vlr_total': float(vlr_total) / 100 if vlr_total else 0,
+            'soma_itens': float(divergencia.agregado) / 100,
+            'diferenca': float(divergencia.diferenca) / 100
+        })
 
     print(f"\n>> RESULTADO:")
     print("-"*100)
     print(f"  Pedidos com diferença > R$ 1,00: {len(pedidos_problema):,}")
 
     if pedidos_problema:
-        # Ordenar por diferença
-        pedidos_problema.sort(key=lambda x: x['diferenca'], reverse=True)
-
         print(f"\n>> TOP 50 PEDIDOS COM MAIORES DIFERENCAS:")
         print("-"*100)
 
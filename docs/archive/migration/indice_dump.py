@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indice persistente das secoes COPY de um dump PostgreSQL (formato texto)
+
+O indice e criado uma unica vez por dump e gravado ao lado dele em
+"<dump>.idx.json". Para cada secao COPY guarda a tabela, as colunas, o
+offset em bytes do inicio e do fim dos dados e a quantidade de linhas.
+Depois disso qualquer script pode fazer seek() direto para a tabela que
+precisa, sem reler o dump inteiro.
+
+O indice vale enquanto tamanho, mtime e hash de amostra (primeiro e ultimo
+MB) do dump forem os mesmos; o SHA-1 completo fica registrado para quem
+precisa identificar o conteudo do dump (ex: caches derivados).
+
+Uso:
+    from indice_dump import carregar_indice, ler_secao
+
+    indice = carregar_indice(arquivo)
+    for campos in ler_secao(arquivo, 'pedidos'):
+        ...
+"""
+
+import hashlib
+import json
+import mmap
+import os
+
+from leitor_dump import TAMANHO_BLOCO, campos_linha, detectar_encoding, iterar_linhas, parse_copy
+
+VERSAO_INDICE = 1
+
+# Bytes do inicio e do fim do arquivo usados no hash de amostra
+TAMANHO_AMOSTRA = 1024 * 1024
+
+# Fatias usadas para hash e contagem de linhas sobre o mmap (16 MB)
+TAMANHO_FATIA = 16 * 1024 * 1024
+
+
+def caminho_indice(arquivo):
+    """Caminho do arquivo de indice ao lado do dump"""
+    return arquivo + '.idx.json'
+
+
+def assinatura_rapida(arquivo):
+    """Retorna (tamanho, mtime, hash de amostra) sem ler o arquivo inteiro"""
+    st = os.stat(arquivo)
+    h = hashlib.sha1(str(st.st_size).encode('ascii'))
+    with open(arquivo, 'rb') as f:
+        h.update(f.read(TAMANHO_AMOSTRA))
+        if st.st_size > TAMANHO_AMOSTRA:
+            f.seek(max(TAMANHO_AMOSTRA, st.st_size - TAMANHO_AMOSTRA))
+            h.update(f.read(TAMANHO_AMOSTRA))
+    return st.st_size, st.st_mtime, h.hexdigest()
+
+
+def contar(m, padrao, inicio, fim):
+    """
+    Conta ocorrencias de padrao em m[inicio:fim] fatiando o mmap
+
+    Cada fatia avanca len(padrao) - 1 bytes sobre a proxima: a ocorrencia que
+    cruza o corte e contada (uma vez so, na fatia em que comeca).
+    """
+    sobra = len(padrao) - 1
+    total = 0
+    for pos in range(inicio, fim, TAMANHO_FATIA):
+        total += m[pos:min(pos + TAMANHO_FATIA + sobra, fim)].count(padrao)
+    return total
+
+
+def fim_secao(m, inicio):
+    """Offset do inicio da linha '\\.' que fecha a secao (ou fim do arquivo)"""
+    busca = inicio - 1
+    while True:
+        pos = m.find(b'\n\\.', busca)
+        if pos == -1:
+            return len(m)
+        depois = pos + 3
+        if depois == len(m) or m[depois] in (0x0a, 0x0d):
+            return pos + 1
+        busca = pos + 1
+
+
+def localizar_secoes(m, encoding='latin1'):
+    """Localiza as secoes COPY de um dump aberto com mmap (sem decodificar o arquivo)"""
+    secoes = []
+    pos = 0
+    while True:
+        pos = m.find(b'COPY ', pos)
+        if pos == -1:
+            break
+
+        # COPY precisa estar no inicio da linha
+        if pos > 0 and m[pos - 1] != 0x0a:
+            pos += 1
+            continue
+
+        fim_linha = m.find(b'\n', pos)
+        if fim_linha == -1:
+            break
+
+        copy = parse_copy(m[pos:fim_linha].rstrip(b'\r'), encoding)
+        if not copy:
+            pos = fim_linha + 1
+            continue
+
+        inicio = fim_linha + 1
+        fim = fim_secao(m, inicio)
+        secoes.append({
+            'tabela': copy[0],
+            'colunas': copy[1],
+            'copy': pos,
+            'inicio': inicio,
+            'fim': fim,
+            'linhas': contar(m, b'\n', inicio, fim)
+        })
+        pos = fim
+
+    return secoes
+
+
+def construir_indice(arquivo, encoding='latin1'):
+    """Varre o dump (via mmap) e monta o indice das secoes COPY"""
+    tamanho, mtime, amostra = assinatura_rapida(arquivo)
+    secoes = []
+    sha1 = hashlib.sha1()
+
+    if tamanho:
+        with open(arquivo, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            for pos in range(0, tamanho, TAMANHO_FATIA):
+                sha1.update(m[pos:pos + TAMANHO_FATIA])
+            secoes = localizar_secoes(m, encoding)
+
+    return {
+        'versao': VERSAO_INDICE,
+        'arquivo': os.path.basename(arquivo),
+        'tamanho': tamanho,
+        'mtime': mtime,
+        'hash_amostra': amostra,
+        'sha1': sha1.hexdigest(),
+        'secoes': secoes
+    }
+
+
+def indice_valido(arquivo, indice):
+    """Confere se o indice ainda corresponde ao dump no disco"""
+    if not indice or indice.get('versao') != VERSAO_INDICE:
+        return False
+    tamanho, mtime, amostra = assinatura_rapida(arquivo)
+    return (indice['tamanho'] == tamanho and indice['mtime'] == mtime
+            and indice['hash_amostra'] == amostra)
+
+
+def salvar_indice(arquivo, indice):
+    """Grava o indice de forma atomica (arquivo temporario + rename)"""
+    destino = caminho_indice(arquivo)
+    temporario = destino + '.tmp'
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, indent=1)
+        os.replace(temporario, destino)
+    except OSError as e:
+        print(f"[AVISO] Nao foi possivel gravar o indice {destino}: {e}")
+
+
+def carregar_indice(arquivo, encoding='latin1'):
+    """Le o indice do dump, criando (ou recriando) se estiver ausente ou velho"""
+    destino = caminho_indice(arquivo)
+    if os.path.exists(destino):
+        try:
+            with open(destino, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+            if indice_valido(arquivo, indice):
+                return indice
+        except (OSError, ValueError):
+            pass
+
+    print(f"Criando indice do dump {os.path.basename(arquivo)}...")
+    indice = construir_indice(arquivo, encoding)
+    salvar_indice(arquivo, indice)
+    return indice
+
+
+def secao(indice, tabela):
+    """Retorna a secao de uma tabela no indice (ou None)"""
+    for s in indice['secoes']:
+        if s['tabela'] == tabela:
+            return s
+    return None
+
+
+def ler_secao(arquivo, tabela, encoding=None, indice=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Devolve os campos das linhas de uma tabela, indo direto ao offset dela
+
+    encoding None = client_encoding declarado no dump.
+    """
+    if encoding is None:
+        encoding = detectar_encoding(arquivo)
+    if indice is None:
+        indice = carregar_indice(arquivo, encoding)
+    s = secao(indice, tabela)
+    if s is None:
+        return
+
+    for linha in iterar_linhas(arquivo, tamanho_bloco, s['inicio'], s['fim']):
+        if linha:
+            yield campos_linha(linha, encoding)
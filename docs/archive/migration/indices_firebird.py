@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga em massa: indices e triggers desativados durante a carga
+
+Com o modo ligado, os indices que nao pertencem a constraints (PK, FK,
+UNIQUE) e os triggers das tabelas de destino ficam INACTIVE durante a carga,
+e cada insert deixa de pagar a manutencao dos indices e os triggers legados
+do QRSistema. No fim, cada indice e reativado uma vez (o Firebird reconstroi
+o indice no ACTIVE), os triggers voltam e SET STATISTICS roda em todos os
+indices das tabelas.
+
+Triggers que geram chave (GEN_ID / NEXT VALUE FOR) continuam ativos: sem
+eles o insert ficaria sem a chave.
+
+Seguranca contra queda: a lista do que foi desativado e gravada na tabela
+MIGRACAO_DESATIVADOS na mesma transacao do ALTER ... INACTIVE. Se o script
+morrer no meio, a proxima carga em massa (ou restaurar-indices-triggers.py)
+reativa o que ficou pendente antes de qualquer outra coisa.
+
+Uso:
+    from indices_firebird import CargaEmMassa
+
+    with CargaEmMassa(con, ['PEDIDOS_ITENS']):
+        ... inserts e commits ...
+
+    # Em scripts sem bloco with
+    massa = CargaEmMassa(con, ['PEDIDOS_ITENS'], ativo='--em-massa' in sys.argv)
+    massa.iniciar()
+    ...
+    massa.finalizar()          (no except: massa.finalizar(erro=True))
+"""
+
+from datetime import datetime
+
+TABELA_DESATIVADOS = 'MIGRACAO_DESATIVADOS'
+
+DDL_DESATIVADOS = f"""
+    CREATE TABLE {TABELA_DESATIVADOS} (
+        TIPO VARCHAR(10) NOT NULL,
+        NOME VARCHAR(63) NOT NULL,
+        TABELA VARCHAR(63),
+        DESATIVADO TIMESTAMP,
+        CONSTRAINT PK_MIGRACAO_DESATIVADOS PRIMARY KEY (TIPO, NOME)
+    )
+"""
+
+INDICE = 'INDEX'
+TRIGGER = 'TRIGGER'
+
+# Indices ativos de usuario que nao sustentam constraint
+SQL_INDICES = """
+    SELECT I.RDB$INDEX_NAME
+    FROM RDB$INDICES I
+    LEFT JOIN RDB$RELATION_CONSTRAINTS C ON C.RDB$INDEX_NAME = I.RDB$INDEX_NAME
+    WHERE I.RDB$RELATION_NAME = ?
+    AND C.RDB$INDEX_NAME IS NULL
+    AND COALESCE(I.RDB$INDEX_INACTIVE, 0) = 0
+    AND COALESCE(I.RDB$SYSTEM_FLAG, 0) = 0
+"""
+
+# Triggers ativos de usuario (com o fonte, para ver se geram chave)
+SQL_TRIGGERS = """
+    SELECT RDB$TRIGGER_NAME, RDB$TRIGGER_SOURCE
+    FROM RDB$TRIGGERS
+    WHERE RDB$RELATION_NAME = ?
+    AND COALESCE(RDB$TRIGGER_INACTIVE, 0) = 0
+    AND COALESCE(RDB$SYSTEM_FLAG, 0) = 0
+"""
+
+GERADORES_CHAVE = ('GEN_ID', 'NEXT VALUE FOR')
+
+
+def criar_tabela_desativados(con):
+    """Cria MIGRACAO_DESATIVADOS se ainda nao existir (DDL commitado na hora)"""
+    cur = con.cursor()
+    cur.execute("SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", [TABELA_DESATIVADOS])
+    if not cur.fetchone()[0]:
+        cur.execute(DDL_DESATIVADOS)
+        con.commit()
+        print(f"Tabela {TABELA_DESATIVADOS} criada")
+    cur.close()
+
+
+def gera_chave(fonte):
+    """True se o fonte do trigger usa um generator/sequence"""
+    fonte = (fonte or '').upper()
+    return any(gerador in fonte for gerador in GERADORES_CHAVE)
+
+
+def objetos_para_desativar(con, tabelas):
+    """[(tipo, nome, tabela)] dos indices e triggers que a carga desativa"""
+    cur = con.cursor()
+    objetos = []
+    for tabela in tabelas:
+        tabela = tabela.upper()
+        cur.execute(SQL_INDICES, [tabela])
+        objetos.extend((INDICE, linha[0].strip(), tabela) for linha in cur.fetchall())
+        cur.execute(SQL_TRIGGERS, [tabela])
+        objetos.extend((TRIGGER, linha[0].strip(), tabela) for linha in cur.fetchall()
+                       if not gera_chave(linha[1]))
+    cur.close()
+    return objetos
+
+
+def desativar(con, tabelas):
+    """Desativa indices e triggers das tabelas, registrando cada um (um commit)"""
+    criar_tabela_desativados(con)
+    objetos = objetos_para_desativar(con, tabelas)
+    cur = con.cursor()
+    for tipo, nome, tabela in objetos:
+        cur.execute(f"""
+            UPDATE OR INSERT INTO {TABELA_DESATIVADOS} (TIPO, NOME, TABELA, DESATIVADO)
+            VALUES (?, ?, ?, ?) MATCHING (TIPO, NOME)
+        """, [tipo, nome, tabela, datetime.now()])
+        cur.execute(f'ALTER {tipo} "{nome}" INACTIVE')
+    # Registro e ALTER na mesma transacao: ou os dois ficam, ou nenhum
+    con.commit()
+    cur.close()
+
+    for tipo, nome, tabela in objetos:
+        print(f"  [INACTIVE] {tipo.lower()} {nome} ({tabela})")
+    return objetos
+
+
+def atualizar_estatisticas(con, tabelas):
+    """SET STATISTICS em todos os indices ativos das tabelas"""
+    cur = con.cursor()
+    for tabela in tabelas:
+        cur.execute("""
+            SELECT RDB$INDEX_NAME FROM RDB$INDICES
+            WHERE RDB$RELATION_NAME = ? AND COALESCE(RDB$INDEX_INACTIVE, 0) = 0
+        """, [tabela.upper()])
+        for (nome,) in cur.fetchall():
+            cur.execute(f'SET STATISTICS INDEX "{nome.strip()}"')
+    con.commit()
+    cur.close()
+
+
+def restaurar_pendentes(con, tabelas=None, estatisticas=True):
+    """
+    Reativa o que esta registrado em MIGRACAO_DESATIVADOS
+
+    - tabelas: so os objetos dessas tabelas (None = todos); etapas paralelas
+      em outras tabelas nao sao afetadas
+    - estatisticas: roda SET STATISTICS nas tabelas restauradas e nas
+      tabelas passadas em tabelas (mesmo sem nada pendente)
+
+    Um commit por objeto: cada ACTIVE de indice reconstroi o indice uma vez.
+    O que falhar (ex: duplicidade em indice unico) continua registrado para
+    nova tentativa. Retorna a lista de falhas.
+    """
+    criar_tabela_desativados(con)
+    cur = con.cursor()
+    cur.execute(f"SELECT TIPO, NOME, TABELA FROM {TABELA_DESATIVADOS} ORDER BY TIPO, TABELA, NOME")
+    pendentes = [(t.strip(), n.strip(), (tab or '').strip()) for t, n, tab in cur.fetchall()]
+
+    falhas = []
+    restauradas = []
+    if tabelas is not None:
+        restauradas = [t.upper() for t in tabelas]
+        pendentes = [p for p in pendentes if p[2] in restauradas]
+    for tipo, nome, tabela in pendentes:
+        try:
+            cur.execute(f'ALTER {tipo} "{nome}" ACTIVE')
+            cur.execute(f"DELETE FROM {TABELA_DESATIVADOS} WHERE TIPO = ? AND NOME = ?", [tipo, nome])
+            con.commit()
+            print(f"  [ACTIVE] {tipo.lower()} {nome} ({tabela})")
+        except Exception as erro:
+            con.rollback()
+            falhas.append((tipo, nome, tabela, erro))
+            print(f"  [ERRO] Nao foi possivel reativar {tipo.lower()} {nome} ({tabela}): {erro}")
+        if tabela and tabela not in restauradas:
+            restauradas.append(tabela)
+    cur.close()
+
+    if estatisticas and restauradas:
+        atualizar_estatisticas(con, restauradas)
+        print(f"  Estatisticas atualizadas: {', '.join(restauradas)}")
+    return falhas
+
+
+class CargaEmMassa:
+    """
+    Contexto da carga em massa: desativa na entrada e restaura na saida
+
+    - ativo: False deixa tudo como esta (modo opcional nos scripts)
+
+    Na entrada, restaura o que tiver ficado pendente nas mesmas tabelas (queda
+    anterior) e commita o que a conexao tiver aberto. Na saida com erro, desfaz o que nao
+    foi commitado antes de reativar os indices.
+    """
+
+    def __init__(self, con, tabelas, ativo=True):
+        self.con = con
+        self.tabelas = [t.upper() for t in tabelas]
+        self.ativo = ativo
+        self.objetos = []
+
+    def iniciar(self):
+        """Desativa indices e triggers (para scripts sem bloco with)"""
+        if not self.ativo:
+            return self
+        self.con.commit()
+        print(f"\n>> CARGA EM MASSA: desativando indices e triggers de {', '.join(self.tabelas)}")
+        restaurar_pendentes(self.con, self.tabelas, estatisticas=False)
+        self.objetos = desativar(self.con, self.tabelas)
+        return self
+
+    def finalizar(self, erro=False):
+        """Commita (ou desfaz, com erro) e reativa indices e triggers"""
+        if not self.ativo:
+            return
+        if erro:
+            self.con.rollback()
+        else:
+            self.con.commit()
+        print(f"\n>> CARGA EM MASSA: reativando indices e triggers de {', '.join(self.tabelas)}")
+        falhas = restaurar_pendentes(self.con, self.tabelas)
+        if falhas:
+            print(f"[AVISO] {len(falhas)} objetos continuam INACTIVE; rode restaurar-indices-triggers.py")
+        self.ativo = False
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, tipo_erro, erro, traceback):
+        self.finalizar(erro=tipo_erro is not None)
+        return False
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inspetor de dumps PostgreSQL (formato texto) via mmap
+
+Faz o diagnostico do dump inteiro sem decodificar o arquivo e sem criar um
+objeto Python por linha: tudo e feito com bytes.find / bytes.count /
+bytes.translate sobre fatias do mmap, que rodam em C.
+
+Relata:
+- as secoes COPY (tabela, colunas, linha e offsets no arquivo)
+- os terminadores backslash-ponto (e secoes que ficaram sem terminador)
+- a densidade de bytes de controle (binarios), no arquivo e por secao
+- a contagem de tabs por secao, comparada com o esperado pelas colunas
+- o encoding: SET client_encoding do cabecalho, bytes >= 0x80, sequencias
+  UTF-8 invalidas e bytes indefinidos no cp1252
+
+Uso:
+    from inspetor_dump import inspecionar
+
+    relatorio = inspecionar(arquivo)
+    for s in relatorio['secoes']:
+        print(s['tabela'], s['linhas'], s['tabs'], s['tabs_esperados'])
+"""
+
+import mmap
+import os
+import re
+
+from indice_dump import TAMANHO_FATIA, contar, localizar_secoes
+from leitor_dump import RE_CLIENT_ENCODING, TAMANHO_CABECALHO
+
+# Bytes de controle que nao deveriam aparecer em texto (tudo < 32 menos tab, LF e CR)
+CONTROLE = bytes(b for b in range(32) if b not in (9, 10, 13))
+
+# Bytes fora do ASCII
+ALTOS = bytes(range(0x80, 0x100))
+
+# Bytes sem caractere definido no cp1252
+INDEFINIDOS_CP1252 = b'\x81\x8d\x8f\x90\x9d'
+
+# Sequencias multibyte validas em UTF-8 (RFC 3629)
+RE_UTF8 = re.compile(
+    rb'[\xc2-\xdf][\x80-\xbf]'
+    rb'|\xe0[\xa0-\xbf][\x80-\xbf]'
+    rb'|[\xe1-\xec\xee\xef][\x80-\xbf]{2}'
+    rb'|\xed[\x80-\x9f][\x80-\xbf]'
+    rb'|\xf0[\x90-\xbf][\x80-\xbf]{2}'
+    rb'|[\xf1-\xf3][\x80-\xbf]{3}'
+    rb'|\xf4[\x80-\x8f][\x80-\xbf]{2}'
+)
+
+
+def contar_bytes(dados, conjunto):
+    """Quantidade de bytes de dados que pertencem ao conjunto"""
+    return len(dados) - len(dados.translate(None, conjunto))
+
+
+def _fatias(m, inicio, fim):
+    """
+    Fatias de m[inicio:fim] com no maximo TAMANHO_FATIA bytes
+
+    O corte e recuado ate um byte ASCII para nao partir uma sequencia UTF-8
+    entre duas fatias.
+    """
+    pos = inicio
+    while pos < fim:
+        corte = min(pos + TAMANHO_FATIA, fim)
+        if corte < fim:
+            recuo = corte
+            while recuo > pos and corte - recuo < 4 and m[recuo] >= 0x80:
+                recuo -= 1
+            if recuo > pos:
+                corte = recuo
+        yield m[pos:corte]
+        pos = corte
+
+
+def varrer_trecho(m, inicio, fim):
+    """Contadores de m[inicio:fim]: linhas, tabs, binarios e encoding"""
+    c = {'bytes': fim - inicio, 'linhas': 0, 'tabs': 0, 'binarios': 0,
+         'altos': 0, 'utf8_invalidos': 0, 'cp1252_indefinidos': 0}
+
+    for fatia in _fatias(m, inicio, fim):
+        c['linhas'] += fatia.count(b'\n')
+        c['tabs'] += fatia.count(b'\t')
+        c['binarios'] += contar_bytes(fatia, CONTROLE)
+
+        altos = contar_bytes(fatia, ALTOS)
+        if altos:
+            c['altos'] += altos
+            c['cp1252_indefinidos'] += contar_bytes(fatia, INDEFINIDOS_CP1252)
+            # O que sobra de byte alto depois de tirar as sequencias validas e invalido
+            c['utf8_invalidos'] += contar_bytes(RE_UTF8.sub(b'', fatia), ALTOS)
+
+    return c
+
+
+def _somar(total, parcial):
+    for chave, valor in parcial.items():
+        total[chave] = total.get(chave, 0) + valor
+
+
+def client_encoding(m):
+    """Encoding declarado no cabecalho do dump (SET client_encoding) ou None"""
+    match = RE_CLIENT_ENCODING.search(m[:TAMANHO_CABECALHO])
+    return match.group(1).decode('ascii') if match else None
+
+
+def inspecionar(arquivo, encoding='latin1'):
+    """
+    Diagnostico completo do dump, lendo cada byte uma unica vez
+
+    Retorna um dicionario com:
+    - tamanho, linhas, client_encoding
+    - totais: contadores do arquivo inteiro (ver varrer_trecho)
+    - terminadores: quantidade de linhas backslash-ponto
+    - secoes: uma entrada por COPY com tabela, colunas, linha (numero da linha
+      do COPY), offsets, linhas, tabs, tabs_esperados, binarios, altos,
+      utf8_invalidos e terminada
+    """
+    tamanho = os.path.getsize(arquivo)
+    relatorio = {
+        'arquivo': arquivo,
+        'tamanho': tamanho,
+        'client_encoding': None,
+        'totais': {},
+        'terminadores': 0,
+        'secoes': []
+    }
+    if not tamanho:
+        return relatorio
+
+    with open(arquivo, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        relatorio['client_encoding'] = client_encoding(m)
+        totais = relatorio['totais']
+
+        # Intercala trechos fora das secoes (DDL, SETs...) e secoes de dados,
+        # para que cada byte seja varrido uma vez so
+        pos = 0
+        linha = 1
+        for s in localizar_secoes(m, encoding):
+            fora = varrer_trecho(m, pos, s['inicio'])
+            _somar(totais, fora)
+            linha_copy = linha + contar(m, b'\n', pos, s['copy'])
+            linha += fora['linhas']
+
+            dados = varrer_trecho(m, s['inicio'], s['fim'])
+            _somar(totais, dados)
+            linha += dados['linhas']
+
+            relatorio['secoes'].append({
+                'tabela': s['tabela'],
+                'colunas': s['colunas'],
+                'linha': linha_copy,
+                'copy': s['copy'],
+                'inicio': s['inicio'],
+                'fim': s['fim'],
+                'linhas': s['linhas'],
+                'tabs': dados['tabs'],
+                'tabs_esperados': s['linhas'] * (len(s['colunas']) - 1),
+                'binarios': dados['binarios'],
+                'altos': dados['altos'],
+                'utf8_invalidos': dados['utf8_invalidos'],
+                'terminada': s['fim'] < tamanho
+            })
+            pos = s['fim']
+
+        _somar(totais, varrer_trecho(m, pos, tamanho))
+
+        relatorio['terminadores'] = (contar(m, b'\n\\.\n', 0, tamanho)
+                                     + contar(m, b'\n\\.\r\n', 0, tamanho)
+                                     + (1 if m[tamanho - 3:] == b'\n\\.' else 0))
+
+    relatorio['linhas'] = totais['linhas']
+    return relatorio
+
+
+def encodings_compativeis(relatorio):
+    """Lista (encoding, ok, motivo) para os encodings que costumam aparecer nos dumps"""
+    totais = relatorio['totais']
+    altos = totais.get('altos', 0)
+    resultado = []
+
+    if altos == 0:
+        motivo = 'somente ASCII'
+        return [(enc, True, motivo) for enc in ('utf-8', 'latin1', 'cp1252')]
+
+    invalidos = totais['utf8_invalidos']
+    resultado.append(('utf-8', invalidos == 0,
+                      'sequencias validas' if invalidos == 0 else f'{invalidos:,} bytes invalidos'))
+    resultado.append(('latin1', True, 'todo byte e valido'))
+    indefinidos = totais['cp1252_indefinidos']
+    resultado.append(('cp1252', indefinidos == 0,
+                      'sem bytes indefinidos' if indefinidos == 0 else f'{indefinidos:,} bytes indefinidos'))
+    return resultado
@@ -6,14 +6,11 @@ Investiga por que há diferenças nos valores dos pedidos
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 def parse_linha(linha):
     return linha.split('\t')
@@ -92,15 +89,8 @@ for item in itens_pg:
 
 print(f"\nSoma dos itens PG: R$ {soma_itens_pg:,.2f}")
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Buscar pedido no Firebird
@@ -7,20 +7,11 @@ Investiga por que apenas alguns fornecedores aparecem no sistema
 import sys
 import codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
-
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
 
 # Códigos que aparecem na tela
 codigos_visiveis = [16, 22, 26, 32, 34, 44]
@@ -30,7 +21,7 @@ print("INVESTIGACAO: POR QUE SO ALGUNS FORNECEDORES APARECEM?")
 print("="*100)
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     print("\n>> Fornecedores que APARECEM no sistema:")
@@ -6,14 +6,11 @@ Investiga por que os itens dos pedidos não foram migrados
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("INVESTIGACAO: POR QUE ITENS NAO FORAM MIGRADOS?")
@@ -54,15 +51,8 @@ for i, item in enumerate(itens_exemplos, 1):
     preco = campos[6] if len(campos) > 6 else '?'
     print(f"{i}. Pedido:{idproduto} Produto:{idproduto} Qtd:{qtd} Preço:{preco}")
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Verificar produtos no Firebird
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitor em streaming das secoes COPY de dumps PostgreSQL (formato texto)
+
+Le o arquivo em blocos binarios e devolve (tabela, colunas, campos) para cada
+linha de dados dos blocos "COPY public.<tabela> (...) FROM stdin;", sem nunca
+carregar o dump inteiro em memoria. O encoding vem do SET client_encoding do
+proprio dump (lido uma vez); com bruto=True os campos saem em bytes, sem
+decodificar nada.
+
+Uso:
+    from leitor_dump import ler_copy, ler_tabela
+
+    for tabela, colunas, campos in ler_copy(arquivo, ['produtos', 'creditos']):
+        ...
+
+    for campos in ler_tabela(arquivo, 'pedidos'):
+        ...
+
+    # Varias tabelas, uma unica leitura do arquivo
+    distribuir_copy(arquivo, {
+        'cargos': lambda colunas, campos: cargos.append(campos),
+        'usuarios': lambda colunas, campos: usuarios.append(campos),
+    })
+"""
+
+import re
+
+# Tamanho dos blocos lidos do disco (1 MB)
+TAMANHO_BLOCO = 1024 * 1024
+
+RE_COPY = re.compile(rb'COPY public\.(\w+)\s+\((.*?)\)\s+FROM stdin;')
+RE_CLIENT_ENCODING = re.compile(rb"SET client_encoding = '([^']+)'")
+FIM_COPY = b'\\.'
+NULO = '\\N'
+NULO_BYTES = b'\\N'
+
+# Escapes do COPY em formato texto: \b \f \n \r \t \v, octal \NNN, hexa \xHH
+# e "\qualquer" = o proprio caractere (inclusive \\)
+RE_ESCAPE = re.compile(rb'\\(?:([0-7]{1,3})|x([0-9A-Fa-f]{1,2})|(.))', re.DOTALL)
+ESCAPES = {
+    b'b': b'\x08',
+    b'f': b'\x0c',
+    b'n': b'\n',
+    b'r': b'\r',
+    b't': b'\t',
+    b'v': b'\x0b',
+}
+
+# Trecho do inicio do dump onde o pg_dump grava os SETs
+TAMANHO_CABECALHO = 64 * 1024
+
+# Encoding usado quando o dump nao declara client_encoding
+ENCODING_PADRAO = 'latin1'
+
+# Encodings do PostgreSQL -> codecs do Python
+ENCODINGS_PG = {
+    'UTF8': 'utf-8',
+    'LATIN1': 'latin1',
+    'LATIN9': 'iso8859-15',
+    'WIN1252': 'cp1252',
+    'SQL_ASCII': 'latin1',
+}
+
+
+def dividir_linhas(blocos):
+    """Transforma uma sequencia de blocos de bytes em linhas (sem quebra de linha)"""
+    resto = b''
+    for bloco in blocos:
+        linhas = (resto + bloco).split(b'\n')
+        resto = linhas.pop()
+        for linha in linhas:
+            if linha.endswith(b'\r'):
+                linha = linha[:-1]
+            yield linha
+
+    if resto:
+        yield resto.rstrip(b'\r')
+
+
+def ler_blocos(arquivo, tamanho_bloco=TAMANHO_BLOCO, inicio=0, fim=None):
+    """Le o arquivo (ou o trecho inicio/fim em bytes) em blocos binarios"""
+    with open(arquivo, 'rb') as f:
+        if inicio:
+            f.seek(inicio)
+        restante = None if fim is None else fim - inicio
+        while True:
+            if restante is None:
+                bloco = f.read(tamanho_bloco)
+            else:
+                bloco = f.read(min(tamanho_bloco, restante))
+                restante -= len(bloco)
+            if not bloco:
+                break
+            yield bloco
+
+
+def iterar_linhas(arquivo, tamanho_bloco=TAMANHO_BLOCO, inicio=0, fim=None):
+    """
+    Devolve as linhas do arquivo (bytes, sem quebra de linha) lendo em blocos
+
+    inicio/fim limitam a leitura a um trecho em bytes (ver indice_dump).
+    """
+    return dividir_linhas(ler_blocos(arquivo, tamanho_bloco, inicio, fim))
+
+
+def parse_copy(linha, encoding='latin1'):
+    """Extrai (tabela, colunas) de uma linha COPY ou None se nao for COPY"""
+    if not linha.startswith(b'COPY '):
+        return None
+    match = RE_COPY.match(linha)
+    if not match:
+        return None
+    tabela = match.group(1).decode('ascii')
+    colunas = [c.strip().strip('"') for c in match.group(2).decode(encoding).split(',')]
+    return tabela, colunas
+
+
+def encoding_python(encoding_pg):
+    """Converte o nome de encoding do PostgreSQL para o codec do Python"""
+    nome = encoding_pg.strip().strip("'").upper()
+    return ENCODINGS_PG.get(nome, nome.lower())
+
+
+def detectar_encoding(arquivo, padrao=ENCODING_PADRAO):
+    """Codec Python do SET client_encoding do cabecalho do dump (ou o padrao)"""
+    with open(arquivo, 'rb') as f:
+        cabecalho = f.read(TAMANHO_CABECALHO)
+    match = RE_CLIENT_ENCODING.search(cabecalho)
+    if not match:
+        return padrao
+    return encoding_python(match.group(1).decode('ascii'))
+
+
+def _trocar_escape(match):
+    octal, hexa, caractere = match.groups()
+    if octal is not None:
+        return bytes((int(octal, 8) & 0xFF,))
+    if hexa is not None:
+        return bytes((int(hexa, 16),))
+    return ESCAPES.get(caractere, caractere)
+
+
+def decodificar_campo(campo, encoding='latin1'):
+    """Desfaz os escapes de um campo do COPY (bytes) e decodifica (None para \\N)"""
+    if campo == NULO_BYTES:
+        return None
+    if b'\\' in campo:
+        campo = RE_ESCAPE.sub(_trocar_escape, campo)
+    return campo.decode(encoding)
+
+
+def _desfazer_escapes(campo, encoding):
+    """Campo (str) com escapes do COPY -> texto original"""
+    # Escapes octais/hexa geram bytes; desfaz no nivel de bytes e decodifica de novo
+    return RE_ESCAPE.sub(_trocar_escape, campo.encode(encoding)).decode(encoding)
+
+
+def campos_linha(linha, encoding='latin1'):
+    """
+    Separa uma linha de dados do COPY em campos (None no lugar de \\N)
+
+    Os escapes sao desfeitos depois do split (um tab dentro do texto vem como
+    \\t e nao separa campos). Linha sem barra invertida nao tem escape nem
+    nulo: vai direto para decode + split, sem trabalho por campo. Linha cujas
+    barras sao todas de \\N (o caso comum) so troca os nulos.
+    """
+    campos = linha.decode(encoding).split('\t')
+    barras = linha.count(b'\\')
+    if not barras:
+        return campos
+
+    campos = [None if v == NULO else v for v in campos]
+    if campos.count(None) == barras:
+        return campos
+    return [v if v is None or '\\' not in v else _desfazer_escapes(v, encoding)
+            for v in campos]
+
+
+def campos_bytes(linha):
+    """
+    Separa uma linha de dados do COPY em campos sem decodificar
+
+    Mesmo tratamento de campos_linha (escapes e \\N -> None), mas os campos
+    continuam bytes: quem consome decide o que precisa virar texto.
+    """
+    campos = linha.split(b'\t')
+    barras = linha.count(b'\\')
+    if not barras:
+        return campos
+
+    campos = [None if v == NULO_BYTES else v for v in campos]
+    if campos.count(None) == barras:
+        return campos
+    return [v if v is None or b'\\' not in v else RE_ESCAPE.sub(_trocar_escape, v)
+            for v in campos]
+
+
+def chave_linha(linha, coluna=0):
+    """Inteiro da coluna de uma linha do COPY ainda em bytes (None se nao for numero)"""
+    try:
+        return int(linha.split(b'\t', coluna + 1)[coluna])
+    except (IndexError, ValueError):
+        return None
+
+
+def ler_copy(arquivo, tabelas=None, encoding=None, tamanho_bloco=TAMANHO_BLOCO, bruto=False, pular=None):
+    """
+    Percorre o dump uma unica vez devolvendo (tabela, colunas, campos)
+
+    - tabelas: nomes das tabelas desejadas (None = todas)
+    - encoding: None = o client_encoding declarado no dump (detectado uma vez)
+    - campos: lista de strings, com None no lugar de \\N
+    - bruto: True devolve os campos como bytes, sem decodificar (ver campos_bytes)
+    - pular: {tabela: funcao(linha em bytes) -> bool}; linhas em que a funcao
+      devolve True sao descartadas antes de separar/decodificar (retomada de
+      carga, ver chave_linha)
+
+    A lista de colunas e o mesmo objeto para todas as linhas de uma secao.
+    """
+    if tabelas is not None:
+        tabelas = set(tabelas)
+    if encoding is None:
+        encoding = detectar_encoding(arquivo)
+
+    tabela_atual = None
+    colunas_atuais = None
+
+    for linha in iterar_linhas(arquivo, tamanho_bloco):
+        if tabela_atual is None:
+            copy = parse_copy(linha, encoding)
+            if copy and (tabelas is None or copy[0] in tabelas):
+                tabela_atual, colunas_atuais = copy
+            continue
+
+        # Fim da secao de dados
+        if linha == FIM_COPY:
+            tabela_atual = None
+            colunas_atuais = None
+            continue
+
+        if not linha:
+            continue
+
+        if pular is not None and tabela_atual in pular and pular[tabela_atual](linha):
+            continue
+
+        if bruto:
+            yield tabela_atual, colunas_atuais, campos_bytes(linha)
+        else:
+            yield tabela_atual, colunas_atuais, campos_linha(linha, encoding)
+
+
+def ler_tabela(arquivo, tabela, encoding=None):
+    """Devolve apenas os campos das linhas de uma tabela"""
+    for _, _, campos in ler_copy(arquivo, [tabela], encoding):
+        yield campos
+
+
+def ler_registros(arquivo, tabela, encoding=None):
+    """Devolve as linhas de uma tabela como dicionarios {coluna: valor}"""
+    for _, colunas, campos in ler_copy(arquivo, [tabela], encoding):
+        yield dict(zip(colunas, campos))
+
+
+def distribuir_copy(arquivo, consumidores, encoding=None):
+    """
+    Le o dump uma unica vez e entrega cada linha ao consumidor da sua tabela
+
+    - consumidores: {tabela: funcao(colunas, campos)}
+    - retorna {tabela: quantidade de linhas entregues}
+
+    Extrair N tabelas custa uma leitura do arquivo, e nao N leituras.
+    """
+    contagem = {tabela: 0 for tabela in consumidores}
+
+    for tabela, colunas, campos in ler_copy(arquivo, consumidores, encoding):
+        consumidores[tabela](colunas, campos)
+        contagem[tabela] += 1
+
+    return contagem
@@ -2,53 +2,106 @@
 # -*- coding: utf-8 -*-
 """
 Script de migração PostgreSQL -> Firebird
+
+Uso:
+    python migracao-dados.py                              (todas as partes)
+    python migracao-dados.py produtos                     (so CAD_PRODUTOS)
+    python migracao-dados.py contas_pagar contas_receber  (partes independentes)
+    python migracao-dados.py contas_receber --em-massa    (indices/triggers desativados)
+
+As partes gravam tabelas diferentes e podem rodar em paralelo, cada uma em
+seu processo (ver executar-migracao.py).
 """
 
 import sys
 import codecs
-import re
 from datetime import datetime
 
+from carga_firebird import CarregadorLote, Quarentena
+from conexao_firebird import conectar
+from indices_firebird import CargaEmMassa
+from registros_dump import ler_tipados
+
 # Forçar UTF-8 no Windows
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    print("       Instale com: pip install fdb")
-    exit(1)
 
 print("=== MIGRACAO POSTGRESQL -> FIREBIRD ===\n")
 
-# Configuração Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
+# Linhas por lote nos INSERTs (executemany com comando preparado)
+TAMANHO_LOTE = 1000
+
+# Linhas recusadas pelo Firebird (tabela, linha do dump, erro), para reprocessar
+ARQUIVO_QUARENTENA = r'c:\Projeto\Academia\quarentena-dados.jsonl'
+
+# Tipos das colunas usadas de cada tabela (convertidas uma unica vez na leitura)
+TIPOS_PRODUTOS = {
+    'idproduto': 'int',
+    'descricao': ('texto', 200),
+    'ean': ('texto', 30),
+    'prevenda': 'centavos',
+    'unpro': 'texto',
+    'idncm': 'texto',
+    'ncm_id': 'texto',
+    'peso': 'float',
+    'marca_id': 'int',
+    'deleted': 'bool',
+}
+
+TIPOS_CONTA_PAGAR = {
+    'id': 'int',
+    'fornecedor_id': 'int',
+    'documento': ('texto', 30),
+    'data_vencimento': 'data',
+    'data_emissao': 'data',
+    'valor': 'centavos',
+    'pago': 'bool',
+    'observacao': ('texto', 5000),
+}
+
+TIPOS_DOCUMENTOS = {
+    'iddocumento': 'int',
+    'idcliente': 'int',
+    'vencimento': 'data',
+    'data': 'data',
+    'valor': 'centavos',
+    'valorpago': 'centavos',
+    'parcela': 'int',
+    'status': 'texto',
+}
+
+TIPOS_CREDITOS = {
+    'idcredito': 'int',
+    'idcliente': 'int',
+    'data': 'data',
+    'valor': 'centavos',
+    'saldo': 'centavos',
+    'obs': 'texto',
 }
 
-# Função para limpar timezone das datas
-def limpar_data(data_str):
-    """Remove timezone de strings de data do PostgreSQL"""
-    if not data_str or data_str == '\\N':
-        return None
-    # Remove timezone (ex: "2022-06-13 00:00:00-03" -> "2022-06-13 00:00:00")
-    data_limpa = re.sub(r'([0-9]{4}-[0-9]{2}-[0-9]{2}\s+[0-9]{2}:[0-9]{2}:[0-9]{2})[-+][0-9]{2}', r'\1', data_str)
-    # Remove apenas a data se tiver formato YYYY-MM-DD HH:MM:SS
-    # Firebird DATE aceita apenas YYYY-MM-DD
-    if ' ' in data_limpa:
-        return data_limpa.split(' ')[0]
-    return data_limpa
+# Parte da migracao -> tabelas do PostgreSQL que ela usa
+PARTES = {
+    'produtos': ['produtos'],
+    'contas_pagar': ['conta_pagar'],
+    'contas_receber': ['documentos', 'creditos'],
+}
+
+# Tabela do Firebird gravada por cada parte (carga em massa)
+TABELAS_FIREBIRD = {
+    'produtos': 'CAD_PRODUTOS',
+    'contas_pagar': 'FIN_CTAPAGAR',
+    'contas_receber': 'FIN_CTARECEBER',
+}
 
 # Função para ler e parsear o dump SQL
-def parsear_dump_sql(arquivo_dump):
+def parsear_dump_sql(arquivo_dump, partes=None, quarentena=None):
+    """
+    partes: lista de chaves de PARTES (None = todas)
+    quarentena: recebe as linhas do dump com numero de campos errado
+    """
     print("Lendo dump SQL...")
 
-    with open(arquivo_dump, 'r', encoding='latin1') as f:
-        conteudo = f.read()
-
     dados = {
         'produtos': [],
         'contas_pagar': [],
@@ -56,276 +109,182 @@ def parsear_dump_sql(arquivo_dump):
         'creditos': []
     }
 
-    # Processar linha por linha
-    linhas = conteudo.split('\n')
-    tabela_atual = None
-    colunas_atuais = []
-    lendo_dados = False
-    linha_num = 0
-
-    for linha in linhas:
-        linha_num += 1
-
-        # Detectar início de COPY
-        match_copy = re.match(r'COPY public\.(\w+)\s+\((.*?)\)\s+FROM stdin;', linha)
-        if match_copy:
-            tabela_atual = match_copy.group(1)
-            colunas_atuais = [c.strip() for c in match_copy.group(2).split(',')]
-            lendo_dados = True
-            print(f"Encontrado: {tabela_atual} com {len(colunas_atuais)} colunas (linha {linha_num})")
-            continue
-
-        # Detectar fim de dados - apenas backslash seguido de ponto
-        if linha == '\\.' or linha.strip() == '\\.':
-            if lendo_dados and tabela_atual:
-                if tabela_atual == 'produtos':
-                    print(f"  -> {tabela_atual}: {len(dados['produtos'])} registros lidos")
-                elif tabela_atual == 'conta_pagar':
-                    print(f"  -> {tabela_atual}: {len(dados['contas_pagar'])} registros lidos")
-                elif tabela_atual == 'creditos':
-                    print(f"  -> {tabela_atual}: {len(dados['creditos'])} registros lidos")
-                elif tabela_atual == 'documentos':
-                    print(f"  -> {tabela_atual}: {len(dados['contas_receber'])} registros lidos")
-            lendo_dados = False
-            tabela_atual = None
-            colunas_atuais = []
-            continue
-
-        # Ler dados
-        if lendo_dados and tabela_atual and linha:
-            valores = linha.split('\t')
-
-            if tabela_atual == 'produtos':
-                produto = {}
-                for idx, col in enumerate(colunas_atuais):
-                    produto[col] = None if valores[idx] == '\\N' else valores[idx]
-                dados['produtos'].append(produto)
-
-            elif tabela_atual == 'conta_pagar':
-                conta = {}
-                for idx, col in enumerate(colunas_atuais):
-                    conta[col] = None if valores[idx] == '\\N' else valores[idx]
-                dados['contas_pagar'].append(conta)
-
-            elif tabela_atual == 'creditos':
-                credito = {}
-                for idx, col in enumerate(colunas_atuais):
-                    credito[col] = None if valores[idx] == '\\N' else valores[idx]
-                dados['creditos'].append(credito)
-
-            elif tabela_atual == 'documentos':
-                documento = {}
-                for idx, col in enumerate(colunas_atuais):
-                    documento[col] = None if valores[idx] == '\\N' else valores[idx]
-                dados['contas_receber'].append(documento)
+    # Tabela do PostgreSQL -> chave em dados
+    destinos = {
+        'produtos': 'produtos',
+        'conta_pagar': 'contas_pagar',
+        'creditos': 'creditos',
+        'documentos': 'contas_receber'
+    }
+    tipos = {
+        'produtos': TIPOS_PRODUTOS,
+        'conta_pagar': TIPOS_CONTA_PAGAR,
+        'creditos': TIPOS_CREDITOS,
+        'documentos': TIPOS_DOCUMENTOS
+    }
+    if partes:
+        usadas = {tabela for parte in partes for tabela in PARTES[parte]}
+        destinos = {t: d for t, d in destinos.items() if t in usadas}
+        tipos = {t: tp for t, tp in tipos.items() if t in usadas}
+
+    # Leitura em streaming, uma tupla tipada por linha (sem dict de strings)
+    for tabela, registro in ler_tipados(arquivo_dump, tipos, quarentena=quarentena):
+        dados[destinos[tabela]].append(registro)
+
+    for tabela, chave in destinos.items():
+        print(f"  -> {tabela}: {len(dados[chave])} registros lidos")
 
     return dados
 
 # Função para migrar produtos
-def migrar_produtos(con, produtos):
+def migrar_produtos(con, produtos, quarentena=None):
     print(f"\nIniciando migracao de {len(produtos)} produtos...")
-    cur = con.cursor()
-    sucesso = 0
-    erros = 0
+    carga = CarregadorLote(con, 'CAD_PRODUTOS', [
+        'CODIGO', 'EMPRESA', 'NOME', 'CODIGO_BARRA',
+        'PRC_VENDA', 'PRC_CUSTO', 'ESTOQUESALDO', 'ATIVO',
+        'DATA', 'UNIDADE', 'CONTROLAESTOQUE', 'TABELA_NCM',
+        'PESO', 'MARCA_ID'
+    ], TAMANHO_LOTE, nome='produtos', quarentena=quarentena)
+    data_atual = datetime.now().strftime('%Y-%m-%d')
 
     for produto in produtos:
-        try:
-            # Tabela: CAD_PRODUTOS no Firebird
-            ativo = 'S' if produto.get('deleted') in [None, 'f', 'false'] else 'N'
-            preco_venda = int(float(produto.get('prevenda') or 0) * 100)  # Centavos
-            data_atual = datetime.now().strftime('%Y-%m-%d')
-
-            # Unidade do produto
-            unidade = (produto.get('unpro') or 'UN')[:3].upper()
-
-            # NCM do produto
-            ncm_valor = produto.get('idncm') or produto.get('ncm_id')
-            if ncm_valor and ncm_valor != '\\N' and str(ncm_valor).strip():
-                ncm = str(ncm_valor).replace('.', '').replace(' ', '')[:10]
-            else:
-                ncm = None
-
-            # Outros campos importantes
-            peso = float(produto.get('peso') or 0)
-            marca_id = produto.get('marca_id')
-            if marca_id and marca_id != '\\N':
-                try:
-                    marca_id = int(marca_id)
-                except:
-                    marca_id = None
-            else:
-                marca_id = None
-
-            cur.execute("""
-                INSERT INTO CAD_PRODUTOS (
-                    CODIGO, EMPRESA, NOME, CODIGO_BARRA,
-                    PRC_VENDA, PRC_CUSTO, ESTOQUESALDO, ATIVO,
-                    DATA, UNIDADE, CONTROLAESTOQUE, TABELA_NCM,
-                    PESO, MARCA_ID
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
-                int(produto['idproduto']),
-                1,  # EMPRESA
-                (produto.get('descricao') or '')[:200],
-                (produto.get('ean') or '')[:30],
-                preco_venda,
-                0,  # PRC_CUSTO
-                0,  # ESTOQUESALDO
-                ativo,
-                data_atual,
-                unidade,
-                'S',
-                ncm,
-                peso,
-                marca_id
-            ])
-
-            sucesso += 1
-            if sucesso % 100 == 0:
-                print(f"{sucesso} produtos migrados...")
-
-        except Exception as erro:
-            erros += 1
-            print(f"Erro ao migrar produto {produto.get('idproduto')}: {erro}")
-
+        # Tabela: CAD_PRODUTOS no Firebird
+        ativo = 'N' if produto.deleted else 'S'
+
+        # NCM do produto
+        ncm_valor = produto.idncm or produto.ncm_id
+        if ncm_valor and ncm_valor.strip():
+            ncm = ncm_valor.replace('.', '').replace(' ', '')[:10]
+        else:
+            ncm = None
+
+        carga.adicionar([
+            produto.idproduto,
+            1,  # EMPRESA
+            produto.descricao or '',
+            produto.ean or '',
+            produto.prevenda or 0,  # Centavos
+            0,  # PRC_CUSTO
+            0,  # ESTOQUESALDO
+            ativo,
+            data_atual,
+            (produto.unpro or 'UN')[:3].upper(),
+            'S',
+            ncm,
+            produto.peso or 0.0,
+            produto.marca_id
+        ], origem=produto.idproduto, fonte=produto)
+
+    carga.finalizar()
     con.commit()
-    print(f"Produtos: {sucesso} migrados com sucesso, {erros} erros")
 
 # Função para migrar contas a pagar
-def migrar_contas_pagar(con, contas):
+def migrar_contas_pagar(con, contas, quarentena=None):
     print(f"\nIniciando migracao de {len(contas)} contas a pagar...")
-    cur = con.cursor()
-    sucesso = 0
-    erros = 0
+    carga = CarregadorLote(con, 'FIN_CTAPAGAR', [
+        'EMPRESA', 'FORNECEDOR', 'DOCUMENTO', 'VENCIMENTO',
+        'VALOR', 'QUITADO', 'DATA_EMISSAO', 'DATA',
+        'HISTORICO', 'VALOR_SALDO', 'SITUACAO'
+    ], TAMANHO_LOTE, nome='contas a pagar', quarentena=quarentena)
+    data_atual = datetime.now().strftime('%Y-%m-%d')
 
     for conta in contas:
-        try:
-            quitado = 'S' if conta.get('pago') in ['t', 'true', True] else 'N'
-            valor = int(float(conta.get('valor') or 0) * 100)
-            data_atual = datetime.now().strftime('%Y-%m-%d')
-
-            cur.execute("""
-                INSERT INTO FIN_CTAPAGAR (
-                    EMPRESA, FORNECEDOR, DOCUMENTO, VENCIMENTO,
-                    VALOR, QUITADO, DATA_EMISSAO, DATA,
-                    HISTORICO, VALOR_SALDO, SITUACAO
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
-                1,  # EMPRESA
-                int(conta.get('fornecedor_id') or 0),
-                (conta.get('documento') or '')[:30],
-                limpar_data(conta.get('data_vencimento')),
-                valor,
-                quitado,
-                limpar_data(conta.get('data_emissao')) or data_atual,
-                data_atual,
-                (conta.get('observacao') or '')[:5000],
-                0 if quitado == 'S' else valor,
-                'QUITADA' if quitado == 'S' else 'ABERTA'
-            ])
-
-            sucesso += 1
-            if sucesso % 50 == 0:
-                print(f"{sucesso} contas a pagar migradas...")
-
-        except Exception as erro:
-            erros += 1
-            print(f"Erro ao migrar conta {conta.get('id')}: {erro}")
-
+        quitado = 'S' if conta.pago else 'N'
+        valor = conta.valor or 0
+
+        carga.adicionar([
+            1,  # EMPRESA
+            conta.fornecedor_id or 0,
+            conta.documento or '',
+            conta.data_vencimento,
+            valor,
+            quitado,
+            conta.data_emissao or data_atual,
+            data_atual,
+            conta.observacao or '',
+            0 if quitado == 'S' else valor,
+            'QUITADA' if quitado == 'S' else 'ABERTA'
+        ], origem=conta.id, fonte=conta)
+
+    carga.finalizar()
     con.commit()
-    print(f"Contas a pagar: {sucesso} migradas com sucesso, {erros} erros")
 
 # Função para migrar contas a receber
-def migrar_contas_receber(con, documentos, creditos):
+def migrar_contas_receber(con, documentos, creditos, quarentena=None):
     print(f"\nIniciando migracao de {len(documentos)} contas a receber...")
-    cur = con.cursor()
-    sucesso = 0
-    erros = 0
+    carga = CarregadorLote(con, 'FIN_CTARECEBER', [
+        'EMPRESA', 'CLIENTE', 'VENCIMENTO', 'VALOR',
+        'VALOR_PAGO', 'VALOR_SALDO', 'PARCELA', 'QUITADO',
+        'DATA', 'DATA_EMISSAO', 'SITUACAO'
+    ], TAMANHO_LOTE, nome='contas a receber', quarentena=quarentena)
+    data_atual = datetime.now().strftime('%Y-%m-%d')
 
     for doc in documentos:
-        try:
-            quitado = 'S' if doc.get('status') == 'B' else 'N'
-            valor = int(float(doc.get('valor') or 0) * 100)
-            valor_pago = int(float(doc.get('valorpago') or 0) * 100)
-            data_atual = datetime.now().strftime('%Y-%m-%d')
-
-            cur.execute("""
-                INSERT INTO FIN_CTARECEBER (
-                    EMPRESA, CLIENTE, VENCIMENTO, VALOR,
-                    VALOR_PAGO, VALOR_SALDO, PARCELA, QUITADO,
-                    DATA, DATA_EMISSAO, SITUACAO
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
-                1,  # EMPRESA
-                int(doc.get('idcliente') or 0) + 100000,  # Offset para clientes
-                limpar_data(doc.get('vencimento')),
-                valor,
-                valor_pago,
-                0 if quitado == 'S' else (valor - valor_pago),
-                int(doc.get('parcela') or 1),
-                quitado,
-                data_atual,
-                limpar_data(doc.get('data')) or data_atual,
-                'QUITADA' if quitado == 'S' else 'ABERTA'
-            ])
-
-            sucesso += 1
-            if sucesso % 50 == 0:
-                print(f"{sucesso} contas a receber migradas...")
-
-        except Exception as erro:
-            erros += 1
-            print(f"Erro ao migrar documento {doc.get('iddocumento')}: {erro}")
-
+        quitado = 'S' if doc.status == 'B' else 'N'
+        valor = doc.valor or 0
+        valor_pago = doc.valorpago or 0
+
+        carga.adicionar([
+            1,  # EMPRESA
+            (doc.idcliente or 0) + 100000,  # Offset para clientes
+            doc.vencimento,
+            valor,
+            valor_pago,
+            0 if quitado == 'S' else (valor - valor_pago),
+            doc.parcela or 1,
+            quitado,
+            data_atual,
+            doc.data or data_atual,
+            'QUITADA' if quitado == 'S' else 'ABERTA'
+        ], origem=doc.iddocumento, fonte=doc)
+
+    carga.finalizar()
     con.commit()
-    print(f"Contas a receber: {sucesso} migradas com sucesso, {erros} erros")
 
     # Migrar créditos
     if creditos:
         print(f"\nIniciando migracao de {len(creditos)} creditos...")
         print("Obs: Creditos serao migrados como contas a receber com historico especial")
-        sucesso = 0
-        erros = 0
+        carga = CarregadorLote(con, 'FIN_CTARECEBER', [
+            'EMPRESA', 'CLIENTE', 'DATA', 'VENCIMENTO', 'VALOR',
+            'VALOR_SALDO', 'QUITADO', 'HISTORICO', 'SITUACAO'
+        ], TAMANHO_LOTE, nome='creditos', quarentena=quarentena)
 
         for credito in creditos:
-            try:
-                valor = int(float(credito.get('valor') or 0) * 100)
-                saldo = int(float(credito.get('saldo') or 0) * 100)
-                data_atual = datetime.now().strftime('%Y-%m-%d')
-
-                cur.execute("""
-                    INSERT INTO FIN_CTARECEBER (
-                        EMPRESA, CLIENTE, DATA, VENCIMENTO, VALOR,
-                        VALOR_SALDO, QUITADO, HISTORICO, SITUACAO
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, [
-                    1,
-                    int(credito.get('idcliente') or 0) + 100000,  # Offset para clientes
-                    limpar_data(credito.get('data')) or data_atual,
-                    limpar_data(credito.get('data')) or data_atual,
-                    -valor,  # Negativo = crédito
-                    -saldo,
-                    'S' if saldo == 0 else 'N',
-                    f"CREDITO: {credito.get('obs') or 'Migrado do sistema anterior'}"[:5000],
-                    'QUITADA' if saldo == 0 else 'ABERTA'
-                ])
-
-                sucesso += 1
-
-            except Exception as erro:
-                erros += 1
-                print(f"Erro ao migrar credito {credito.get('idcredito')}: {erro}")
-
+            valor = credito.valor or 0
+            saldo = credito.saldo or 0
+
+            carga.adicionar([
+                1,
+                (credito.idcliente or 0) + 100000,  # Offset para clientes
+                credito.data or data_atual,
+                credito.data or data_atual,
+                -valor,  # Negativo = crédito
+                -saldo,
+                'S' if saldo == 0 else 'N',
+                f"CREDITO: {credito.obs or 'Migrado do sistema anterior'}"[:5000],
+                'QUITADA' if saldo == 0 else 'ABERTA'
+            ], origem=credito.idcredito, fonte=credito)
+
+        carga.finalizar()
         con.commit()
-        print(f"Creditos: {sucesso} migrados com sucesso, {erros} erros")
 
 # Função principal
-def executar_migracao():
+def executar_migracao(partes=None, em_massa=False):
     try:
         # Ler dados do dump SQL extraído
         arquivo_dump = r'c:\Projeto\Academia\dados-extraidos.sql'
+
+        # Linhas recusadas (pelo Firebird ou ja na leitura do dump) vao para a
+        # quarentena, com a linha do dump
+        # (um arquivo por parte: as partes podem rodar ao mesmo tempo)
+        arquivo_quarentena = ARQUIVO_QUARENTENA
+        if partes:
+            arquivo_quarentena = arquivo_quarentena.replace('.jsonl', '-' + '-'.join(partes) + '.jsonl')
+        quarentena = Quarentena(arquivo_quarentena)
+
         print("Parseando dump SQL...")
-        dados = parsear_dump_sql(arquivo_dump)
+        dados = parsear_dump_sql(arquivo_dump, partes, quarentena)
 
         print(f"\nDados encontrados no dump:")
         print(f"- Produtos: {len(dados['produtos'])}")
@@ -335,25 +294,29 @@ def executar_migracao():
 
         if not any([dados['produtos'], dados['contas_pagar'], dados['contas_receber'], dados['creditos']]):
             print("\nNenhum dado encontrado no dump. Verifique o arquivo.")
+            quarentena.fechar()
             return
 
         # Conectar ao Firebird
         print("\nConectando ao Firebird...")
-        con = fdb.connect(**fbConfig)
+        con = conectar(charset='WIN1252')
         print("[OK] Conectado ao Firebird com sucesso!")
 
         # Executar migrações
-        if dados['produtos']:
-            migrar_produtos(con, dados['produtos'])
+        tabelas = [TABELAS_FIREBIRD[parte] for parte in (partes or PARTES)]
+        with CargaEmMassa(con, tabelas, ativo=em_massa):
+            if dados['produtos']:
+                migrar_produtos(con, dados['produtos'], quarentena)
 
-        if dados['contas_pagar']:
-            migrar_contas_pagar(con, dados['contas_pagar'])
+            if dados['contas_pagar']:
+                migrar_contas_pagar(con, dados['contas_pagar'], quarentena)
 
-        if dados['contas_receber'] or dados['creditos']:
-            migrar_contas_receber(con, dados['contas_receber'], dados['creditos'])
+            if dados['contas_receber'] or dados['creditos']:
+                migrar_contas_receber(con, dados['contas_receber'], dados['creditos'], quarentena)
 
         # Fechar conexão
         con.close()
+        quarentena.fechar()
         print("\n=== MIGRACAO CONCLUIDA ===")
 
     except Exception as erro:
@@ -364,4 +327,9 @@ def executar_migracao():
 
 # Executar
 if __name__ == '__main__':
-    executar_migracao()
+    partes = [a for a in sys.argv[1:] if not a.startswith('--')]
+    desconhecidas = [p for p in partes if p not in PARTES]
+    if desconhecidas:
+        print(f"[ERRO] Parte desconhecida: {', '.join(desconhecidas)} (use: {', '.join(PARTES)})")
+        exit(1)
+    executar_migracao(partes or None, em_massa='--em-massa' in sys.argv[1:])
@@ -10,14 +10,14 @@ import re
 import json
 from datetime import datetime
 
+from chaves_firebird import carregar_chaves
+from conexao_firebird import conectar
+from dinheiro import centavos, multiplicar
+from leitor_dump import distribuir_copy, ler_tabela
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 def limpar_data(data_str):
     """Remove timezone e hora das datas"""
@@ -28,46 +28,28 @@ def limpar_data(data_str):
         return match.group(1)
     return None
 
-def parse_linha(linha):
-    """Converte linha do PostgreSQL em dicionário"""
-    campos = linha.split('\t')
-    return campos
-
 print("="*100)
 print("MIGRACAO DE FUNCIONARIOS, USUARIOS E VENDAS")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # ==================== PASSO 1: MIGRAR CARGOS ====================
     print("\n>> PASSO 1: MIGRANDO CARGOS")
     print("-"*100)
 
-    with open(r'c:\Projeto\Academia\funcionarios-usuarios.sql', 'r', encoding='latin1') as f:
-        conteudo = f.read()
-
-    linhas = conteudo.split('\n')
-    lendo_cargos = False
+    # Uma unica leitura do arquivo para cargos, funcionarios e usuarios
     cargos = []
+    funcionarios = []
+    usuarios = []
 
-    for linha in linhas:
-        if 'COPY public.cargos' in linha:
-            lendo_cargos = True
-            continue
-        if linha.strip() == '\\.':
-            lendo_cargos = False
-            if cargos:
-                break
-        if lendo_cargos and linha.strip():
-            cargos.append(parse_linha(linha.strip()))
+    distribuir_copy(r'c:\Projeto\Academia\funcionarios-usuarios.sql', {
+        'cargos': lambda colunas, campos: cargos.append(campos),
+        'funcionarios': lambda colunas, campos: funcionarios.append(campos),
+        'usuarios': lambda colunas, campos: usuarios.append(campos),
+    })
 
     print(f"Encontrados {len(cargos)} cargos no PostgreSQL")
 
@@ -82,13 +64,13 @@ try:
             try:
                 idcargo = int(cargo_data[0])
                 descricao = (cargo_data[1] or 'SEM DESCRICAO')[:100]
-                salario = float(cargo_data[2]) if cargo_data[2] != '\\N' else 0
+                salario = cargo_data[2] or 0
 
                 cur.execute("""
                     INSERT INTO USUARIO_CARGO (
                         CODIGO, CARGO, BASE_SALARIAL, TETO_SALARIAL, ATIVO, DATA_CADASTRO
                     ) VALUES (?, ?, ?, ?, ?, ?)
-                """, [idcargo, descricao, int(salario * 100), int(salario * 150), 'S',
+                """, [idcargo, descricao, centavos(salario), multiplicar(salario, '1.5'), 'S',
                       datetime.now().strftime('%Y-%m-%d')])
             except Exception as e:
                 print(f"  Erro ao inserir cargo {cargo_data[0]}: {e}")
@@ -100,20 +82,6 @@ try:
     print("\n>> PASSO 2: MIGRANDO FUNCIONARIOS")
     print("-"*100)
 
-    lendo_funcionarios = False
-    funcionarios = []
-
-    for linha in linhas:
-        if 'COPY public.funcionarios' in linha:
-            lendo_funcionarios = True
-            continue
-        if linha.strip() == '\\.':
-            lendo_funcionarios = False
-            if funcionarios:
-                break
-        if lendo_funcionarios and linha.strip():
-            funcionarios.append(parse_linha(linha.strip()))
-
     print(f"Encontrados {len(funcionarios)} funcionários no PostgreSQL")
 
     # Verificar se já existem funcionários
@@ -124,13 +92,16 @@ try:
     funcionarios_inseridos = 0
     funcionarios_erros = 0
 
+    # Codigos de pessoa ja usados, lidos uma vez (evita ate dois SELECTs por funcionario)
+    pessoas_existentes = carregar_chaves(con, 'CAD_PESSOA')
+
     print("\nInserindo funcionários...")
     for func_data in funcionarios:
         try:
             idfuncionario = int(func_data[0])
             nome = (func_data[1] or func_data[2] or 'SEM NOME')[:200]
             nome_completo = (func_data[2] or func_data[1] or 'SEM NOME')[:200]
-            idcargo = int(func_data[3]) if func_data[3] != '\\N' else None
+            idcargo = int(func_data[3]) if func_data[3] is not None else None
             email = (func_data[4] or '')[:100]
             nascimento = limpar_data(func_data[5])
             sexo = (func_data[6] or 'M')[:1].upper()
@@ -149,12 +120,10 @@ try:
             natureza = 'F'
 
             # Verificar se já existe
-            cur.execute("SELECT CODIGO FROM CAD_PESSOA WHERE CODIGO = ?", [idfuncionario])
-            if cur.fetchone():
+            if idfuncionario in pessoas_existentes:
                 # Já existe com este código, usar código alto
                 idfuncionario = idfuncionario + 500000
-                cur.execute("SELECT CODIGO FROM CAD_PESSOA WHERE CODIGO = ?", [idfuncionario])
-                if cur.fetchone():
+                if idfuncionario in pessoas_existentes:
                     continue  # Pular se já existe
 
             cur.execute("""
@@ -168,6 +137,7 @@ try:
                 cpf[:20], email, endereco, numero, bairro, cidade, uf, cep,
                 ativo, dataadm or datetime.now().strftime('%Y-%m-%d'), nascimento, sexo, rg
             ])
+            pessoas_existentes.add(idfuncionario)
             funcionarios_inseridos += 1
 
         except Exception as e:
@@ -183,20 +153,6 @@ try:
     print("\n>> PASSO 3: MIGRANDO USUARIOS")
     print("-"*100)
 
-    lendo_usuarios = False
-    usuarios = []
-
-    for linha in linhas:
-        if 'COPY public.usuarios' in linha:
-            lendo_usuarios = True
-            continue
-        if linha.strip() == '\\.':
-            lendo_usuarios = False
-            if usuarios:
-                break
-        if lendo_usuarios and linha.strip():
-            usuarios.append(parse_linha(linha.strip()))
-
     print(f"Encontrados {len(usuarios)} usuários no PostgreSQL")
 
     # Verificar usuários existentes
@@ -207,12 +163,14 @@ try:
     usuarios_inseridos = 0
     usuarios_erros = 0
 
+    usuarios_existentes = carregar_chaves(con, 'USUARIO')
+
     print("\nInserindo usuários...")
     for user_data in usuarios:
         try:
             idusuario = int(user_data[0])
             senha = (user_data[1] or '123456')[:50]
-            idfuncionario = int(user_data[2]) if user_data[2] != '\\N' else None
+            idfuncionario = int(user_data[2]) if user_data[2] is not None else None
             admin = 'S' if user_data[3] == 't' else 'N'
 
             # Buscar nome do funcionário
@@ -228,8 +186,7 @@ try:
                     nome = (row[0] or row[1] or nome)[:100]
 
             # Verificar se já existe
-            cur.execute("SELECT CODIGO FROM USUARIO WHERE CODIGO = ?", [idusuario])
-            if cur.fetchone():
+            if idusuario in usuarios_existentes:
                 continue  # Já existe
 
             cur.execute("""
@@ -241,6 +198,7 @@ try:
                 idusuario, f'user{idusuario}', senha, nome, nome[:20],
                 admin, admin, admin, admin
             ])
+            usuarios_existentes.add(idusuario)
             usuarios_inseridos += 1
 
         except Exception as e:
@@ -258,25 +216,7 @@ try:
 
     # Ler arquivo de vendas
     try:
-        with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-            conteudo_vendas = f.read()
-
-        linhas_vendas = conteudo_vendas.split('\n')
-
-        # Migrar PEDIDOS
-        lendo_pedidos = False
-        pedidos = []
-
-        for linha in linhas_vendas:
-            if 'COPY public.pedidos' in linha:
-                lendo_pedidos = True
-                continue
-            if linha.strip() == '\\.':
-                lendo_pedidos = False
-                if pedidos:
-                    break
-            if lendo_pedidos and linha.strip():
-                pedidos.append(parse_linha(linha.strip()))
+        pedidos = list(ler_tabela(r'c:\Projeto\Academia\vendas-extraidas.sql', 'pedidos'))
 
         print(f"Encontrados {len(pedidos)} pedidos no PostgreSQL")
 
@@ -319,3 +259,4 @@ except Exception as e:
     print(f"\n[ERRO] {e}")
     import traceback
     traceback.print_exc()
+    exit(1)
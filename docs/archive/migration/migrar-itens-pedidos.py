@@ -2,24 +2,33 @@
 # -*- coding: utf-8 -*-
 """
 Migra apenas os itens dos pedidos já migrados
+
+A cada commit o ultimo idpedido gravado vai para MIGRACAO_CHECKPOINT (na
+mesma transacao). Se a carga parar no meio, a proxima execucao nao apaga os
+itens ja gravados e pula esses pedidos ainda na leitura do dump.
+
+Uso:
+    python migrar-itens-pedidos.py               (retoma do checkpoint, se houver)
+    python migrar-itens-pedidos.py --reiniciar   (apaga os itens e recomeca)
+    python migrar-itens-pedidos.py --em-massa    (indices/triggers desativados, ver indices_firebird)
 """
 
 import sys, codecs, re
 
+from carga_firebird import Quarentena, criar_carregador
+from checkpoint_firebird import Checkpoint
+from conexao_firebird import conectar
+from dinheiro import centavos_seguro, decimal_seguro, multiplicar
+from indices_firebird import CargaEmMassa
+from totais_firebird import RegistroAlteracoes
+from leitor_dump import chave_linha, ler_copy
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
-
-def parse_linha(linha):
-    return linha.split('\t')
 
 def safe_float(valor_str):
-    """Converte string para float tratando erros"""
+    """Converte string para float tratando erros (quantidades; dinheiro usa centavos_seguro)"""
     if not valor_str or valor_str == '\\N' or valor_str == '':
         return 0.0
     try:
@@ -44,52 +53,65 @@ print("="*100)
 print("MIGRACAO DE ITENS DOS PEDIDOS")
 print("="*100)
 
-# Ler itens do PostgreSQL
-with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-    conteudo = f.read()
-
-linhas = conteudo.split('\n')
-
-lendo_itens = False
-pedidos_itens = []
+ARQUIVO_VENDAS = r'c:\Projeto\Academia\vendas-extraidas.sql'
 
-for linha in linhas:
-    if 'COPY public.pedidos_itens' in linha:
-        lendo_itens = True
-        print(f"Estrutura: {linha}")
-        continue
-    if linha.strip() == '\\.':
-        lendo_itens = False
-        if pedidos_itens:
-            break
-    if lendo_itens and linha.strip():
-        pedidos_itens.append(parse_linha(linha.strip()))
+# Modo de gravacao: 'bloco' = varias linhas por EXECUTE BLOCK (menos idas ao
+# servidor, melhor em conexao remota); 'lote' = executemany com comando preparado
+MODO_CARGA = 'bloco'
 
-print(f"\nTotal de itens encontrados: {len(pedidos_itens):,}")
+# Itens recusados (conversao ou Firebird), com a linha do dump
+ARQUIVO_QUARENTENA = r'c:\Projeto\Academia\quarentena-itens.jsonl'
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
+massa = None
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
+    # Checkpoint de uma execucao anterior (mesmo dump)
+    checkpoint = Checkpoint(con, 'itens', ARQUIVO_VENDAS, 'PEDIDOS_ITENS')
+    if '--reiniciar' in sys.argv[1:]:
+        checkpoint.reiniciar()
+    print(f"Checkpoint: {checkpoint.descricao()}")
+    if checkpoint.concluida:
+        print("Nada a fazer (use --reiniciar para migrar de novo)")
+        con.close()
+        exit(0)
+
+    # Ler itens do PostgreSQL (em streaming), pulando os pedidos ja gravados
+    pedidos_itens = []
+    colunas_itens = None
+    pular = None
+    # Pedidos com itens gravados/apagados, para o recalculo incremental dos totais
+    alteracoes = RegistroAlteracoes(con, 'PEDIDOS')
+
+    if checkpoint.retomando():
+        # Campo 1: idpedido
+        pular = {'pedidos_itens': lambda linha: checkpoint.feito(chave_linha(linha, 1))}
+
+    for _, colunas, campos in ler_copy(ARQUIVO_VENDAS, ['pedidos_itens'], pular=pular):
+        if colunas_itens is None:
+            colunas_itens = colunas
+            print(f"Estrutura: {', '.join(colunas)}")
+        pedidos_itens.append(campos)
+
+    print(f"\nTotal de itens encontrados: {len(pedidos_itens):,}")
+
     # Verificar itens existentes
     cur.execute("SELECT COUNT(*) FROM PEDIDOS_ITENS")
     total_existente = cur.fetchone()[0]
     print(f"Itens já existentes no Firebird: {total_existente:,}")
 
-    # Limpar itens existentes para reimportar
-    print("\nLimpando itens existentes...")
-    cur.execute("DELETE FROM PEDIDOS_ITENS")
-    con.commit()
-    print("Itens existentes removidos!")
+    if checkpoint.retomando():
+        print("\nRetomando: itens ja gravados pelo checkpoint sao mantidos")
+    else:
+        # Limpar itens existentes para reimportar
+        print("\nLimpando itens existentes...")
+        alteracoes.marcar_consulta("SELECT CODIGO FROM PEDIDOS_ITENS")
+        cur.execute("DELETE FROM PEDIDOS_ITENS")
+        con.commit()
+        print("Itens existentes removidos!")
 
-    itens_inseridos = 0
     itens_ignorados = 0
     itens_erros = 0
 
@@ -118,11 +140,28 @@ try:
     produtos_firebird = set(row[0] for row in cur.fetchall())
     print(f"Produtos no Firebird: {len(produtos_firebird):,}")
 
+    massa = CargaEmMassa(con, ['PEDIDOS_ITENS'], ativo='--em-massa' in sys.argv[1:])
+    massa.iniciar()
+
     # Migrar itens
     print("\n>> MIGRANDO ITENS...")
     pedidos_processados = 0
+    quarentena = Quarentena(ARQUIVO_QUARENTENA)
+    carga_itens = criar_carregador(con, 'PEDIDOS_ITENS', [
+        'CODIGO', 'IDPRODUTO', 'QTDE', 'VLR_UNIT', 'VLR_TOTAL'
+    ], modo=MODO_CARGA, nome='itens', quarentena=quarentena)
+
+    # Em ordem de idpedido: o checkpoint guarda o ultimo pedido commitado
+    chave_inicial = None
+    pedidos_alterados = []
+    for idpedido in sorted(itens_por_pedido):
+        itens = itens_por_pedido[idpedido]
+        if checkpoint.feito(idpedido):
+            continue
+        if chave_inicial is None:
+            chave_inicial = idpedido
+        ultima_chave = idpedido
 
-    for idpedido, itens in itens_por_pedido.items():
         if idpedido not in pedidos_firebird:
             itens_ignorados += len(itens)
             continue
@@ -133,8 +172,7 @@ try:
                 # PostgreSQL: Campo 0=idpedidoitem, 1=idpedido, 2=idproduto, 3=referencia, 4=qtdrec, 5=qtdemb, 6=preco
                 idproduto = safe_int(item_data[2])  # Campo 2: idproduto
                 quantidade = safe_float(item_data[4])  # Campo 4: qtdrec (quantidade)
-                vlunitario = safe_float(item_data[6])  # Campo 6: preco
-                vltotal = quantidade * vlunitario
+                preco = item_data[6]  # Campo 6: preco
 
                 if not idproduto or quantidade == 0:
                     itens_ignorados += 1
@@ -145,35 +183,46 @@ try:
                     itens_ignorados += 1
                     continue
 
-                # Converter valores para centavos
-                vlr_unit_int = int(vlunitario * 100)
-                vlr_total_int = int(vltotal * 100)
+                # Valores em centavos exatos; o total sai do preco sem arredondar
+                vlr_unit_int = centavos_seguro(preco)
+                vlr_total_int = multiplicar(quantidade, decimal_seguro(preco))
 
-                cur.execute("""
-                    INSERT INTO PEDIDOS_ITENS (
-                        CODIGO, IDPRODUTO, QTDE, VLR_UNIT, VLR_TOTAL
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, [
+                carga_itens.adicionar([
                     idpedido, idproduto, quantidade, vlr_unit_int, vlr_total_int
-                ])
+                ], origem=f"{idpedido}/{sequencia}", fonte=item_data)
 
-                itens_inseridos += 1
                 sequencia += 1
 
             except Exception as e:
                 itens_erros += 1
                 if itens_erros <= 5:
                     print(f"  Erro ao inserir item: {e}")
+                quarentena.registrar('PEDIDOS_ITENS', item_data, e)
 
         pedidos_processados += 1
-
-        # Commit a cada 100 pedidos
-        if pedidos_processados % 100 == 0:
+        if sequencia > 1:
+            pedidos_alterados.append(idpedido)
+
+        # Commit a cada 1000 pedidos
+        if pedidos_processados % 1000 == 0:
+            carga_itens.enviar()
+            alteracoes.marcar(pedidos_alterados)
+            pedidos_alterados.clear()
+            checkpoint.registrar(chave_inicial, ultima_chave, carga_itens.inseridas,
+                                 itens_erros + carga_itens.erros)
             con.commit()
-            print(f"  {pedidos_processados:,} pedidos processados, {itens_inseridos:,} itens inseridos...")
-
-    # Commit final
+            print(f"  {pedidos_processados:,} pedidos processados, {carga_itens.inseridas:,} itens inseridos...")
+
+    # Envio do lote pendente e commit final
+    resumo = carga_itens.finalizar()
+    alteracoes.marcar(pedidos_alterados)
+    if chave_inicial is not None:
+        checkpoint.registrar(chave_inicial, ultima_chave, resumo['inseridas'], itens_erros + resumo['erros'])
+    checkpoint.concluir()
     con.commit()
+    massa.finalizar()
+    itens_inseridos = resumo['inseridas']
+    itens_erros += resumo['erros']
 
     print(f"\n>> RESUMO:")
     print("-"*100)
@@ -187,6 +236,7 @@ try:
     print(f"\n  Total de itens no Firebird: {total_final:,}")
 
     con.close()
+    quarentena.fechar()
 
     print("\n" + "="*100)
     print("MIGRACAO DE ITENS CONCLUIDA!")
@@ -196,3 +246,6 @@ except Exception as e:
     print(f"\n[ERRO] {e}")
     import traceback
     traceback.print_exc()
+    if massa is not None:
+        massa.finalizar(erro=True)
+    exit(1)
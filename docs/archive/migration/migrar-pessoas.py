@@ -2,6 +2,10 @@
 # -*- coding: utf-8 -*-
 """
 Migração de Fornecedores e Clientes para CAD_PESSOA no Firebird
+
+Uso:
+    python migrar-pessoas.py              (indices e triggers ativos)
+    python migrar-pessoas.py --em-massa   (desativa durante a carga, ver indices_firebird)
 """
 
 import sys
@@ -9,25 +13,16 @@ import codecs
 import re
 from datetime import datetime
 
+from conexao_firebird import conectar
+from indices_firebird import CargaEmMassa
+from leitor_dump import ler_copy
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    print("       Instale com: pip install fdb")
-    exit(1)
 
 print("=== MIGRACAO FORNECEDORES E CLIENTES -> CAD_PESSOA ===\n")
 
-# Configuração Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 def limpar_data(data_str):
     """Remove timezone de strings de data"""
     if not data_str or data_str == '\\N':
@@ -41,46 +36,17 @@ def parsear_dump():
     """Le e parseia o dump de fornecedores e clientes"""
     print("Lendo dump SQL de fornecedores e clientes...")
 
-    with open(r'c:\Projeto\Academia\fornecedores-clientes.sql', 'r', encoding='latin1') as f:
-        conteudo = f.read()
-
     dados = {
         'fornecedores': [],
         'clientes': []
     }
 
-    linhas = conteudo.split('\n')
-    tabela_atual = None
-    colunas_atuais = []
-    lendo_dados = False
-
-    for linha in linhas:
-        # Detectar início de COPY
-        match_copy = re.match(r'COPY public\.(fornecedores|clientes)\s+\((.*?)\)\s+FROM stdin;', linha)
-        if match_copy:
-            tabela_atual = match_copy.group(1)
-            colunas_atuais = [c.strip() for c in match_copy.group(2).split(',')]
-            lendo_dados = True
-            print(f"Encontrado: {tabela_atual} com {len(colunas_atuais)} colunas")
-            continue
-
-        # Detectar fim de dados
-        if linha == '\\.' or linha.strip() == '\\.':
-            if lendo_dados and tabela_atual:
-                print(f"  -> {tabela_atual}: {len(dados[tabela_atual])} registros lidos")
-            lendo_dados = False
-            tabela_atual = None
-            colunas_atuais = []
-            continue
-
-        # Ler dados
-        if lendo_dados and tabela_atual and linha:
-            valores = linha.split('\t')
-            registro = {}
-            for idx, col in enumerate(colunas_atuais):
-                if idx < len(valores):
-                    registro[col] = None if valores[idx] == '\\N' else valores[idx]
-            dados[tabela_atual].append(registro)
+    arquivo = r'c:\Projeto\Academia\fornecedores-clientes.sql'
+    for tabela, colunas, campos in ler_copy(arquivo, dados):
+        dados[tabela].append(dict(zip(colunas, campos)))
+
+    for tabela, registros in dados.items():
+        print(f"  -> {tabela}: {len(registros)} registros lidos")
 
     return dados
 
@@ -229,15 +195,16 @@ def executar_migracao():
 
         # Conectar ao Firebird
         print("\nConectando ao Firebird...")
-        con = fdb.connect(**fbConfig)
+        con = conectar()
         print("[OK] Conectado!\n")
 
         # Migrar
-        if dados['fornecedores']:
-            migrar_fornecedores(con, dados['fornecedores'])
+        with CargaEmMassa(con, ['CAD_PESSOA'], ativo='--em-massa' in sys.argv[1:]):
+            if dados['fornecedores']:
+                migrar_fornecedores(con, dados['fornecedores'])
 
-        if dados['clientes']:
-            migrar_clientes(con, dados['clientes'])
+            if dados['clientes']:
+                migrar_clientes(con, dados['clientes'])
 
         # Verificar total
         cur = con.cursor()
@@ -2,19 +2,54 @@
 # -*- coding: utf-8 -*-
 """
 Migra vendas/pedidos do PostgreSQL para Firebird
+
+Os pedidos (com os itens agrupados) sao divididos em faixas disjuntas de
+idpedido, e cada faixa e gravada por um processo com sua propria conexao
+Firebird. Os itens de um pedido ficam sempre na mesma faixa, entao a
+SEQUENCIA de cada pedido e a mesma da carga em sequencia (ordem do dump).
+No fim, uma conferencia compara as contagens e a numeracao dos itens.
+
+A cada commit a faixa registra o ultimo idpedido gravado (MIGRACAO_CHECKPOINT,
+na mesma transacao). Se a carga parar no meio, a proxima execucao pula as
+linhas ja gravadas ainda na leitura do dump e continua dali.
+
+Uso:
+    python migrar-vendas.py                 (PROCESSOS faixas em paralelo)
+    python migrar-vendas.py --processos 1   (uma conexao, sem paralelismo)
+    python migrar-vendas.py --reiniciar     (ignora o checkpoint e recomeca)
+    python migrar-vendas.py --em-massa      (indices/triggers desativados, ver indices_firebird)
 """
 
 import sys, codecs, re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from carga_firebird import Quarentena, criar_carregador
+from chaves_firebird import carregar_chaves
+from checkpoint_firebird import Checkpoint
+from conexao_firebird import conectar
+from dinheiro import centavos_seguro, decimal_seguro, multiplicar
+from indices_firebird import CargaEmMassa
+from leitor_dump import chave_linha, ler_copy
+from totais_firebird import RegistroAlteracoes, criar_tabelas_alterados
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
+
+ARQUIVO_VENDAS = r'c:\Projeto\Academia\vendas-extraidas.sql'
+
+# Modo de gravacao: 'bloco' = varias linhas por EXECUTE BLOCK (menos idas ao
+# servidor, melhor em conexao remota); 'lote' = executemany com comando preparado
+MODO_CARGA = 'bloco'
+
+# Faixas de idpedido gravadas ao mesmo tempo (uma conexao Firebird por faixa);
+# acompanha o numero de nucleos do servidor Firebird
+PROCESSOS = 4
+
+# Pedidos e itens recusados (conversao ou Firebird), com a linha do dump;
+# cada faixa grava o seu arquivo (quarentena-vendas-faixa<N>.jsonl)
+ARQUIVO_QUARENTENA = r'c:\Projeto\Academia\quarentena-vendas.jsonl'
 
 def limpar_data(data_str):
     """Remove timezone e hora das datas"""
@@ -25,19 +60,14 @@ def limpar_data(data_str):
         return match.group(1)
     return None
 
-def parse_linha(linha):
-    """Converte linha do PostgreSQL em lista de campos"""
-    return linha.split('\t')
-
 def safe_float(valor_str):
-    """Converte string para float tratando erros"""
+    """Converte string para float tratando erros (quantidades; dinheiro usa centavos_seguro)"""
     if not valor_str or valor_str == '\\N' or valor_str == '':
         return 0.0
     try:
         # Remover espaços e trocar vírgula por ponto
         valor_limpo = str(valor_str).strip().replace(',', '.')
         # Tentar extrair apenas números e ponto
-        import re
         match = re.search(r'[-+]?\d*\.?\d+', valor_limpo)
         if match:
             return float(match.group())
@@ -45,89 +75,119 @@ def safe_float(valor_str):
     except:
         return 0.0
 
-print("="*100)
-print("MIGRACAO DE VENDAS/PEDIDOS")
-print("="*100)
-
-# Ler dados do PostgreSQL
-with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-    conteudo = f.read()
-
-linhas = conteudo.split('\n')
-
-# Extrair PEDIDOS
-print("\n>> EXTRAINDO PEDIDOS DO POSTGRESQL")
-print("-"*100)
-
-lendo_pedidos = False
-pedidos = []
-
-for linha in linhas:
-    if 'COPY public.pedidos' in linha:
-        lendo_pedidos = True
-        continue
-    if linha.strip() == '\\.':
-        lendo_pedidos = False
-        if pedidos:
-            break
-    if lendo_pedidos and linha.strip():
-        pedidos.append(parse_linha(linha.strip()))
-
-print(f"Total de pedidos encontrados: {len(pedidos)}")
-
-# Extrair PEDIDOS_ITENS
-print("\n>> EXTRAINDO ITENS DOS PEDIDOS")
-print("-"*100)
-
-lendo_itens = False
-pedidos_itens = []
-
-for linha in linhas:
-    if 'COPY public.pedidos_itens' in linha:
-        lendo_itens = True
-        continue
-    if linha.strip() == '\\.':
-        lendo_itens = False
-        if pedidos_itens:
-            break
-    if lendo_itens and linha.strip():
-        pedidos_itens.append(parse_linha(linha.strip()))
-
-print(f"Total de itens encontrados: {len(pedidos_itens)}")
-
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
-try:
-    con = fdb.connect(**fbConfig)
-    cur = con.cursor()
+def ler_vendas(feito=None):
+    """
+    Le pedidos e itens do dump (uma passada) e agrupa os itens por pedido
 
-    # Verificar vendas existentes
-    cur.execute("SELECT COUNT(*) FROM PEDIDOS")
-    total_existente = cur.fetchone()[0]
-    print(f"\nPedidos já existentes no Firebird: {total_existente}")
+    - feito: funcao(idpedido) -> bool; pedidos ja gravados (e seus itens) sao
+      pulados antes de decodificar a linha
+    """
+    pedidos = []
+    pedidos_itens = []
+    destinos = {'pedidos': pedidos, 'pedidos_itens': pedidos_itens}
 
-    pedidos_inseridos = 0
-    pedidos_erros = 0
-    itens_inseridos = 0
-    itens_erros = 0
+    pular = None
+    if feito is not None:
+        # idpedido e a primeira coluna nas duas tabelas
+        pular = {tabela: lambda linha: feito(chave_linha(linha)) for tabela in destinos}
+
+    for tabela, _, campos in ler_copy(ARQUIVO_VENDAS, destinos, pular=pular):
+        destinos[tabela].append(campos)
 
-    print("\n>> MIGRANDO PEDIDOS")
-    print("-"*100)
+    print(f"Total de pedidos encontrados: {len(pedidos)}")
+    print(f"Total de itens encontrados: {len(pedidos_itens)}")
 
-    # Mapear pedidos com seus itens
+    # Mapear pedidos com seus itens (na ordem do dump: define a SEQUENCIA)
     itens_por_pedido = {}
     for item_data in pedidos_itens:
-        idpedido = int(item_data[0]) if item_data[0] != '\\N' else None
+        idpedido = int(item_data[0]) if item_data[0] is not None else None
         if idpedido:
             if idpedido not in itens_por_pedido:
                 itens_por_pedido[idpedido] = []
             itens_por_pedido[idpedido].append(item_data)
 
+    return pedidos, itens_por_pedido
+
+def dividir_faixas(pedidos, itens_por_pedido, partes):
+    """
+    Divide os pedidos em faixas disjuntas de idpedido com trabalho parecido
+
+    O peso de cada pedido e 1 + quantidade de itens. Retorna uma lista de
+    (inicio, fim, pedidos da faixa, itens da faixa), com inicio/fim inclusivos.
+    Pedidos com idpedido invalido ficam na primeira faixa (geram o mesmo erro
+    de conversao da carga em sequencia).
+    """
+    validos = []
+    invalidos = []
+    for ped_data in pedidos:
+        try:
+            validos.append((int(ped_data[0]), ped_data))
+        except (TypeError, ValueError):
+            invalidos.append(ped_data)
+    validos.sort(key=lambda p: p[0])
+
+    peso_total = sum(1 + len(itens_por_pedido.get(idpedido, ())) for idpedido, _ in validos)
+    alvo = peso_total / max(partes, 1)
+
+    faixas = []
+    atual = []
+    peso = 0
+    for idpedido, ped_data in validos:
+        # Nunca corta entre linhas repetidas do mesmo idpedido
+        if atual and peso >= alvo and len(faixas) < partes - 1 and idpedido != atual[-1][0]:
+            faixas.append(atual)
+            atual = []
+            peso = 0
+        atual.append((idpedido, ped_data))
+        peso += 1 + len(itens_por_pedido.get(idpedido, ()))
+    if atual:
+        faixas.append(atual)
+
+    resultado = []
+    for i, faixa in enumerate(faixas):
+        ids = {idpedido for idpedido, _ in faixa}
+        linhas = [ped_data for _, ped_data in faixa]
+        if i == 0:
+            linhas = invalidos + linhas
+        resultado.append((faixa[0][0], faixa[-1][0], linhas,
+                          {idpedido: itens_por_pedido[idpedido] for idpedido in ids if idpedido in itens_por_pedido}))
+    if not resultado and invalidos:
+        resultado.append((None, None, invalidos, {}))
+    return resultado
+
+def migrar_pedidos(con, pedidos, itens_por_pedido, pedidos_existentes, quarentena, rotulo='',
+                   checkpoint=None, chave_inicial=None):
+    """
+    Grava os pedidos e seus itens pela conexao; devolve o resumo da carga
+
+    Com checkpoint, os pedidos devem vir em ordem de idpedido: cada commit
+    registra [chave_inicial, ultimo idpedido] como gravado. Os pedidos com
+    itens vao para o log de alteracoes (recalculo incremental dos totais).
+    """
+    ultima_chave = None
+
+    def registrar_checkpoint():
+        if checkpoint is not None and ultima_chave is not None:
+            checkpoint.registrar(chave_inicial, ultima_chave,
+                                 carga_pedidos.inseridas + carga_itens.inseridas,
+                                 pedidos_erros + itens_erros + carga_pedidos.erros + carga_itens.erros)
+
+    pedidos_inseridos = 0
+    pedidos_erros = 0
+    itens_erros = 0
+    alteracoes = RegistroAlteracoes(con, 'PEDIDOS')
+    pedidos_alterados = []
+
+    carga_pedidos = criar_carregador(con, 'PEDIDOS', [
+        'CODIGO', 'EMPRESA', 'DATA', 'TIPO', 'APROVADO', 'SITUACAO', 'FATURADO',
+        'CLIENTE', 'DOCUMENTO', 'VLR_DESCONTO', 'QTDE_TOTAL', 'VLR_TOTAL',
+        'VLRFRETE', 'VLR_PRODUTOS', 'DATA_ENTREGA', 'FATURADODATA', 'IDUSUARIO_ORIGEM'
+    ], modo=MODO_CARGA, nome=f'pedidos{rotulo}', quarentena=quarentena)
+    # Itens so sao enviados depois dos pedidos pendentes (chave estrangeira)
+    carga_itens = criar_carregador(con, 'PEDIDOS_ITENS', [
+        'PEDIDO', 'SEQUENCIA', 'PRODUTO', 'QUANTIDADE', 'VLR_UNITARIO', 'VLR_TOTAL'
+    ], modo=MODO_CARGA, nome=f'itens{rotulo}', dependencias=[carga_pedidos], quarentena=quarentena)
+
     # Migrar pedidos
     for ped_data in pedidos:
         try:
@@ -137,22 +197,23 @@ try:
             #             conferido_por, status
 
             idpedido = int(ped_data[0])
-            idfilial = int(ped_data[1]) if ped_data[1] != '\\N' else 1
-            idfornecedor = int(ped_data[2]) if ped_data[2] != '\\N' else None
+            ultima_chave = idpedido
+            idfilial = int(ped_data[1]) if ped_data[1] is not None else 1
+            idfornecedor = int(ped_data[2]) if ped_data[2] is not None else None
             documento = (ped_data[3] or '')[:20]
-            vlnota = safe_float(ped_data[4])
-            vlprod = safe_float(ped_data[5])
-            vlfrete = safe_float(ped_data[6])
-            vldescontos = safe_float(ped_data[11])
+            # Valores monetarios em centavos exatos (Firebird: BIGINT)
+            vlnota = centavos_seguro(ped_data[4])
+            vlprod = centavos_seguro(ped_data[5])
+            vlfrete = centavos_seguro(ped_data[6])
+            vldescontos = centavos_seguro(ped_data[11])
             data = limpar_data(ped_data[12]) or datetime.now().strftime('%Y-%m-%d')
             lancado = 'S' if ped_data[13] == 't' else 'N'
             datalan = limpar_data(ped_data[14])
-            idfuncionario = int(ped_data[15]) if ped_data[15] != '\\N' else None
+            idfuncionario = int(ped_data[15]) if ped_data[15] is not None else None
             data_entrega = limpar_data(ped_data[19])
 
             # Verificar se já existe
-            cur.execute("SELECT CODIGO FROM PEDIDOS WHERE CODIGO = ?", [idpedido])
-            if cur.fetchone():
+            if idpedido in pedidos_existentes:
                 continue  # Já existe
 
             # Calcular total
@@ -162,8 +223,8 @@ try:
                 if idpedido in itens_por_pedido:
                     for item in itens_por_pedido[idpedido]:
                         qtd = safe_float(item[2]) if len(item) > 2 else 0
-                        vlr = safe_float(item[3]) if len(item) > 3 else 0
-                        vlr_total += qtd * vlr
+                        vlr = item[3] if len(item) > 3 else None
+                        vlr_total += multiplicar(qtd, decimal_seguro(vlr))
 
             # Calcular quantidade total de itens
             qtde_total = 0
@@ -172,32 +233,21 @@ try:
                     qtd = safe_float(item[2]) if len(item) > 2 else 0
                     qtde_total += qtd
 
-            # Firebird espera valores monetários em centavos (BIGINT)
-            vlr_total_int = int(vlr_total * 100)
-            vlr_produtos_int = int(vlprod * 100)
-            vlr_desconto_int = int(vldescontos * 100)
-            vlr_frete_int = int(vlfrete * 100)
-
-            # Inserir pedido no Firebird
-            cur.execute("""
-                INSERT INTO PEDIDOS (
-                    CODIGO, EMPRESA, DATA, TIPO, APROVADO, SITUACAO, FATURADO,
-                    CLIENTE, DOCUMENTO, VLR_DESCONTO, QTDE_TOTAL, VLR_TOTAL,
-                    VLRFRETE, VLR_PRODUTOS, DATA_ENTREGA, FATURADODATA, IDUSUARIO_ORIGEM
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
+            # Inserir pedido no Firebird (enviado em lote pelo carregador)
+            carga_pedidos.adicionar([
                 idpedido, idfilial, data, 'P',  # P = Pedido
                 'S' if lancado == 'S' else 'N',  # Aprovado
                 'F' if lancado == 'S' else 'A',  # Situação: F=Fechado, A=Aberto
                 lancado,  # Faturado
                 idfornecedor,  # Cliente (fornecedor no contexto de compra)
                 documento,
-                vlr_desconto_int, qtde_total, vlr_total_int,
-                vlr_frete_int, vlr_produtos_int,
+                vldescontos, qtde_total, vlr_total,
+                vlfrete, vlprod,
                 data_entrega or data,
                 datalan or data,
                 idfuncionario or 1
-            ])
+            ], origem=idpedido, fonte=ped_data)
+            pedidos_existentes.add(idpedido)
 
             pedidos_inseridos += 1
 
@@ -207,71 +257,252 @@ try:
                 for item_data in itens_por_pedido[idpedido]:
                     try:
                         # PostgreSQL pedidos_itens: idpedido, idproduto, quantidade, vlunitario, vltotal, ...
-                        idproduto = int(item_data[1]) if len(item_data) > 1 and item_data[1] != '\\N' and item_data[1].isdigit() else None
+                        idproduto = int(item_data[1]) if len(item_data) > 1 and item_data[1] is not None and item_data[1].isdigit() else None
                         quantidade = safe_float(item_data[2]) if len(item_data) > 2 else 0
-                        vlunitario = safe_float(item_data[3]) if len(item_data) > 3 else 0
-                        vltotal = safe_float(item_data[4]) if len(item_data) > 4 else quantidade * vlunitario
+                        vlunitario = item_data[3] if len(item_data) > 3 else None
+                        if len(item_data) > 4:
+                            vltotal = centavos_seguro(item_data[4])
+                        else:
+                            vltotal = multiplicar(quantidade, decimal_seguro(vlunitario))
 
                         if not idproduto or quantidade == 0:
                             continue
 
-                        # Converter valores para centavos
-                        vlr_unit_int = int(vlunitario * 100)
-                        vlr_total_int = int(vltotal * 100)
-
-                        cur.execute("""
-                            INSERT INTO PEDIDOS_ITENS (
-                                PEDIDO, SEQUENCIA, PRODUTO, QUANTIDADE, VLR_UNITARIO, VLR_TOTAL
-                            ) VALUES (?, ?, ?, ?, ?, ?)
-                        """, [
-                            idpedido, sequencia, idproduto, quantidade, vlr_unit_int, vlr_total_int
-                        ])
+                        carga_itens.adicionar([
+                            idpedido, sequencia, idproduto, quantidade,
+                            centavos_seguro(vlunitario), vltotal
+                        ], origem=f"{idpedido}/{sequencia}", fonte=item_data)
 
-                        itens_inseridos += 1
                         sequencia += 1
+                        if sequencia == 2:
+                            pedidos_alterados.append(idpedido)
 
                     except Exception as e:
                         itens_erros += 1
                         if itens_erros <= 3:
                             print(f"  Erro ao inserir item: {e}")
-
-            # Commit a cada 100 pedidos
-            if pedidos_inseridos % 100 == 0:
+                        quarentena.registrar('PEDIDOS_ITENS', item_data, e)
+
+            # Commit a cada 1000 pedidos
+            if pedidos_inseridos % 1000 == 0:
+                carga_pedidos.enviar()
+                carga_itens.enviar()
+                alteracoes.marcar(pedidos_alterados)
+                pedidos_alterados.clear()
+                registrar_checkpoint()
                 con.commit()
-                print(f"  {pedidos_inseridos} pedidos migrados...")
+                print(f" {rotulo} {pedidos_inseridos} pedidos migrados...")
 
         except Exception as e:
             pedidos_erros += 1
             if pedidos_erros <= 5:
                 print(f"  Erro ao inserir pedido {ped_data[0]}: {e}")
+            quarentena.registrar('PEDIDOS', ped_data, e)
 
-    # Commit final
+    # Envio dos lotes pendentes e commit final
+    resumo_pedidos = carga_pedidos.finalizar()
+    resumo_itens = carga_itens.finalizar()
+    alteracoes.marcar(pedidos_alterados)
+    registrar_checkpoint()
     con.commit()
 
-    print(f"\n>> RESUMO DA MIGRACAO:")
-    print("-"*100)
-    print(f"  Pedidos inseridos: {pedidos_inseridos:,}")
-    print(f"  Pedidos com erro: {pedidos_erros:,}")
-    print(f"  Itens inseridos: {itens_inseridos:,}")
-    print(f"  Itens com erro: {itens_erros:,}")
-
-    # Verificar total final
+    return {
+        'pedidos_inseridos': resumo_pedidos['inseridas'],
+        'pedidos_erros': pedidos_erros + resumo_pedidos['erros'],
+        'itens_inseridos': resumo_itens['inseridas'],
+        'itens_erros': itens_erros + resumo_itens['erros'],
+        'envios': resumo_pedidos['envios'] + resumo_itens['envios'],
+    }
+
+def migrar_faixa(numero, inicio, fim, pedidos, itens_por_pedido, hash_dump, con=None):
+    """
+    Grava uma faixa: chaves, checkpoint e quarentena proprios
+
+    Sem con (processo separado), abre e fecha a sua conexao.
+    """
+    paralelo = con is None
+    rotulo = f'[faixa {numero}]' if paralelo else ''
+    if paralelo:
+        con = conectar()
+        quarentena = Quarentena(ARQUIVO_QUARENTENA.replace('.jsonl', f'-faixa{numero}.jsonl'))
+    else:
+        quarentena = Quarentena(ARQUIVO_QUARENTENA)
+    try:
+        checkpoint = Checkpoint(con, 'vendas', ARQUIVO_VENDAS, 'PEDIDOS', hash_dump=hash_dump)
+        filtro = f"CODIGO BETWEEN {inicio} AND {fim}" if inicio is not None else None
+        pedidos_existentes = carregar_chaves(con, 'PEDIDOS', filtro=filtro)
+        print(f"{rotulo} pedidos {inicio} a {fim}: {len(pedidos):,} pedidos, "
+              f"{sum(len(itens) for itens in itens_por_pedido.values()):,} itens")
+        return migrar_pedidos(con, pedidos, itens_por_pedido, pedidos_existentes, quarentena, rotulo,
+                              checkpoint, inicio)
+    finally:
+        if paralelo:
+            con.close()
+        quarentena.fechar()
+
+def contar_tabelas(con):
+    cur = con.cursor()
     cur.execute("SELECT COUNT(*) FROM PEDIDOS")
-    total_final = cur.fetchone()[0]
-
+    pedidos = cur.fetchone()[0]
     cur.execute("SELECT COUNT(*) FROM PEDIDOS_ITENS")
-    total_itens_final = cur.fetchone()[0]
-
-    print(f"\n  Total de pedidos no Firebird: {total_final:,}")
-    print(f"  Total de itens no Firebird: {total_itens_final:,}")
+    itens = cur.fetchone()[0]
+    cur.close()
+    return pedidos, itens
+
+def verificar_consistencia(con, antes, resumo, inicio, fim):
+    """Confere contagens e a numeracao dos itens depois da carga; retorna a lista de problemas"""
+    problemas = []
+    pedidos, itens = contar_tabelas(con)
+    if pedidos != antes[0] + resumo['pedidos_inseridos']:
+        problemas.append(f"PEDIDOS: {pedidos:,} no banco, esperado {antes[0] + resumo['pedidos_inseridos']:,}")
+    if itens != antes[1] + resumo['itens_inseridos']:
+        problemas.append(f"PEDIDOS_ITENS: {itens:,} no banco, esperado {antes[1] + resumo['itens_inseridos']:,}")
 
-    con.close()
+    cur = con.cursor()
+    # SEQUENCIA de cada pedido deve ser 1..n, sem buraco nem repeticao
+    cur.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT PEDIDO FROM PEDIDOS_ITENS
+            WHERE PEDIDO BETWEEN ? AND ?
+            GROUP BY PEDIDO
+            HAVING MIN(SEQUENCIA) <> 1
+                OR MAX(SEQUENCIA) <> COUNT(*)
+                OR COUNT(DISTINCT SEQUENCIA) <> COUNT(*)
+        )
+    """, [inicio, fim])
+    sequencias = cur.fetchone()[0]
+    if sequencias:
+        problemas.append(f"{sequencias:,} pedidos com SEQUENCIA fora de 1..n")
+
+    cur.execute("""
+        SELECT COUNT(*) FROM PEDIDOS_ITENS I
+        WHERE I.PEDIDO BETWEEN ? AND ?
+        AND NOT EXISTS (SELECT 1 FROM PEDIDOS P WHERE P.CODIGO = I.PEDIDO)
+    """, [inicio, fim])
+    orfaos = cur.fetchone()[0]
+    if orfaos:
+        problemas.append(f"{orfaos:,} itens sem pedido")
+    cur.close()
+    return problemas
+
+def conferir(antes, resumo, inicio, fim):
+    """
+    Conferencia final numa conexao de verificacao nova; retorna (problemas, totais)
+
+    A conexao principal esta num snapshot aberto antes das faixas: os commits
+    dos processos nao aparecem nela.
+    """
+    con = conectar('verificacao')
+    try:
+        problemas = verificar_consistencia(con, antes, resumo, inicio, fim)
+        totais = contar_tabelas(con)
+    finally:
+        con.close()
+    return problemas, totais
+
+def somar_resumos(resumos):
+    total = {}
+    for resumo in resumos:
+        for chave, valor in resumo.items():
+            total[chave] = total.get(chave, 0) + valor
+    return total
+
+if __name__ == '__main__':
+    processos = PROCESSOS
+    reiniciar = '--reiniciar' in sys.argv
+    if '--processos' in sys.argv:
+        processos = int(sys.argv[sys.argv.index('--processos') + 1])
 
-    print("\n" + "="*100)
-    print("MIGRACAO DE VENDAS CONCLUIDA!")
+    print("="*100)
+    print("MIGRACAO DE VENDAS/PEDIDOS")
     print("="*100)
 
-except Exception as e:
-    print(f"\n[ERRO] {e}")
-    import traceback
-    traceback.print_exc()
+    massa = None
+    try:
+        con = conectar()
+
+        # Checkpoint de uma execucao anterior (mesmo dump)
+        checkpoint = Checkpoint(con, 'vendas', ARQUIVO_VENDAS, 'PEDIDOS')
+        # Cria o log de alteracoes antes das faixas (DDL numa conexao so)
+        criar_tabelas_alterados(con)
+        if reiniciar:
+            checkpoint.reiniciar()
+        print(f"\nCheckpoint: {checkpoint.descricao()}")
+        if checkpoint.concluida:
+            print("Nada a fazer (use --reiniciar para migrar de novo)")
+            con.close()
+            exit(0)
+
+        # Ler dados do PostgreSQL (uma unica passada, em streaming)
+        print("\n>> EXTRAINDO PEDIDOS E ITENS DO POSTGRESQL")
+        print("-"*100)
+        pedidos, itens_por_pedido = ler_vendas(checkpoint.feito if checkpoint.retomando() else None)
+
+        # Verificar vendas existentes
+        antes = contar_tabelas(con)
+        print(f"\nPedidos já existentes no Firebird: {antes[0]}")
+
+        faixas = dividir_faixas(pedidos, itens_por_pedido, processos)
+        inicio = min((f[0] for f in faixas if f[0] is not None), default=0)
+        fim = max((f[1] for f in faixas if f[1] is not None), default=0)
+
+        # Antes de abrir as faixas: as outras conexoes ja encontram tudo desativado
+        massa = CargaEmMassa(con, ['PEDIDOS', 'PEDIDOS_ITENS'], ativo='--em-massa' in sys.argv[1:])
+        massa.iniciar()
+
+        print(f"\n>> MIGRANDO PEDIDOS ({len(faixas)} faixas de idpedido)")
+        print("-"*100)
+
+        if len(faixas) <= 1:
+            # Sem paralelismo: mesma conexao, como a carga original
+            resumos = [migrar_faixa(1, *faixa, checkpoint.hash, con=con) for faixa in faixas]
+        else:
+            with ProcessPoolExecutor(max_workers=len(faixas)) as executor:
+                futuros = [executor.submit(migrar_faixa, numero, *faixa, checkpoint.hash)
+                           for numero, faixa in enumerate(faixas, 1)]
+                resumos = [futuro.result() for futuro in futuros]
+
+        massa.finalizar()
+
+        resumo = somar_resumos(resumos) or {'pedidos_inseridos': 0, 'pedidos_erros': 0,
+                                            'itens_inseridos': 0, 'itens_erros': 0, 'envios': 0}
+
+        print(f"\n>> RESUMO DA MIGRACAO:")
+        print("-"*100)
+        print(f"  Pedidos inseridos: {resumo['pedidos_inseridos']:,}")
+        print(f"  Pedidos com erro: {resumo['pedidos_erros']:,}")
+        print(f"  Itens inseridos: {resumo['itens_inseridos']:,}")
+        print(f"  Itens com erro: {resumo['itens_erros']:,}")
+        print(f"  Comandos enviados ao servidor: {resumo['envios']:,}")
+
+        # Conferencia final (contagens e SEQUENCIA dos itens)
+        print(f"\n>> CONFERENCIA")
+        print("-"*100)
+        problemas, (total_final, total_itens_final) = conferir(antes, resumo, inicio, fim)
+        for problema in problemas:
+            print(f"  [ERRO] {problema}")
+        if not problemas:
+            print("  [OK] Contagens e SEQUENCIA dos itens conferem")
+
+        print(f"\n  Total de pedidos no Firebird: {total_final:,}")
+        print(f"  Total de itens no Firebird: {total_itens_final:,}")
+
+        if problemas:
+            con.close()
+            exit(1)
+
+        checkpoint.concluir()
+        con.commit()
+        con.close()
+
+        print("\n" + "="*100)
+        print("MIGRACAO DE VENDAS CONCLUIDA!")
+        print("="*100)
+
+    except Exception as e:
+        print(f"\n[ERRO] {e}")
+        import traceback
+        traceback.print_exc()
+        if massa is not None:
+            massa.finalizar(erro=True)
+        exit(1)
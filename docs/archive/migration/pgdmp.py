@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitor nativo de backups PostgreSQL em formato custom (PGDMP, pg_dump -Fc)
+
+Le o cabecalho, o TOC e os offsets dos blocos de dados do arquivo .bkp e
+descomprime os dados de uma tabela em streaming, entregando as linhas pelo
+mesmo caminho do leitor de dumps texto (leitor_dump). Dispensa o pg_restore
+e os arquivos .sql intermediarios.
+
+Formato (pg_backup_archiver.c / pg_backup_custom.c):
+- inteiros: 1 byte de sinal + intSize bytes little-endian
+- strings: inteiro com o tamanho (-1 = NULL) + bytes
+- offsets: 1 byte de estado + offSize bytes little-endian
+- dados de tabela: bloco [tipo, dumpId] seguido de pedacos [tamanho, bytes]
+  terminados por tamanho 0; os pedacos juntos formam um stream comprimido
+
+Uso:
+    from pgdmp import ler_toc, ler_copy_pgdmp
+
+    toc = ler_toc(r'C:\\...\\bmcmdb.bkp')
+    for tabela, colunas, campos in ler_copy_pgdmp(arquivo, ['pedidos']):
+        ...
+
+    # Varias tabelas ao mesmo tempo, uma por processo
+    # (nos scripts, chamar dentro de if __name__ == '__main__': por causa do Windows)
+    resultados = extrair_paralelo(arquivo, ['pedidos', 'pedidos_itens'], destino=r'c:\...')
+"""
+
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from leitor_dump import (ENCODING_PADRAO, FIM_COPY, campos_bytes, campos_linha, dividir_linhas,
+                         encoding_python, parse_copy)
+
+# Estado do offset de dados de cada entrada do TOC
+OFFSET_NAO_DEFINIDO = 1
+OFFSET_DEFINIDO = 2
+OFFSET_SEM_DADOS = 3
+
+# Tipos de bloco de dados
+BLOCO_DADOS = 1
+BLOCO_BLOBS = 3
+
+# Algoritmos de compressao (pg_compress_algorithm)
+COMPRESSAO_NENHUMA = 0
+COMPRESSAO_GZIP = 1
+COMPRESSAO_LZ4 = 2
+COMPRESSAO_ZSTD = 3
+
+FORMATO_CUSTOM = 1
+
+# Versao minima suportada do formato (PostgreSQL 8.4)
+VERSAO_MINIMA = (1, 10, 0)
+
+
+class _Leitor:
+    """Primitivas de leitura do formato de arquivo do pg_dump"""
+
+    def __init__(self, f):
+        self.f = f
+        self.versao = (1, 0, 0)
+        self.int_size = 4
+        self.off_size = 8
+
+    def bytes(self, n):
+        dados = self.f.read(n)
+        if len(dados) < n:
+            raise EOFError("Fim inesperado do arquivo PGDMP")
+        return dados
+
+    def byte(self):
+        return self.bytes(1)[0]
+
+    def int(self):
+        sinal = self.byte() if self.versao > (1, 0, 0) else 0
+        valor = int.from_bytes(self.bytes(self.int_size), 'little')
+        return -valor if sinal else valor
+
+    def str(self):
+        tamanho = self.int()
+        if tamanho < 0:
+            return None
+        return self.bytes(tamanho).decode('utf-8', 'replace')
+
+    def offset(self):
+        estado = self.byte()
+        return estado, int.from_bytes(self.bytes(self.off_size), 'little')
+
+
+def _ler_cabecalho(leitor):
+    if leitor.bytes(5) != b'PGDMP':
+        raise ValueError("Nao e um arquivo PGDMP valido")
+
+    vmaj = leitor.byte()
+    vmin = leitor.byte()
+    vrev = leitor.byte() if (vmaj > 1 or (vmaj == 1 and vmin > 0)) else 0
+    leitor.versao = (vmaj, vmin, vrev)
+    if leitor.versao < VERSAO_MINIMA:
+        raise ValueError(f"Versao do formato PGDMP nao suportada: {vmaj}.{vmin}.{vrev}")
+
+    leitor.int_size = leitor.byte()
+    leitor.off_size = leitor.byte()
+    formato = leitor.byte()
+    if formato != FORMATO_CUSTOM:
+        raise ValueError(f"Formato PGDMP nao e custom (-Fc): {formato}")
+
+    if leitor.versao >= (1, 15, 0):
+        compressao = leitor.byte()
+    else:
+        nivel = leitor.int()
+        compressao = COMPRESSAO_NENHUMA if nivel == 0 else COMPRESSAO_GZIP
+
+    # Data de criacao: seg, min, hora, dia, mes (0-11), ano (-1900), dst
+    seg, minuto, hora, dia, mes, ano, _ = [leitor.int() for _ in range(7)]
+    cabecalho = {
+        'versao': leitor.versao,
+        'int_size': leitor.int_size,
+        'off_size': leitor.off_size,
+        'compressao': compressao,
+        'criado_em': f"{ano + 1900:04d}-{mes + 1:02d}-{dia:02d} {hora:02d}:{minuto:02d}:{seg:02d}",
+        'banco': leitor.str(),
+        'versao_servidor': leitor.str(),
+        'versao_pg_dump': leitor.str(),
+    }
+    return cabecalho
+
+
+def _ler_entrada(leitor):
+    versao = leitor.versao
+    entrada = {'dump_id': leitor.int()}
+    entrada['tem_dados'] = leitor.int()
+    leitor.str()  # tableoid
+    leitor.str()  # oid
+    entrada['tag'] = leitor.str()
+    entrada['desc'] = leitor.str()
+    if versao >= (1, 11, 0):
+        leitor.int()  # section
+    entrada['defn'] = leitor.str()
+    leitor.str()  # dropStmt
+    entrada['copy'] = leitor.str()
+    entrada['namespace'] = leitor.str()
+    leitor.str()  # tablespace
+    if versao >= (1, 14, 0):
+        leitor.str()  # tableam
+    if versao >= (1, 16, 0):
+        leitor.int()  # relkind
+    entrada['owner'] = leitor.str()
+    leitor.str()  # withOids
+
+    # Dependencias: lista de strings terminada por NULL
+    while leitor.str() is not None:
+        pass
+
+    entrada['estado'], entrada['offset'] = leitor.offset()
+    return entrada
+
+
+def ler_toc(arquivo):
+    """
+    Le cabecalho e TOC do backup
+
+    Retorna {'cabecalho': {...}, 'entradas': [...], 'inicio_dados': offset}
+    Cada entrada tem dump_id, tag, desc, namespace, copy, estado e offset.
+    """
+    with open(arquivo, 'rb') as f:
+        leitor = _Leitor(f)
+        cabecalho = _ler_cabecalho(leitor)
+        total = leitor.int()
+        entradas = [_ler_entrada(leitor) for _ in range(total)]
+        inicio_dados = f.tell()
+
+    return {'cabecalho': cabecalho, 'entradas': entradas, 'inicio_dados': inicio_dados}
+
+
+def encoding_toc(toc):
+    """Codec Python do client_encoding registrado no TOC (ou None)"""
+    for entrada in toc['entradas']:
+        if entrada['desc'] == 'ENCODING' and entrada['defn']:
+            # SET client_encoding = 'UTF8';
+            valor = entrada['defn'].split('=', 1)[1].strip().rstrip(';')
+            return encoding_python(valor)
+    return None
+
+
+def entradas_dados(toc, tabelas=None, namespace='public'):
+    """Entradas TABLE DATA do TOC (opcionalmente filtradas por tabela)"""
+    if tabelas is not None:
+        tabelas = set(tabelas)
+    return [e for e in toc['entradas']
+            if e['desc'] == 'TABLE DATA' and e['namespace'] == namespace
+            and (tabelas is None or e['tag'] in tabelas)]
+
+
+def _pular_pedacos(leitor):
+    tamanho = leitor.int()
+    while tamanho:
+        leitor.f.seek(tamanho, 1)
+        tamanho = leitor.int()
+
+
+def _posicionar(leitor, toc, entrada):
+    """Posiciona o arquivo no inicio dos pedacos de dados da entrada"""
+    if entrada['estado'] == OFFSET_DEFINIDO:
+        leitor.f.seek(entrada['offset'])
+        tipo, dump_id = leitor.byte(), leitor.int()
+        if tipo != BLOCO_DADOS or dump_id != entrada['dump_id']:
+            raise ValueError(f"Bloco de dados inesperado para {entrada['tag']}")
+        return
+
+    # Backup gerado sem seek (ex: via pipe): percorre os blocos em sequencia
+    leitor.f.seek(toc['inicio_dados'])
+    while True:
+        try:
+            tipo = leitor.byte()
+        except EOFError:
+            raise ValueError(f"Dados de {entrada['tag']} nao encontrados no backup")
+        dump_id = leitor.int()
+        if tipo == BLOCO_DADOS and dump_id == entrada['dump_id']:
+            return
+        if tipo == BLOCO_BLOBS:
+            while leitor.int() != 0:
+                _pular_pedacos(leitor)
+        else:
+            _pular_pedacos(leitor)
+
+
+def _pedacos(leitor):
+    tamanho = leitor.int()
+    while tamanho:
+        yield leitor.bytes(tamanho)
+        tamanho = leitor.int()
+
+
+def _descomprimir(pedacos, compressao):
+    if compressao == COMPRESSAO_NENHUMA:
+        yield from pedacos
+        return
+
+    if compressao == COMPRESSAO_GZIP:
+        descompressor = zlib.decompressobj()
+        for pedaco in pedacos:
+            saida = descompressor.decompress(pedaco)
+            if saida:
+                yield saida
+        saida = descompressor.flush()
+        if saida:
+            yield saida
+        return
+
+    if compressao == COMPRESSAO_LZ4:
+        try:
+            import lz4.frame
+        except ImportError:
+            raise ImportError("Backup comprimido com lz4: instale com pip install lz4")
+        descompressor = lz4.frame.LZ4FrameDecompressor()
+    elif compressao == COMPRESSAO_ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Backup comprimido com zstd: instale com pip install zstandard")
+        descompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise ValueError(f"Compressao desconhecida no backup: {compressao}")
+
+    for pedaco in pedacos:
+        saida = descompressor.decompress(pedaco)
+        if saida:
+            yield saida
+
+
+def blocos_dados(arquivo, toc, entrada):
+    """Devolve os dados (COPY texto) de uma entrada ja descomprimidos, em blocos"""
+    if entrada['estado'] == OFFSET_SEM_DADOS:
+        return
+
+    with open(arquivo, 'rb') as f:
+        leitor = _Leitor(f)
+        leitor.versao = toc['cabecalho']['versao']
+        leitor.int_size = toc['cabecalho']['int_size']
+        leitor.off_size = toc['cabecalho']['off_size']
+
+        _posicionar(leitor, toc, entrada)
+        yield from _descomprimir(_pedacos(leitor), toc['cabecalho']['compressao'])
+
+
+def colunas_entrada(entrada):
+    """Colunas do COPY registrado na entrada do TOC"""
+    copy = parse_copy((entrada['copy'] or '').strip().encode('utf-8'), 'utf-8')
+    return copy[1] if copy else []
+
+
+def linhas_entrada(arquivo, toc, entrada, encoding=None, bruto=False):
+    """Devolve (colunas, campos) para cada linha de uma entrada TABLE DATA"""
+    encoding = encoding or encoding_toc(toc) or ENCODING_PADRAO
+    colunas = colunas_entrada(entrada)
+
+    for linha in dividir_linhas(blocos_dados(arquivo, toc, entrada)):
+        if not linha or linha == FIM_COPY:
+            continue
+        yield colunas, campos_bytes(linha) if bruto else campos_linha(linha, encoding)
+
+
+def ler_copy_pgdmp(arquivo, tabelas=None, encoding=None, toc=None, bruto=False):
+    """
+    Mesmo contrato do leitor_dump.ler_copy, lendo direto do backup PGDMP
+
+    Devolve (tabela, colunas, campos) com None no lugar de \\N (campos em bytes
+    com bruto=True). As tabelas sao lidas na ordem em que os dados aparecem
+    no arquivo.
+    """
+    if toc is None:
+        toc = ler_toc(arquivo)
+
+    entradas = sorted(entradas_dados(toc, tabelas), key=lambda e: e['offset'])
+    for entrada in entradas:
+        for colunas, campos in linhas_entrada(arquivo, toc, entrada, encoding, bruto):
+            yield entrada['tag'], colunas, campos
+
+
+def ler_tabela_pgdmp(arquivo, tabela, encoding=None, toc=None):
+    """Devolve apenas os campos das linhas de uma tabela do backup"""
+    for _, _, campos in ler_copy_pgdmp(arquivo, [tabela], encoding, toc):
+        yield campos
+
+
+def _extrair_para_arquivo(arquivo, toc, entrada, destino):
+    """Worker: grava os dados de uma tabela em <destino>/<tabela>.sql"""
+    inicio = time.time()
+    encoding_pg = None
+    for e in toc['entradas']:
+        if e['desc'] == 'ENCODING' and e['defn']:
+            encoding_pg = e['defn'].strip()
+
+    caminho = os.path.join(destino, f"{entrada['tag']}.sql")
+    linhas = 0
+    total_bytes = 0
+    with open(caminho, 'wb') as saida:
+        if encoding_pg:
+            saida.write(encoding_pg.encode('ascii') + b'\n\n')
+        saida.write((entrada['copy'] or '').strip().encode('utf-8') + b'\n')
+        cauda = b''
+        for bloco in blocos_dados(arquivo, toc, entrada):
+            saida.write(bloco)
+            linhas += bloco.count(b'\n')
+            total_bytes += len(bloco)
+            cauda = (cauda + bloco)[-16:]
+
+        # O pg_dump ja grava o terminador "\\." no fim dos dados; nao conta como linha
+        fim = cauda.rstrip(b'\n')
+        if fim == FIM_COPY or fim.endswith(b'\n' + FIM_COPY):
+            linhas -= cauda[len(fim) - len(FIM_COPY):].count(b'\n')
+        else:
+            saida.write(FIM_COPY + b'\n')
+
+    return {'arquivo': caminho, 'linhas': linhas, 'bytes': total_bytes,
+            'segundos': time.time() - inicio}
+
+
+def _entregar_para_carregador(arquivo, toc, entrada, carregador, encoding):
+    """Worker: entrega (tabela, colunas, linhas) ao carregador"""
+    inicio = time.time()
+    linhas = (campos for _, campos in linhas_entrada(arquivo, toc, entrada, encoding))
+    retorno = carregador(entrada['tag'], colunas_entrada(entrada), linhas)
+    return {'resultado': retorno, 'segundos': time.time() - inicio}
+
+
+def extrair_paralelo(arquivo, tabelas, destino=None, carregador=None, encoding=None, processos=None):
+    """
+    Descomprime e processa varias tabelas do backup em paralelo (um processo por tabela)
+
+    Cada tabela e um bloco independente no formato custom, entao pode ser
+    lida por um processo separado com seu proprio handle do arquivo.
+
+    - destino: diretorio onde gravar <tabela>.sql (COPY texto, legivel pelo
+      leitor_dump/indice_dump); ou
+    - carregador: funcao de nivel de modulo carregador(tabela, colunas, linhas)
+      chamada no processo filho; o retorno dela vai para o resultado
+    - retorna {tabela: {...estatisticas...}}
+
+    O tempo total fica proximo ao da maior tabela, e nao a soma de todas.
+    """
+    if (destino is None) == (carregador is None):
+        raise ValueError("Informe destino ou carregador (apenas um)")
+
+    toc = ler_toc(arquivo)
+    entradas = entradas_dados(toc, tabelas)
+    encontradas = {e['tag'] for e in entradas}
+    for tabela in tabelas:
+        if tabela not in encontradas:
+            print(f"[AVISO] Tabela {tabela} nao encontrada no backup")
+
+    if destino is not None:
+        os.makedirs(destino, exist_ok=True)
+
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=processos or min(len(entradas), os.cpu_count() or 1) or 1) as executor:
+        futuros = {}
+        for entrada in entradas:
+            if destino is not None:
+                futuro = executor.submit(_extrair_para_arquivo, arquivo, toc, entrada, destino)
+            else:
+                futuro = executor.submit(_entregar_para_carregador, arquivo, toc, entrada, carregador, encoding)
+            futuros[futuro] = entrada['tag']
+
+        for futuro in as_completed(futuros):
+            tabela = futuros[futuro]
+            resultados[tabela] = futuro.result()
+            print(f"  {tabela}: concluida em {resultados[tabela]['segundos']:.1f}s")
+
+    return resultados
@@ -2,115 +2,43 @@
 # -*- coding: utf-8 -*-
 """
 Recalcula VLR_TOTAL e VLR_PRODUTOS baseado nos itens dos pedidos
+
+Incremental (ver totais_firebird): so os pedidos com itens alterados desde
+a ultima execucao.
+
+Uso:
+    python recalcular-valores-pedidos.py            (pedidos alterados)
+    python recalcular-valores-pedidos.py --todos    (confere todos os pedidos)
 """
 
 import sys, codecs
 
+from conexao_firebird import conectar
+from totais_firebird import TOTAIS_PEDIDOS, TotaisIncrementais
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("RECALCULANDO VALORES DOS PEDIDOS")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
-    # Buscar todos os pedidos
-    print("\n>> Buscando todos os pedidos...")
-    cur.execute("SELECT CODIGO FROM PEDIDOS")
-    pedidos = [row[0] for row in cur.fetchall()]
-
-    print(f"Total de pedidos: {len(pedidos):,}")
-
-    pedidos_atualizados = 0
-    pedidos_sem_itens = 0
-    pedidos_erro = 0
-
-    print("\n>> Recalculando valores...")
-
-    for codigo_pedido in pedidos:
-        try:
-            # Calcular soma dos valores dos itens
-            cur.execute("""
-                SELECT SUM(VLR_TOTAL)
-                FROM PEDIDOS_ITENS
-                WHERE CODIGO = ?
-            """, [codigo_pedido])
-
-            row = cur.fetchone()
-            vlr_total_itens = row[0] if (row and row[0]) else 0
-
-            # Calcular soma das quantidades dos itens
-            cur.execute("""
-                SELECT SUM(QTDE)
-                FROM PEDIDOS_ITENS
-                WHERE CODIGO = ?
-            """, [codigo_pedido])
-
-            row = cur.fetchone()
-            qtde_total_itens = row[0] if (row and row[0]) else 0
-
-            if vlr_total_itens > 0:
-                # Atualizar o pedido
-                cur.execute("""
-                    UPDATE PEDIDOS
-                    SET VLR_TOTAL = ?,
-                        VLR_PRODUTOS = ?,
-                        QTDE_TOTAL = ?
-                    WHERE CODIGO = ?
-                """, [vlr_total_itens, vlr_total_itens, qtde_total_itens, codigo_pedido])
-
-                pedidos_atualizados += 1
-
-                # Mostrar primeiros 10
-                if pedidos_atualizados <= 10:
-                    vlr_real = float(vlr_total_itens) / 100 if vlr_total_itens else 0
-                    print(f"  Pedido {codigo_pedido}: R$ {vlr_real:,.2f} ({qtde_total_itens:.2f} itens)")
-
-            else:
-                # Pedido sem itens - zerar valores
-                cur.execute("""
-                    UPDATE PEDIDOS
-                    SET VLR_TOTAL = 0,
-                        VLR_PRODUTOS = 0,
-                        QTDE_TOTAL = 0
-                    WHERE CODIGO = ?
-                """, [codigo_pedido])
-
-                pedidos_sem_itens += 1
-
-            # Commit a cada 100 pedidos
-            if (pedidos_atualizados + pedidos_sem_itens) % 100 == 0:
-                con.commit()
-                print(f"  {pedidos_atualizados:,} pedidos atualizados, {pedidos_sem_itens:,} sem itens...")
-
-        except Exception as e:
-            pedidos_erro += 1
-            if pedidos_erro <= 5:
-                print(f"  Erro ao processar pedido {codigo_pedido}: {e}")
-
-    # Commit final
-    con.commit()
+    # Mesmos totais e mesma posicao no log do recalcular-valores-v2
+    print("\n>> Recalculando valores dos pedidos com itens alterados...")
+
+    totais = TotaisIncrementais(con, 'valores_pedidos', 'PEDIDOS', 'CODIGO',
+                                'PEDIDOS_ITENS', 'CODIGO', TOTAIS_PEDIDOS)
+    resumo = totais.processar(todos='--todos' in sys.argv[1:])
 
     print(f"\n>> RESULTADO:")
     print("-"*100)
-    print(f"  Pedidos atualizados: {pedidos_atualizados:,}")
-    print(f"  Pedidos sem itens: {pedidos_sem_itens:,}")
-    print(f"  Erros: {pedidos_erro:,}")
+    print(f"  Pedidos verificados: {resumo['verificados']:,}")
+    print(f"  Pedidos atualizados: {resumo['atualizados']:,}")
 
     # Verificar pedidos que tinham valores absurdos
     print("\n>> VERIFICANDO PEDIDOS QUE TINHAM VALORES ABSURDOS:")
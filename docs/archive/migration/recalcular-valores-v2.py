@@ -2,85 +2,41 @@
 # -*- coding: utf-8 -*-
 """
 Recalcula VLR_TOTAL e VLR_PRODUTOS baseado nos itens (versão 2)
+
+Incremental (ver totais_firebird): so os pedidos com itens alterados desde
+a ultima execucao sao recalculados, e so os que mudaram sao gravados.
+
+Uso:
+    python recalcular-valores-v2.py            (pedidos alterados)
+    python recalcular-valores-v2.py --todos    (confere todos os pedidos)
 """
 
 import sys, codecs
 
+from conexao_firebird import conectar
+from totais_firebird import TOTAIS_PEDIDOS, TotaisIncrementais
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("RECALCULANDO VALORES DOS PEDIDOS (VERSAO 2)")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
-    # Usar UPDATE direto com subquery (como fizemos com QTDE_TOTAL)
-    print("\n>> Atualizando VLR_TOTAL e VLR_PRODUTOS...")
+    # So os pedidos com itens alterados desde a ultima execucao (log gravado
+    # pelas cargas); pedido sem itens fica com totais zerados
+    print("\n>> Atualizando VLR_TOTAL, VLR_PRODUTOS e QTDE_TOTAL...")
 
-    # Primeiro, atualizar VLR_TOTAL
-    cur.execute("""
-        UPDATE PEDIDOS P
-        SET P.VLR_TOTAL = (
-            SELECT SUM(I.VLR_TOTAL)
-            FROM PEDIDOS_ITENS I
-            WHERE I.CODIGO = P.CODIGO
-        )
-        WHERE EXISTS (
-            SELECT 1 FROM PEDIDOS_ITENS I WHERE I.CODIGO = P.CODIGO
-        )
-    """)
-
-    pedidos_atualizados_1 = cur.rowcount
-    con.commit()
+    totais = TotaisIncrementais(con, 'valores_pedidos', 'PEDIDOS', 'CODIGO',
+                                'PEDIDOS_ITENS', 'CODIGO', TOTAIS_PEDIDOS)
+    resumo = totais.processar(todos='--todos' in sys.argv[1:])
 
-    print(f"  VLR_TOTAL atualizado em {pedidos_atualizados_1:,} pedidos")
-
-    # Atualizar VLR_PRODUTOS (igual ao VLR_TOTAL)
-    cur.execute("""
-        UPDATE PEDIDOS P
-        SET P.VLR_PRODUTOS = P.VLR_TOTAL
-        WHERE EXISTS (
-            SELECT 1 FROM PEDIDOS_ITENS I WHERE I.CODIGO = P.CODIGO
-        )
-    """)
-
-    pedidos_atualizados_2 = cur.rowcount
-    con.commit()
-
-    print(f"  VLR_PRODUTOS atualizado em {pedidos_atualizados_2:,} pedidos")
-
-    # Zerar valores de pedidos sem itens
-    print("\n>> Zerando valores de pedidos sem itens...")
-
-    cur.execute("""
-        UPDATE PEDIDOS P
-        SET P.VLR_TOTAL = 0,
-            P.VLR_PRODUTOS = 0,
-            P.QTDE_TOTAL = 0
-        WHERE NOT EXISTS (
-            SELECT 1 FROM PEDIDOS_ITENS I WHERE I.CODIGO = P.CODIGO
-        )
-    """)
-
-    pedidos_zerados = cur.rowcount
-    con.commit()
-
-    print(f"  {pedidos_zerados:,} pedidos sem itens foram zerados")
+    print(f"  {resumo['atualizados']:,} de {resumo['verificados']:,} pedidos verificados tinham totais diferentes")
 
     # Verificar pedidos que tinham valores absurdos
     print("\n>> VERIFICANDO PEDIDOS QUE TINHAM VALORES ABSURDOS:")
@@ -167,3 +123,4 @@ except Exception as e:
     print(f"\n[ERRO] {e}")
     import traceback
     traceback.print_exc()
+    exit(1)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registros tipados das tabelas do dump, convertidos uma unica vez na leitura
+
+Em vez de um dict de strings por linha (e float()/int()/regex de data em cada
+loop de insert), cada tabela ganha um conversor gerado a partir das colunas
+do COPY e de um mapa de tipos. Cada linha vira uma namedtuple so com as
+colunas do mapa, ja com os valores convertidos.
+
+A linha chega do leitor como bytes (ler_copy com bruto=True): numeros, datas e
+booleanos sao convertidos direto dos bytes e so as colunas de texto do mapa
+sao decodificadas, com o client_encoding do dump (detectado uma vez). O
+texto vai para o fdb como str e e codificado no charset da conexao.
+
+Tipos:
+- 'int', 'float'
+- 'centavos': valor monetario em centavos (int, exato, ver dinheiro.centavos)
+- 'data': datetime.date (descarta hora e fuso: "2022-06-13 00:00:00-03")
+- 'bool': True para t/true, False para f/false
+- 'texto' ou ('texto', tamanho maximo)
+
+Valor invalido vira None (mesmo criterio do cache_colunar). Coluna do mapa
+que nao existe no dump tambem fica None.
+
+Uso:
+    from registros_dump import ler_tipados
+
+    tipos = {'produtos': {'idproduto': 'int', 'descricao': ('texto', 200)}}
+    for tabela, produto in ler_tipados(arquivo, tipos):
+        produto.idproduto, produto.descricao
+"""
+
+from collections import namedtuple
+from datetime import date
+
+from dinheiro import centavos
+from leitor_dump import ENCODING_PADRAO, detectar_encoding, ler_copy
+
+
+def _int(valor):
+    return int(valor)
+
+
+def _float(valor):
+    return float(valor.replace(b',', b'.'))
+
+
+def _data(valor):
+    return date.fromisoformat(valor[:10].decode('ascii'))
+
+
+def _bool(valor):
+    return valor in (b't', b'true')
+
+
+CONVERSORES = {
+    'int': _int,
+    'float': _float,
+    'centavos': centavos,
+    'data': _data,
+    'bool': _bool,
+    'texto': None,
+}
+
+
+def funcao_tipo(tipo, encoding=ENCODING_PADRAO):
+    """Funcao que converte um campo (bytes) para o tipo; ValueError vira None"""
+    tamanho = None
+    if isinstance(tipo, tuple):
+        tipo, tamanho = tipo
+    if tipo not in CONVERSORES:
+        raise ValueError(f"Tipo desconhecido: {tipo}")
+
+    if tipo == 'texto':
+        if tamanho is None:
+            return lambda valor: valor.decode(encoding, 'replace')
+        return lambda valor: valor.decode(encoding, 'replace')[:tamanho]
+
+    base = CONVERSORES[tipo]
+
+    def converter(valor):
+        try:
+            return base(valor)
+        except ValueError:
+            return None
+
+    return converter
+
+
+def criar_conversor(nome, colunas, tipos, encoding=ENCODING_PADRAO):
+    """
+    Gera o conversor de uma tabela: funcao(campos em bytes) -> namedtuple
+
+    - colunas: colunas do COPY, na ordem dos campos
+    - tipos: {coluna: tipo}; so essas colunas ficam no registro
+    - encoding: codec usado nas colunas de texto
+    """
+    Registro = namedtuple(nome, list(tipos), rename=True)
+    posicoes = {coluna: i for i, coluna in enumerate(colunas)}
+    plano = [(posicoes.get(coluna, -1), funcao_tipo(tipo, encoding)) for coluna, tipo in tipos.items()]
+    total = len(colunas)
+    novo = Registro._make
+
+    def converter(campos):
+        if len(campos) != total:
+            raise ValueError(f"{nome}: {len(campos)} campos, esperado {total}")
+        return novo([None if i < 0 or campos[i] is None else f(campos[i]) for i, f in plano])
+
+    converter.registro = Registro
+    return converter
+
+
+def ler_tipados(arquivo, tipos_por_tabela, encoding=None, quarentena=None):
+    """
+    Percorre o dump uma unica vez devolvendo (tabela, registro tipado)
+
+    - tipos_por_tabela: {tabela: {coluna: tipo}}
+    - encoding: None = client_encoding declarado no dump
+    - quarentena: Quarentena (carga_firebird) que recebe as linhas descartadas
+
+    Linhas com numero de campos diferente das colunas sao descartadas e
+    contadas (aviso no fim da leitura); com quarentena, cada uma vai para o
+    arquivo com os campos lidos e o motivo.
+    """
+    if encoding is None:
+        encoding = detectar_encoding(arquivo)
+
+    conversores = {}
+    descartadas = {}
+    colunas_secao = conversor = None
+    for tabela, colunas, campos in ler_copy(arquivo, tipos_por_tabela, encoding, bruto=True):
+        # A lista de colunas e o mesmo objeto na secao inteira; uma nova secao
+        # COPY da mesma tabela pode vir com outras colunas
+        if colunas is not colunas_secao:
+            colunas_secao = colunas
+            chave = (tabela, tuple(colunas))
+            conversor = conversores.get(chave)
+            if conversor is None:
+                conversor = criar_conversor(tabela, colunas, tipos_por_tabela[tabela], encoding)
+                conversores[chave] = conversor
+        try:
+            registro = conversor(campos)
+        except ValueError as erro:
+            descartadas[tabela] = descartadas.get(tabela, 0) + 1
+            if quarentena is not None:
+                origem = [None if c is None else c.decode(encoding, 'replace') for c in campos]
+                quarentena.registrar(tabela, origem, erro)
+            continue
+        yield tabela, registro
+
+    for tabela, quantidade in descartadas.items():
+        print(f"[AVISO] {tabela}: {quantidade} linhas descartadas (numero de campos diferente das colunas)")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reativa indices e triggers que uma carga em massa deixou INACTIVE
+
+Le MIGRACAO_DESATIVADOS (gravada por indices_firebird.CargaEmMassa), reativa
+cada objeto (reconstruindo os indices) e roda SET STATISTICS. Seguro para
+rodar a qualquer momento: sem pendencias, nao faz nada.
+"""
+
+import sys
+import codecs
+
+from conexao_firebird import conectar
+from indices_firebird import restaurar_pendentes
+
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+
+
+print("=== RESTAURAR INDICES E TRIGGERS ===\n")
+
+try:
+    con = conectar()
+    falhas = restaurar_pendentes(con)
+    con.close()
+
+    if falhas:
+        print(f"\n[ERRO] {len(falhas)} objetos continuam INACTIVE")
+        exit(1)
+    print("\n[OK] Nenhum indice ou trigger pendente")
+
+except Exception as e:
+    print(f"\n[ERRO] {e}")
+    import traceback
+    traceback.print_exc()
+    exit(1)
@@ -3,100 +3,106 @@
 """
 Restaura os valores originais dos pedidos migrados do PostgreSQL
 e recalcula apenas os pedidos novos
+
+Os pedidos do dump vem do cache colunar (so convertidos na primeira
+execucao); sem numpy, o dump e lido e ordenado a cada execucao.
 """
 
 import sys, codecs
 
-if sys.platform == 'win32':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
+from comparador_ordenado import (DIFERENTE, IGUAL, SO_ESQUERDA, comparar_ordenados, linhas_firebird,
+                                 ordenar_colunas, ordenar_por_chave)
+from conexao_firebird import conectar
+from registros_dump import ler_tipados
 
 try:
-    import fdb
+    import numpy as np
+    from cache_colunar import TIPOS_PEDIDOS as TIPOS_CACHE, carregar_tabela
 except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
+    carregar_tabela = None
 
-def parse_linha(linha):
-    return linha.split('\t')
+if sys.platform == 'win32':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-def safe_float(valor_str):
-    if not valor_str or valor_str == '\\N' or valor_str == '':
-        return 0.0
-    try:
-        return float(str(valor_str).strip())
-    except:
-        return 0.0
+
+ARQUIVO_VENDAS = r'c:\Projeto\Academia\vendas-extraidas.sql'
+
+TIPOS_PEDIDOS = {'idpedido': 'int', 'vlnota': 'centavos', 'vlprod': 'centavos', 'vlfrete': 'centavos'}
+
+# Pedidos conferidos no fim
+PEDIDOS_VERIFICAR = [23043, 23142, 23199, 54088, 54266]
 
 print("="*100)
 print("RESTAURANDO VALORES ORIGINAIS DOS PEDIDOS MIGRADOS")
 print("="*100)
 
-# Ler pedidos do PostgreSQL
-with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-    conteudo = f.read()
-
-linhas = conteudo.split('\n')
-
-print("\n>> Lendo pedidos do PostgreSQL...")
-lendo_pedidos = False
-pedidos_pg = {}
-
-for linha in linhas:
-    if 'COPY public.pedidos' in linha:
-        lendo_pedidos = True
-        continue
-    if linha.strip() == '\\.':
-        lendo_pedidos = False
-        if pedidos_pg:
-            break
-    if lendo_pedidos and linha.strip():
-        campos = parse_linha(linha.strip())
-        if len(campos) >= 12:
-            idpedido = int(campos[0])
-            vlnota = safe_float(campos[4])  # VLNOTA
-            vlprod = safe_float(campos[5])  # VLPROD
-            vlfrete = safe_float(campos[6])
-            vldescontos = safe_float(campos[11])
-
-            # Calcular total (mesma lógica da migração original)
-            vlr_total = vlnota if vlnota > 0 else vlprod
-
-            pedidos_pg[idpedido] = {
-                'vlnota': vlnota,
-                'vlprod': vlprod,
-                'vlfrete': vlfrete,
-                'vldescontos': vldescontos,
-                'vlr_total': vlr_total
-            }
-
-print(f"Total de pedidos do PostgreSQL: {len(pedidos_pg):,}")
-
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
+
+def valores_originais(pedido):
+    """(VLR_TOTAL, VLR_PRODUTOS) em centavos (mesma lógica da migração original)"""
+    vlnota = pedido.vlnota or 0
+    vlprod = pedido.vlprod or 0
+    vlr_total = vlnota if vlnota > 0 else vlprod
+    vlr_produtos = vlnota - (pedido.vlfrete or 0) if vlnota > 0 else vlr_total
+    return vlr_total, vlr_produtos
+
+
+def pedidos_dump():
+    """(idpedido, (VLR_TOTAL, VLR_PRODUTOS)) do dump, em ordem de idpedido"""
+    if carregar_tabela is not None:
+        pedidos = carregar_tabela(ARQUIVO_VENDAS, 'pedidos', TIPOS_CACHE)
+        if pedidos is not None:
+            # valores_originais em colunas (nulos ja valem 0 no cache)
+            vlnota = pedidos['vlnota']
+            com_nota = vlnota > 0
+            vlr_total = np.where(com_nota, vlnota, pedidos['vlprod'])
+            vlr_produtos = np.where(com_nota, vlnota - pedidos['vlfrete'], vlr_total)
+            return ordenar_colunas(pedidos['idpedido'], [vlr_total, vlr_produtos],
+                                   descartar=pedidos.nulos('idpedido'))
+
+    return ordenar_por_chave(
+        (pedido.idpedido, valores_originais(pedido))
+        for _, pedido in ler_tipados(ARQUIVO_VENDAS, {'pedidos': TIPOS_PEDIDOS})
+        if pedido.idpedido is not None)
+
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
+    # Leitura em ordem de codigo numa conexao propria: os commits das
+    # atualizacoes nao fecham o cursor que esta sendo percorrido
+    leitura = conectar('verificacao')
+    firebird = linhas_firebird(leitura.cursor(), """
+        SELECT CODIGO, VLR_TOTAL, VLR_PRODUTOS FROM PEDIDOS ORDER BY CODIGO
+    """)
+
     # Restaurar valores dos pedidos migrados
-    print("\n>> Restaurando valores originais dos pedidos migrados...")
+    print("\n>> Restaurando valores originais dos pedidos migrados (dump x Firebird em ordem de codigo)...")
 
     pedidos_restaurados = 0
+    pedidos_corretos = 0
     pedidos_novos_recalculados = 0
+    total_pg = 0
+    pedidos_pg = {}
+
+    for evento in comparar_ordenados(pedidos_dump(), firebird):
+        codigo_pedido = evento.chave
+        if evento.esquerda is not None:
+            total_pg += 1
+            if codigo_pedido in PEDIDOS_VERIFICAR:
+                pedidos_pg[codigo_pedido] = evento.esquerda[0]
 
-    cur.execute("SELECT CODIGO FROM PEDIDOS")
-    todos_pedidos = [row[0] for row in cur.fetchall()]
+        if evento.tipo == SO_ESQUERDA:
+            continue
 
-    for codigo_pedido in todos_pedidos:
-        if codigo_pedido in pedidos_pg:
+        if evento.tipo == IGUAL:
+            # Pedido migrado que ja esta com o valor original
+            pedidos_corretos += 1
+            continue
+
+        if evento.tipo == DIFERENTE:
             # Pedido migrado - restaurar valor original
-            ped_pg = pedidos_pg[codigo_pedido]
-            vlr_total_centavos = int(ped_pg['vlr_total'] * 100)
-            vlr_prod_centavos = int((ped_pg['vlnota'] - ped_pg['vlfrete']) * 100) if ped_pg['vlnota'] > 0 else vlr_total_centavos
+            vlr_total_centavos, vlr_prod_centavos = evento.esquerda
 
             cur.execute("""
                 UPDATE PEDIDOS
@@ -143,22 +149,23 @@ try:
 
     # Commit final
     con.commit()
+    leitura.close()
 
+    print(f"\nTotal de pedidos do PostgreSQL: {total_pg:,}")
     print(f"\n>> RESULTADO:")
     print("-"*100)
     print(f"  Pedidos restaurados (do PostgreSQL): {pedidos_restaurados:,}")
+    print(f"  Pedidos ja com o valor original: {pedidos_corretos:,}")
     print(f"  Pedidos recalculados (novos): {pedidos_novos_recalculados:,}")
 
     # Verificar alguns pedidos específicos
     print("\n>> VERIFICANDO PEDIDOS ESPECIFICOS:")
     print("-"*100)
 
-    pedidos_verificar = [23043, 23142, 23199, 54088, 54266]
-
     print(f"{'CODIGO':<10} {'FIREBIRD':<20} {'POSTGRES':<20} {'STATUS'}")
     print("-"*100)
 
-    for codigo in pedidos_verificar:
+    for codigo in PEDIDOS_VERIFICAR:
         cur.execute("SELECT VLR_TOTAL FROM PEDIDOS WHERE CODIGO = ?", [codigo])
         row = cur.fetchone()
 
@@ -166,7 +173,7 @@ try:
             vlr_fb = float(row[0]) / 100 if row[0] else 0
 
             if codigo in pedidos_pg:
-                vlr_pg = pedidos_pg[codigo]['vlr_total']
+                vlr_pg = pedidos_pg[codigo] / 100
                 status = "OK" if abs(vlr_fb - vlr_pg) < 0.01 else "DIFERENTE"
                 print(f"{codigo:<10} R$ {vlr_fb:>15,.2f} R$ {vlr_pg:>15,.2f}  {status}")
             else:
@@ -6,26 +6,16 @@ Restaura valores dos pedidos (versão direta)
 
 import sys, codecs
 
+from conexao_firebird import conectar
+from dinheiro import centavos_seguro
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 def parse_linha(linha):
     return linha.split('\t')
 
-def safe_float(valor_str):
-    if not valor_str or valor_str == '\\N' or valor_str == '':
-        return 0.0
-    try:
-        return float(str(valor_str).strip())
-    except:
-        return 0.0
-
 print("="*100)
 print("RESTAURANDO VALORES ORIGINAIS (V2)")
 print("="*100)
@@ -52,30 +42,23 @@ for linha in linhas:
         campos = parse_linha(linha.strip())
         if len(campos) >= 12:
             idpedido = int(campos[0])
-            vlnota = safe_float(campos[4])
-            vlprod = safe_float(campos[5])
-            vlfrete = safe_float(campos[6])
+            vlnota = centavos_seguro(campos[4])
+            vlprod = centavos_seguro(campos[5])
+            vlfrete = centavos_seguro(campos[6])
 
             vlr_total = vlnota if vlnota > 0 else vlprod
             # VLR_PRODUTOS = VLNOTA - VLFRETE
             vlr_produtos = (vlnota - vlfrete) if vlnota > 0 else vlprod
 
             pedidos_pg[idpedido] = {
-                'vlr_total': int(vlr_total * 100),
-                'vlr_produtos': int(vlr_produtos * 100)
+                'vlr_total': vlr_total,
+                'vlr_produtos': vlr_produtos
             }
 
 print(f"Total de pedidos do PostgreSQL: {len(pedidos_pg):,}")
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     # Restaurar valores pedido por pedido (sem subquery no cursor)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Atualizacao em conjunto via tabela temporaria global (GTT)
+
+Em vez de um UPDATE (e as vezes um SELECT) por linha, as linhas de origem
+sao carregadas em uma GLOBAL TEMPORARY TABLE com EXECUTE BLOCK (uma ida ao
+servidor por bloco, ver carga_firebird.CarregadorBloco) e aplicadas na
+tabela de destino com um unico MERGE.
+
+A GTT tem as mesmas colunas (e tipos) do destino e e ON COMMIT DELETE ROWS:
+carga e MERGE rodam na mesma transacao e o commit do script limpa a area.
+A definicao fica no banco (MIGRACAO_TMP_<tabela>) e so e recriada quando as
+colunas mudam. Cada conexao ve apenas as proprias linhas da GTT.
+
+Linhas repetidas para a mesma chave: vale a ultima (como no UPDATE linha a
+linha), o MERGE do Firebird nao aceita duas origens para o mesmo destino.
+
+Uso:
+    from temporaria_firebird import AtualizacaoEmConjunto
+
+    atualizacao = AtualizacaoEmConjunto(con, 'CAD_PRODUTOS', ['CODIGO'],
+                                        ['ESTOQUESALDO', 'PRC_CUSTO'])
+    for produto in produtos:
+        atualizacao.adicionar([produto.codigo, produto.saldo, produto.custo],
+                              origem=produto.codigo)
+    resumo = atualizacao.aplicar()    (encontradas, nao_encontradas, ...)
+    con.commit()
+"""
+
+import time
+
+from carga_firebird import CarregadorBloco, tipos_colunas
+
+PREFIXO_TEMPORARIA = 'MIGRACAO_TMP_'
+
+# Nomes de objetos no Firebird ate o 3.0
+MAX_NOME = 31
+
+
+def nome_temporaria(tabela):
+    """Nome da GTT de uma tabela de destino"""
+    return f"{PREFIXO_TEMPORARIA}{tabela.upper()}"[:MAX_NOME]
+
+
+def colunas_tabela(con, tabela):
+    """Colunas da tabela na ordem de posicao ([] se ela nao existe)"""
+    cur = con.cursor()
+    cur.execute("""
+        SELECT TRIM(RDB$FIELD_NAME) FROM RDB$RELATION_FIELDS
+        WHERE RDB$RELATION_NAME = ?
+        ORDER BY RDB$FIELD_POSITION
+    """, [tabela.upper()])
+    colunas = [linha[0] for linha in cur.fetchall()]
+    cur.close()
+    return colunas
+
+
+def criar_temporaria(con, nome, colunas, tipos):
+    """
+    Cria a GTT com as colunas e tipos dados (DDL commitado na hora)
+
+    Se ja existir com outras colunas, e recriada.
+    """
+    colunas = [c.upper() for c in colunas]
+    existentes = colunas_tabela(con, nome)
+    if existentes == colunas:
+        return
+
+    cur = con.cursor()
+    if existentes:
+        cur.execute(f"DROP TABLE {nome}")
+        con.commit()
+    definicao = ',\n'.join(f"        {coluna} {tipo}" for coluna, (tipo, _) in zip(colunas, tipos))
+    cur.execute(f"""
+    CREATE GLOBAL TEMPORARY TABLE {nome} (
+{definicao}
+    ) ON COMMIT DELETE ROWS
+    """)
+    con.commit()
+    cur.close()
+    print(f"Tabela temporaria {nome} criada")
+
+
+def sql_merge(destino, temporaria, chaves, colunas, inserir=False):
+    """MERGE da GTT no destino pelas chaves (UPDATE; INSERT opcional)"""
+    condicao = ' AND '.join(f"D.{c} = T.{c}" for c in chaves)
+    atribuicoes = ', '.join(f"{c} = T.{c}" for c in colunas)
+    sql = (f"MERGE INTO {destino} D\n"
+           f"USING {temporaria} T\n"
+           f"ON {condicao}\n"
+           f"WHEN MATCHED THEN UPDATE SET {atribuicoes}")
+    if inserir:
+        todas = list(chaves) + list(colunas)
+        sql += (f"\nWHEN NOT MATCHED THEN INSERT ({', '.join(todas)})"
+                f" VALUES ({', '.join('T.' + c for c in todas)})")
+    return sql
+
+
+class AtualizacaoEmConjunto:
+    """Acumula linhas (chaves + colunas) e aplica tudo com um MERGE"""
+
+    def __init__(self, con, tabela, chaves, colunas, inserir=False, quarentena=None, nome=None):
+        """
+        - chaves: colunas que casam a linha com o destino (ex: ['CODIGO'])
+        - colunas: colunas atualizadas; cada linha traz chaves + colunas, nessa ordem
+        - inserir: linhas sem correspondente sao inseridas (padrao: so contadas)
+        - quarentena: Quarentena para as linhas que a GTT rejeitar
+        """
+        self.con = con
+        self.tabela = tabela.upper()
+        self.chaves = [c.upper() for c in chaves]
+        self.colunas = [c.upper() for c in colunas]
+        self.inserir = inserir
+        self.quarentena = quarentena
+        self.nome = nome or self.tabela
+        self.temporaria = nome_temporaria(self.tabela)
+
+        todas = self.chaves + self.colunas
+        self.tipos = tipos_colunas(con, self.tabela, todas)
+        criar_temporaria(con, self.temporaria, todas, self.tipos)
+
+        self.linhas = {}
+        self.repetidas = 0
+
+    def adicionar(self, parametros, origem=None, fonte=None):
+        """Enfileira uma linha (chaves + colunas); repetida, vale a ultima"""
+        chave = tuple(parametros[:len(self.chaves)])
+        if chave in self.linhas:
+            self.repetidas += 1
+        self.linhas[chave] = (parametros, origem, fonte)
+
+    def aplicar(self):
+        """Carrega a GTT, conta as linhas sem destino e roda o MERGE; nao faz commit"""
+        inicio = time.time()
+        carga = CarregadorBloco(self.con, self.temporaria, self.chaves + self.colunas,
+                                nome=f"{self.nome} (temporaria)", tipos=self.tipos,
+                                quarentena=self.quarentena)
+        for parametros, origem, fonte in self.linhas.values():
+            carga.adicionar(parametros, origem=origem, fonte=fonte)
+        resumo_carga = carga.finalizar()
+        self.linhas = {}
+
+        cur = self.con.cursor()
+        condicao = ' AND '.join(f"D.{c} = T.{c}" for c in self.chaves)
+        cur.execute(f"""
+            SELECT COUNT(*), SUM(CASE WHEN NOT EXISTS (
+                SELECT 1 FROM {self.tabela} D WHERE {condicao}
+            ) THEN 1 ELSE 0 END)
+            FROM {self.temporaria} T
+        """)
+        carregadas, nao_encontradas = cur.fetchone()
+        nao_encontradas = nao_encontradas or 0
+
+        cur.execute(sql_merge(self.tabela, self.temporaria, self.chaves, self.colunas, self.inserir))
+        cur.close()
+        segundos = time.time() - inicio
+
+        resumo = {
+            'carregadas': carregadas,
+            'encontradas': carregadas - nao_encontradas,
+            'nao_encontradas': nao_encontradas,
+            'inseridas': nao_encontradas if self.inserir else 0,
+            'repetidas': self.repetidas,
+            'erros': resumo_carga['erros'],
+            'envios': resumo_carga['envios'] + 2,
+            'segundos': segundos,
+        }
+        print(f"{self.nome}: MERGE de {carregadas:,} linhas em {segundos:.1f}s "
+              f"({resumo['encontradas']:,} encontradas, {nao_encontradas:,} sem correspondente"
+              f"{', inseridas' if self.inserir else ''}; {resumo['envios']:,} envios ao servidor)")
+        return resumo
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agendador das etapas (agendador_migracao.py) com scripts de teste
+
+    python -m pytest test_agendador_migracao.py
+"""
+
+import pytest
+
+from agendador_migracao import ERRO, OK, PULADA, Etapa, executar, montar_grafo
+
+
+def criar_scripts(pasta, scripts):
+    for nome, codigo in scripts.items():
+        (pasta / nome).write_text(codigo, encoding='utf-8')
+
+
+def test_dependentes_de_etapa_com_erro_sao_pulados(tmp_path):
+    criar_scripts(tmp_path, {
+        'falha.py': "import sys\nsys.exit(1)\n",
+        'demora.py': "import time\ntime.sleep(1)\n",
+        'ok.py': "pass\n",
+    })
+    etapas = [
+        Etapa('a', 'falha.py', grava=['A']),
+        Etapa('b', 'demora.py', grava=['B']),
+        # Depende de a (falha logo) e de b (ainda rodando nessa hora)
+        Etapa('c', 'ok.py', le=['A', 'B'], grava=['C']),
+        Etapa('d', 'ok.py', le=['C']),
+        Etapa('e', 'ok.py', grava=['E']),
+    ]
+
+    resultados = executar(etapas, pasta=str(tmp_path))
+
+    assert {nome: r['status'] for nome, r in resultados.items()} == {
+        'a': ERRO, 'b': OK, 'c': PULADA, 'd': PULADA, 'e': OK,
+    }
+    assert (tmp_path / 'logs' / 'b.log').exists()
+
+
+def test_arquivo_faltando_e_erro(tmp_path):
+    criar_scripts(tmp_path, {'ok.py': "pass\n"})
+    etapas = [
+        Etapa('a', 'ok.py', arquivos=[str(tmp_path / 'dump.sql')], grava=['A']),
+        Etapa('b', 'ok.py', le=['A']),
+    ]
+
+    resultados = executar(etapas, pasta=str(tmp_path))
+
+    assert resultados['a']['status'] == ERRO
+    assert resultados['b']['status'] == PULADA
+
+
+def test_grafo_pelas_tabelas():
+    grafo = montar_grafo([
+        Etapa('pessoas', 'x.py', grava=['CAD_PESSOA']),
+        Etapa('produtos', 'x.py', grava=['CAD_PRODUTOS']),
+        Etapa('vendas', 'x.py', le=['CAD_PESSOA', 'CAD_PRODUTOS'], grava=['PEDIDOS']),
+    ])
+    assert grafo == {'pessoas': set(), 'produtos': set(), 'vendas': {'pessoas', 'produtos'}}
+
+
+def test_ciclo():
+    with pytest.raises(ValueError):
+        montar_grafo([Etapa('a', 'x.py', depois=['b']), Etapa('b', 'x.py', depois=['a'])])
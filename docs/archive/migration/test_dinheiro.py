@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conversao para centavos (dinheiro.py): escalar, NumPy e leitura do dump
+
+    python -m pytest test_dinheiro.py
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from dinheiro import centavos, centavos_array, centavos_seguro, decimal_seguro, multiplicar
+from registros_dump import funcao_tipo, ler_tipados
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('0.29', 29),
+    ('12,50', 1250),
+    ('0.125', 13),
+    ('-0.125', -13),
+    ('-.5', -50),
+    (' 7 ', 700),
+    ('1e3', 100000),
+    ('1E-2', 1),
+    (b'1234.567', 123457),
+])
+def test_centavos(texto, esperado):
+    assert centavos(texto) == esperado
+
+
+@pytest.mark.parametrize('texto', ['', '-', '.', '-.', 'abc', '1.2.3', 'nan', 'inf',
+                                   '9e99999999', '-9E999999999', '1e17',
+                                   '99999999999999999.99', '-92233720368547758.08'])
+def test_centavos_invalido(texto):
+    with pytest.raises(ValueError):
+        centavos(texto)
+
+
+def test_expoente_fora_do_int64_e_nulo_no_array():
+    valores, nulos = centavos_array(['1.50', '9e99999999', None, '1e3', '9.3e16'])
+    assert valores.tolist() == [150, 0, 0, 100000, 0]
+    assert nulos.tolist() == [False, True, True, False, True]
+
+
+def test_limite_do_int64():
+    assert centavos('92233720368547758.07') == 2 ** 63 - 1
+    assert centavos('-92233720368547758.07') == -(2 ** 63 - 1)
+    valores, nulos = centavos_array(['92233720368547758.07', '99999999999999999.99'])
+    assert valores.tolist()[0] == 2 ** 63 - 1
+    assert nulos.tolist() == [False, True]
+
+
+def test_expoente_fora_do_int64_na_leitura_do_dump(tmp_path):
+    assert funcao_tipo('centavos')(b'9e99999999') is None
+
+    dump = tmp_path / 'vendas.sql'
+    dump.write_bytes(b"COPY public.pedidos (idpedido, vlnota) FROM stdin;\n"
+                     b"1\t9e99999999\n2\t10.00\n\\.\n")
+    pedidos = [p for _, p in ler_tipados(str(dump), {'pedidos': {'idpedido': 'int', 'vlnota': 'centavos'}})]
+    assert [(p.idpedido, p.vlnota) for p in pedidos] == [(1, None), (2, 1000)]
+
+
+def test_array_igual_ao_escalar():
+    aleatorio = random.Random(24)
+    caracteres = '0123456789.,-+ e'
+    textos = [''.join(aleatorio.choice(caracteres) for _ in range(aleatorio.randrange(1, 12)))
+              for _ in range(20000)]
+    textos += [f"{aleatorio.randrange(10 ** 9) / 1000:.3f}" for _ in range(20000)]
+
+    valores, nulos = centavos_array(textos, tamanho_bloco=3000)
+    for texto, valor, nulo in zip(textos, valores.tolist(), nulos.tolist()):
+        try:
+            esperado = centavos(texto)
+        except ValueError:
+            esperado = None
+        assert (None if nulo else valor) == esperado, texto
+
+
+def test_seguro_e_multiplicar():
+    assert centavos_seguro('\\N') == 0
+    assert centavos_seguro('R$ 12,50') == 1250
+    assert multiplicar(1.5, '12.345') == 1852
+    assert multiplicar(2, decimal_seguro('R$ 1,50')) == 300
+    with pytest.raises(ValueError):
+        multiplicar('9e999999', '9e999999')
+
+
+def test_array_numpy_bytes():
+    valores, nulos = centavos_array(np.array([b'0.29', b'', b'3'], dtype='S'))
+    assert valores.tolist() == [29, 0, 300]
+    assert nulos.tolist() == [False, True, False]
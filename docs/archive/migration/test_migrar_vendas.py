@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga de vendas em faixas paralelas contra um Firebird de teste
+
+Grava pedidos sinteticos (idpedido a partir de CHAVE_INICIAL) em 2 faixas,
+cada uma num processo, como o migrar-vendas, e confere que a conferencia
+final enxerga os commits dos processos. Apaga as linhas antes e depois.
+
+Precisa do fdb e de um banco descartavel com as tabelas do QRSistema:
+
+    FB_DATABASE_TESTE=localhost:/dados/TESTE.FDB python -m pytest test_migrar_vendas.py
+"""
+
+import importlib.util
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+pytest.importorskip('fdb')
+if not os.environ.get('FB_DATABASE_TESTE'):
+    pytest.skip("FB_DATABASE_TESTE nao definido", allow_module_level=True)
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+CHAVE_INICIAL = 990000001
+PEDIDOS = 40
+ITENS_POR_PEDIDO = 3
+FAIXAS = 2
+
+
+def carregar_vendas():
+    """migrar-vendas.py como modulo (o nome tem hifen)"""
+    if 'migrar_vendas' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('migrar_vendas',
+                                                      os.path.join(DIRETORIO, 'migrar-vendas.py'))
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules['migrar_vendas'] = modulo
+        spec.loader.exec_module(modulo)
+    return sys.modules['migrar_vendas']
+
+
+def migrar_faixa(arquivo_quarentena, *argumentos):
+    """Roda no processo da faixa (carrega o script de novo no spawn)"""
+    vendas = carregar_vendas()
+    vendas.ARQUIVO_QUARENTENA = arquivo_quarentena
+    return vendas.migrar_faixa(*argumentos)
+
+
+def limpar(con):
+    fim = CHAVE_INICIAL + PEDIDOS - 1
+    cur = con.cursor()
+    cur.execute("DELETE FROM PEDIDOS_ITENS WHERE PEDIDO BETWEEN ? AND ?", [CHAVE_INICIAL, fim])
+    cur.execute("DELETE FROM PEDIDOS WHERE CODIGO BETWEEN ? AND ?", [CHAVE_INICIAL, fim])
+    cur.execute("DELETE FROM MIGRACAO_CHECKPOINT WHERE ETAPA = 'vendas' AND CHAVE_INICIAL BETWEEN ? AND ?",
+                [CHAVE_INICIAL, fim])
+    cur.execute("DELETE FROM MIGRACAO_ALTERADOS WHERE TABELA = 'PEDIDOS' AND CHAVE BETWEEN ? AND ?",
+                [CHAVE_INICIAL, fim])
+    con.commit()
+
+
+def vendas_sinteticas(produto):
+    """Linhas como as do COPY (campos em texto) de pedidos e pedidos_itens"""
+    pedidos = []
+    itens_por_pedido = {}
+    for idpedido in range(CHAVE_INICIAL, CHAVE_INICIAL + PEDIDOS):
+        pedidos.append([str(idpedido), '1', None, f'T{idpedido}', '30.00', '30.00', '0', '0', '0', '0',
+                        '0', '0', '2024-01-15 00:00:00-03', 't', '2024-01-15', None, None, None,
+                        None, '2024-01-20', None, None])
+        itens_por_pedido[idpedido] = [[str(idpedido), str(produto), '1', '10.00', '10.00']
+                                      for _ in range(ITENS_POR_PEDIDO)]
+    return pedidos, itens_por_pedido
+
+
+@pytest.fixture
+def vendas(monkeypatch, tmp_path):
+    # Os processos das faixas herdam o ambiente (conexao_firebird le FB_DATABASE)
+    monkeypatch.setenv('FB_DATABASE', os.environ['FB_DATABASE_TESTE'])
+    vendas = carregar_vendas()
+    monkeypatch.setattr(vendas, 'ARQUIVO_QUARENTENA', str(tmp_path / 'quarentena.jsonl'))
+
+    con = vendas.conectar()
+    vendas.criar_tabelas_alterados(con)
+    vendas.Checkpoint(con, 'vendas', None, 'PEDIDOS', hash_dump='teste')
+    limpar(con)
+    yield vendas, con
+    con.rollback()
+    limpar(con)
+    con.close()
+
+
+def test_conferencia_enxerga_as_faixas_paralelas(vendas):
+    vendas, con = vendas
+    cur = con.cursor()
+    cur.execute("SELECT FIRST 1 CODIGO FROM CAD_PRODUTOS ORDER BY CODIGO")
+    produto = cur.fetchone()
+    if produto is None:
+        pytest.skip("CAD_PRODUTOS vazia no banco de teste")
+    con.commit()
+
+    pedidos, itens_por_pedido = vendas_sinteticas(produto[0])
+    # Como no script: contagem na conexao principal, que fica com o snapshot aberto
+    antes = vendas.contar_tabelas(con)
+
+    faixas = vendas.dividir_faixas(pedidos, itens_por_pedido, FAIXAS)
+    assert len(faixas) == FAIXAS
+    with ProcessPoolExecutor(max_workers=FAIXAS) as executor:
+        futuros = [executor.submit(migrar_faixa, vendas.ARQUIVO_QUARENTENA, numero, *faixa, 'teste')
+                   for numero, faixa in enumerate(faixas, 1)]
+        resumo = vendas.somar_resumos(futuro.result() for futuro in futuros)
+
+    assert resumo['pedidos_inseridos'] == PEDIDOS
+    assert resumo['itens_inseridos'] == PEDIDOS * ITENS_POR_PEDIDO
+
+    inicio = faixas[0][0]
+    fim = faixas[-1][1]
+    problemas, totais = vendas.conferir(antes, resumo, inicio, fim)
+    assert problemas == []
+    assert totais == (antes[0] + PEDIDOS, antes[1] + PEDIDOS * ITENS_POR_PEDIDO)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Totais do pedido (cabecalho) recalculados so para os pedidos com itens alterados
+
+Os scripts de recalculo faziam UPDATE PEDIDOS P SET ... = (SELECT SUM(...)
+FROM PEDIDOS_ITENS I WHERE I.CODIGO = P.CODIGO) na tabela inteira: cada
+execucao reescrevia todos os pedidos (uma versao de registro por linha),
+mesmo quando so algumas centenas tinham mudado.
+
+- RegistroAlteracoes: log de chaves alteradas (MIGRACAO_ALTERADOS), gravado
+  pelas cargas na mesma transacao dos itens. Nao ha trigger em
+  PEDIDOS_ITENS: a carga em massa desativaria o trigger, e um DELETE da
+  tabela inteira gravaria uma linha de log por item. Cada consumidor
+  (ex: 'valores_pedidos') se registra em MIGRACAO_ALTERADOS_CONSUMIDORES e
+  a carga grava uma linha por consumidor registrado; o consumidor le as
+  suas linhas pendentes e apaga exatamente as que leu.
+- TotaisIncrementais: recalcula as chaves pendentes em lotes de
+  TAMANHO_LOTE, cada lote com um MERGE (agregado dos itens com GROUP BY)
+  que so grava as linhas cujo total mudou. Consumidor que nunca rodou (ou
+  com todos=True) confere todas as chaves da tabela, com o mesmo MERGE.
+
+Nao ha marca d'agua por ID: os IDs vem de uma sequence (fora da transacao)
+e uma carga pode commitar IDs menores depois de um recalculo; as linhas
+dela continuam pendentes ate a proxima leitura. So o registro de um
+consumidor novo deve ser feito com as cargas paradas (uma carga ja aberta
+nao grava linhas para ele).
+
+Uso:
+    from totais_firebird import TOTAIS_PEDIDOS, RegistroAlteracoes, TotaisIncrementais
+
+    # Na carga, antes de cada commit
+    alteracoes = RegistroAlteracoes(con, 'PEDIDOS')
+    alteracoes.marcar(pedidos_do_lote)
+    con.commit()
+
+    # No recalculo
+    totais = TotaisIncrementais(con, 'valores_pedidos', 'PEDIDOS', 'CODIGO',
+                                'PEDIDOS_ITENS', 'CODIGO', TOTAIS_PEDIDOS)
+    resumo = totais.processar()    (verificados, atualizados, lotes, ...)
+"""
+
+import time
+from datetime import datetime
+
+from carga_firebird import CarregadorBloco
+
+TABELA_ALTERADOS = 'MIGRACAO_ALTERADOS'
+SEQUENCIA_ALTERADOS = 'MIGRACAO_ALTERADOS_SEQ'
+TABELA_CONSUMIDORES = 'MIGRACAO_ALTERADOS_CONSUMIDORES'
+
+DDL_ALTERADOS = [
+    f"""
+    CREATE TABLE {TABELA_ALTERADOS} (
+        ID BIGINT NOT NULL,
+        TABELA VARCHAR(31) NOT NULL,
+        CONSUMIDOR VARCHAR(40) NOT NULL,
+        CHAVE BIGINT NOT NULL,
+        CONSTRAINT PK_MIGRACAO_ALTERADOS PRIMARY KEY (ID)
+    )
+    """,
+    f"CREATE INDEX IX_MIGRACAO_ALTERADOS_CONSUMIDOR ON {TABELA_ALTERADOS} (CONSUMIDOR, TABELA)",
+]
+
+DDL_SEQUENCIA = f"CREATE SEQUENCE {SEQUENCIA_ALTERADOS}"
+
+DDL_CONSUMIDORES = f"""
+    CREATE TABLE {TABELA_CONSUMIDORES} (
+        CONSUMIDOR VARCHAR(40) NOT NULL,
+        TABELA VARCHAR(31) NOT NULL,
+        ATUALIZADO TIMESTAMP,
+        CONSTRAINT PK_MIGRACAO_ALTERADOS_CONS PRIMARY KEY (CONSUMIDOR, TABELA)
+    )
+"""
+
+# Chaves por MERGE (lista IN literal; o Firebird aceita ate 1500)
+TAMANHO_LOTE = 1000
+
+# Totais de PEDIDOS a partir de PEDIDOS_ITENS (pedido sem itens = 0)
+TOTAIS_PEDIDOS = {
+    'VLR_TOTAL': 'SUM(VLR_TOTAL)',
+    'VLR_PRODUTOS': 'SUM(VLR_TOTAL)',
+    'QTDE_TOTAL': 'SUM(QTDE)',
+}
+
+
+def criar_tabelas_alterados(con):
+    """Cria o log, a sequence e o registro dos consumidores (DDL commitado na hora)"""
+    cur = con.cursor()
+    cur.execute("SELECT COUNT(*) FROM RDB$GENERATORS WHERE RDB$GENERATOR_NAME = ?", [SEQUENCIA_ALTERADOS])
+    if not cur.fetchone()[0]:
+        cur.execute(DDL_SEQUENCIA)
+        con.commit()
+
+    # Log da versao com posicao por ID (sem CONSUMIDOR): descartado, o
+    # primeiro recalculo de cada consumidor ja e completo
+    cur.execute("""
+        SELECT COUNT(*) FROM RDB$RELATION_FIELDS
+        WHERE RDB$RELATION_NAME = ? AND RDB$FIELD_NAME = 'CONSUMIDOR'
+    """, [TABELA_ALTERADOS])
+    sem_consumidor = not cur.fetchone()[0]
+    for tabela in (TABELA_ALTERADOS, 'MIGRACAO_ALTERADOS_LIDOS'):
+        cur.execute("SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", [tabela])
+        if cur.fetchone()[0] and (sem_consumidor or tabela != TABELA_ALTERADOS):
+            cur.execute(f"DROP TABLE {tabela}")
+            con.commit()
+            print(f"Tabela {tabela} da versao anterior removida")
+
+    for tabela, ddl in ((TABELA_ALTERADOS, DDL_ALTERADOS), (TABELA_CONSUMIDORES, [DDL_CONSUMIDORES])):
+        cur.execute("SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", [tabela])
+        if not cur.fetchone()[0]:
+            for comando in ddl:
+                cur.execute(comando)
+                con.commit()
+            print(f"Tabela {tabela} criada")
+    cur.close()
+
+
+def _lista(chaves):
+    return ', '.join(str(int(chave)) for chave in chaves)
+
+
+class RegistroAlteracoes:
+    """Chaves de uma tabela cujos itens mudaram, uma fila por consumidor"""
+
+    def __init__(self, con, tabela):
+        self.con = con
+        self.tabela = tabela.upper()
+        self.cur = con.cursor()
+        criar_tabelas_alterados(con)
+        self._carga = None
+
+    def marcar(self, chaves):
+        """Grava as chaves para cada consumidor (EXECUTE BLOCK, sem commit: vai junto com a carga)"""
+        chaves = sorted(set(chave for chave in chaves if chave is not None))
+        if not chaves:
+            return
+        if self._carga is None:
+            self._carga = CarregadorBloco(
+                self.con, TABELA_ALTERADOS, ['CHAVE', 'TABELA'], nome=f"alterados {self.tabela}",
+                sql=(f"INSERT INTO {TABELA_ALTERADOS} (ID, TABELA, CONSUMIDOR, CHAVE) "
+                     f"SELECT NEXT VALUE FOR {SEQUENCIA_ALTERADOS}, TABELA, CONSUMIDOR, CAST(? AS BIGINT) "
+                     f"FROM {TABELA_CONSUMIDORES} WHERE TABELA = ?"))
+        for chave in chaves:
+            self._carga.adicionar([chave, self.tabela], origem=chave)
+        self._carga.enviar()
+
+    def marcar_consulta(self, sql):
+        """Grava para cada consumidor as chaves devolvidas por um SELECT (ex: antes de um DELETE)"""
+        self.cur.execute(f"""
+            INSERT INTO {TABELA_ALTERADOS} (ID, TABELA, CONSUMIDOR, CHAVE)
+            SELECT NEXT VALUE FOR {SEQUENCIA_ALTERADOS}, C.TABELA, C.CONSUMIDOR, M.CHAVE
+            FROM (SELECT DISTINCT A.CHAVE FROM ({sql}) A (CHAVE)) M
+            CROSS JOIN {TABELA_CONSUMIDORES} C
+            WHERE C.TABELA = ?
+        """, [self.tabela])
+
+    def registrado(self, consumidor):
+        """True se a carga ja grava linhas para o consumidor"""
+        self.cur.execute(f"SELECT COUNT(*) FROM {TABELA_CONSUMIDORES} WHERE CONSUMIDOR = ? AND TABELA = ?",
+                         [consumidor, self.tabela])
+        return bool(self.cur.fetchone()[0])
+
+    def registrar(self, consumidor):
+        """Passa a gravar linhas para o consumidor (commitado na hora)"""
+        self.cur.execute(f"""
+            UPDATE OR INSERT INTO {TABELA_CONSUMIDORES} (CONSUMIDOR, TABELA, ATUALIZADO)
+            VALUES (?, ?, ?)
+            MATCHING (CONSUMIDOR, TABELA)
+        """, [consumidor, self.tabela, datetime.now()])
+        self.con.commit()
+
+    def pendentes(self, consumidor):
+        """(chaves pendentes do consumidor, IDs das linhas lidas para confirmar)"""
+        self.cur.execute(f"SELECT ID, CHAVE FROM {TABELA_ALTERADOS} WHERE CONSUMIDOR = ? AND TABELA = ?",
+                         [consumidor, self.tabela])
+        linhas = self.cur.fetchall()
+        return sorted(set(chave for _, chave in linhas)), [id_ for id_, _ in linhas]
+
+    def confirmar(self, consumidor, ids):
+        """Apaga as linhas lidas (so elas: as commitadas depois ficam para a proxima); sem commit"""
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            self.cur.execute(f"""
+                DELETE FROM {TABELA_ALTERADOS}
+                WHERE CONSUMIDOR = ? AND ID IN ({_lista(ids[inicio:inicio + TAMANHO_LOTE])})
+            """, [consumidor])
+
+
+class TotaisIncrementais:
+    """Colunas de total do cabecalho = agregados dos itens, so nas chaves alteradas"""
+
+    def __init__(self, con, consumidor, tabela, chave, tabela_itens, chave_itens, totais,
+                 tamanho_lote=TAMANHO_LOTE):
+        """
+        - consumidor: nome da fila no log (cada script de recalculo tem a sua)
+        - totais: {coluna do cabecalho: agregado sobre os itens} (ex: TOTAIS_PEDIDOS)
+        """
+        self.con = con
+        self.consumidor = consumidor
+        self.tabela = tabela.upper()
+        self.chave = chave
+        self.tabela_itens = tabela_itens
+        self.chave_itens = chave_itens
+        self.totais = dict(totais)
+        self.tamanho_lote = tamanho_lote
+        self.alteracoes = RegistroAlteracoes(con, self.tabela)
+
+    def _sql_diferentes(self, chaves):
+        """SELECT das chaves do lote cujo total gravado difere do agregado"""
+        lista = _lista(chaves)
+        agregados = ', '.join(f"{agregado} AS T{i}" for i, agregado in enumerate(self.totais.values()))
+        valores = ', '.join(f"COALESCE(A.T{i}, 0) AS T{i}" for i in range(len(self.totais)))
+        diferente = ' OR '.join(f"P.{coluna} IS DISTINCT FROM COALESCE(A.T{i}, 0)"
+                                for i, coluna in enumerate(self.totais))
+        return (f"SELECT P.{self.chave} AS CHAVE, {valores}\n"
+                f"FROM {self.tabela} P\n"
+                f"LEFT JOIN (SELECT {self.chave_itens} AS CHAVE, {agregados}\n"
+                f"           FROM {self.tabela_itens} WHERE {self.chave_itens} IN ({lista})\n"
+                f"           GROUP BY {self.chave_itens}) A ON A.CHAVE = P.{self.chave}\n"
+                f"WHERE P.{self.chave} IN ({lista})\n"
+                f"AND ({diferente})")
+
+    def recalcular(self, chaves):
+        """Recalcula as chaves (um MERGE por lote); devolve quantas mudaram. Nao faz commit."""
+        cur = self.con.cursor()
+        atribuicoes = ', '.join(f"{coluna} = C.T{i}" for i, coluna in enumerate(self.totais))
+        chaves = list(chaves)
+        atualizados = 0
+        for inicio in range(0, len(chaves), self.tamanho_lote):
+            diferentes = self._sql_diferentes(chaves[inicio:inicio + self.tamanho_lote])
+            # O agregado roda uma vez so: o MERGE conta as linhas que atualizou
+            cur.execute(f"""
+                MERGE INTO {self.tabela} D
+                USING ({diferentes}) C
+                ON D.{self.chave} = C.CHAVE
+                WHEN MATCHED THEN UPDATE SET {atribuicoes}
+            """)
+            atualizados += max(cur.rowcount, 0)
+        cur.close()
+        return atualizados
+
+    def processar(self, todos=False):
+        """
+        Recalcula as chaves pendentes do consumidor, com commit por lote
+
+        Com todos=True, ou se o consumidor nunca rodou, confere todas as
+        chaves da tabela (continua gravando so as que mudaram).
+        """
+        inicio = time.time()
+        registrado = self.alteracoes.registrado(self.consumidor)
+        completo = todos or not registrado
+        if not registrado:
+            # Antes de ler as chaves: o que mudar daqui em diante entra na fila
+            self.alteracoes.registrar(self.consumidor)
+
+        chaves, ids = self.alteracoes.pendentes(self.consumidor)
+        if completo:
+            cur = self.con.cursor()
+            cur.execute(f"SELECT {self.chave} FROM {self.tabela} ORDER BY {self.chave}")
+            chaves = [linha[0] for linha in cur.fetchall()]
+            cur.close()
+
+        atualizados = 0
+        lotes = 0
+        for posicao in range(0, len(chaves), self.tamanho_lote):
+            atualizados += self.recalcular(chaves[posicao:posicao + self.tamanho_lote])
+            self.con.commit()
+            lotes += 1
+
+        self.alteracoes.confirmar(self.consumidor, ids)
+        self.con.commit()
+        segundos = time.time() - inicio
+
+        print(f"{self.tabela} ({self.consumidor}): {len(chaves):,} chaves "
+              f"{'(recalculo completo) ' if completo else 'alteradas '}verificadas, "
+              f"{atualizados:,} atualizadas em {lotes:,} lotes, {segundos:.1f}s")
+        return {
+            'completo': completo,
+            'verificados': len(chaves),
+            'atualizados': atualizados,
+            'lotes': lotes,
+            'segundos': segundos,
+        }
@@ -2,12 +2,13 @@
 # -*- coding: utf-8 -*-
 
 import sys, codecs
+
+from conexao_firebird import conectar
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
 try:
-    import fdb
-    con = fdb.connect(database=r'C:\QRSistema\db\QRSISTEMA.FDB', user='sysdba', password='masterkey')
+    con = conectar('verificacao')
     cur = con.cursor()
 
     cur.execute("""
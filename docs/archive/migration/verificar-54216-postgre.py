@@ -6,6 +6,8 @@ Verifica se o pedido 54216 está no PostgreSQL
 
 import sys, codecs
 
+from indice_dump import carregar_indice, ler_secao, secao
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
@@ -14,31 +16,25 @@ print("VERIFICANDO PEDIDO 54216 NO POSTGRESQL")
 print("="*100)
 
 try:
-    with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-        conteudo = f.read()
-
-    linhas = conteudo.split('\n')
+    arquivo = r'c:\Projeto\Academia\vendas-extraidas.sql'
+    indice = carregar_indice(arquivo)
 
     # Primeiro, verificar o range de pedidos
     print("\n>> Verificando range de pedidos no arquivo:")
     print("-"*100)
 
-    lendo_pedidos = False
     pedidos_ids = []
+    dados_54216 = None
+
+    secao_pedidos = secao(indice, 'pedidos')
+    if secao_pedidos:
+        print(f"Estrutura encontrada: {', '.join(secao_pedidos['colunas'])[:100]}...")
 
-    for linha in linhas:
-        if 'COPY public.pedidos' in linha:
-            print(f"Estrutura encontrada: {linha[:100]}...")
-            lendo_pedidos = True
-            continue
-        if linha.strip() == '\\.':
-            lendo_pedidos = False
-            if pedidos_ids:
-                break
-        if lendo_pedidos and linha.strip():
-            campos = linha.split('\t')
-            if campos[0].isdigit():
-                pedidos_ids.append(int(campos[0]))
+    for campos in ler_secao(arquivo, 'pedidos', indice=indice):
+        if campos[0] and campos[0].isdigit():
+            pedidos_ids.append(int(campos[0]))
+            if campos[0] == '54216':
+                dados_54216 = campos
 
     if pedidos_ids:
         min_id = min(pedidos_ids)
@@ -58,27 +54,17 @@ try:
                 print("\n>> Dados do pedido 54216 no PostgreSQL:")
                 print("-"*100)
 
-                lendo_pedidos = False
-                for linha in linhas:
-                    if 'COPY public.pedidos' in linha:
-                        lendo_pedidos = True
-                        continue
-                    if linha.strip() == '\\.':
-                        break
-                    if lendo_pedidos and linha.strip():
-                        campos = linha.split('\t')
-                        if campos[0] == '54216':
-                            print(f"  ID: {campos[0]}")
-                            print(f"  VLNOTA: {campos[4]}")
-                            print(f"  VLPROD: {campos[5]}")
-                            print(f"  VLFRETE: {campos[6] if len(campos) > 6 else 'N/A'}")
-                            print(f"  DATA: {campos[12] if len(campos) > 12 else 'N/A'}")
-
-                            # Mostrar todos os campos
-                            print(f"\n  Todos os campos:")
-                            for i, valor in enumerate(campos[:20]):
-                                print(f"    Campo {i}: {valor}")
-                            break
+                campos = dados_54216
+                print(f"  ID: {campos[0]}")
+                print(f"  VLNOTA: {campos[4]}")
+                print(f"  VLPROD: {campos[5]}")
+                print(f"  VLFRETE: {campos[6] if len(campos) > 6 else 'N/A'}")
+                print(f"  DATA: {campos[12] if len(campos) > 12 else 'N/A'}")
+
+                # Mostrar todos os campos
+                print(f"\n  Todos os campos:")
+                for i, valor in enumerate(campos[:20]):
+                    print(f"    Campo {i}: {valor}")
             else:
                 print(f"  ✗ Pedido 54216 NÃO encontrado (mas está no range)")
         else:
@@ -89,22 +75,12 @@ try:
     print("\n\n>> Verificando itens do pedido 54216 no PostgreSQL:")
     print("-"*100)
 
-    lendo_itens = False
     itens_encontrados = []
 
-    for linha in linhas:
-        if 'COPY public.pedidos_itens' in linha:
-            lendo_itens = True
-            continue
-        if linha.strip() == '\\.':
-            lendo_itens = False
-            if itens_encontrados:
-                break
-        if lendo_itens and linha.strip():
-            campos = linha.split('\t')
-            # Campo 1 é idpedido
-            if len(campos) > 1 and campos[1] == '54216':
-                itens_encontrados.append(campos)
+    for campos in ler_secao(arquivo, 'pedidos_itens', indice=indice):
+        # Campo 1 é idpedido
+        if len(campos) > 1 and campos[1] == '54216':
+            itens_encontrados.append(campos)
 
     if itens_encontrados:
         print(f"  ✓ Encontrados {len(itens_encontrados)} itens para o pedido 54216")
@@ -47,7 +47,7 @@ try:
     # Verificar se e formato PostgreSQL custom
     if primeiros_bytes[:5] == b'PGDMP':
         print("\n\n[!] Formato: PostgreSQL Custom Format (binario comprimido)")
-        print("    Precisa do pg_restore para extrair os dados")
+        print("    Pode ser lido diretamente com pgdmp.py (ver ler-pgdmp.py)")
     elif b'COPY ' in primeiros_bytes[:100]:
         print("\n\n[OK] Formato: Texto puro (plain SQL)")
         print("    Pode ser lido diretamente")
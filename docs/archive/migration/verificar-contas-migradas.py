@@ -8,14 +8,11 @@ import sys
 import codecs
 import re
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("VERIFICACAO DE CONTAS A PAGAR MIGRADAS DO POSTGRESQL")
@@ -60,14 +57,7 @@ except Exception as e:
     print(f"  [ERRO] ao ler dump: {e}")
     contas_pg = []
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
-con = fdb.connect(**fbConfig)
+con = conectar('verificacao')
 cur = con.cursor()
 
 # Se conseguimos ler as contas do PostgreSQL, vamos verificar algumas delas
@@ -7,27 +7,18 @@ Verifica estrutura de tabelas de funcionários, usuários e vendas no Firebird
 import sys
 import codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
-
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
 
 print("="*100)
 print("ESTRUTURA DAS TABELAS NO FIREBIRD")
 print("="*100)
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Buscar tabelas relacionadas a funcionários, usuários e vendas
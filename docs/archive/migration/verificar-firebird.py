@@ -8,26 +8,18 @@ Requer: pip install fdb
 import sys
 import codecs
 
+from conexao_firebird import conectar
+
 # Forçar UTF-8 no Windows
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    print("       Instale com: pip install fdb")
-    exit(1)
 
 print("=== VERIFICACAO DA ESTRUTURA DO FIREBIRD ===\n")
 print("Conectando ao banco Firebird...")
 
 try:
-    con = fdb.connect(
-        database=r'C:\QRSistema\db\QRSISTEMA.FDB',
-        user='sysdba',
-        password='masterkey'
-    )
+    con = conectar('verificacao')
     print("[OK] Conectado com sucesso!\n")
 except Exception as e:
     print(f"[ERRO] Erro ao conectar: {e}")
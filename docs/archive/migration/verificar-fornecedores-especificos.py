@@ -7,20 +7,11 @@ Verifica fornecedores específicos que aparecem no PostgreSQL
 import sys
 import codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
-
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
 
 # Fornecedores que aparecem nas primeiras contas do PostgreSQL
 fornecedores_pg = [5916, 5753, 10979, 13071, 442, 9784, 19, 3905]
@@ -30,7 +21,7 @@ print("VERIFICACAO DE FORNECEDORES DO POSTGRESQL NO FIREBIRD")
 print("="*100)
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     for id_forn in fornecedores_pg:
@@ -6,14 +6,12 @@ Verifica detalhes do pedido 54216
 
 import sys, codecs
 
+from conexao_firebird import conectar
+from indice_dump import ler_secao
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("VERIFICACAO DO PEDIDO 54216")
@@ -24,29 +22,19 @@ print("\n>> Verificando no PostgreSQL:")
 print("-"*100)
 
 try:
-    with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-        conteudo = f.read()
-
-    linhas = conteudo.split('\n')
-    lendo_pedidos = False
     encontrado_pg = False
 
-    for linha in linhas:
-        if 'COPY public.pedidos' in linha:
-            lendo_pedidos = True
-            continue
-        if linha.strip() == '\\.':
-            lendo_pedidos = False
+    # Vai direto para a secao de pedidos pelo indice do dump
+    for campos in ler_secao(r'c:\Projeto\Academia\vendas-extraidas.sql', 'pedidos'):
+        if campos[0] == '54216':
+            vlnota = float(campos[4]) if campos[4] is not None else 0
+            vlprod = float(campos[5]) if campos[5] is not None else 0
+            print("  Pedido 54216 ENCONTRADO no PostgreSQL!")
+            print(f"    VLNOTA: R$ {vlnota:,.2f}")
+            print(f"    VLPROD: R$ {vlprod:,.2f}")
+            print(f"    DATA: {campos[12]}")
+            encontrado_pg = True
             break
-        if lendo_pedidos and linha.strip():
-            campos = linha.split('\t')
-            if campos[0] == '54216':
-                print("  Pedido 54216 ENCONTRADO no PostgreSQL!")
-                print(f"    VLNOTA: R$ {float(campos[4]) if campos[4] != '\\N' else 0:,.2f}")
-                print(f"    VLPROD: R$ {float(campos[5]) if campos[5] != '\\N' else 0:,.2f}")
-                print(f"    DATA: {campos[12]}")
-                encontrado_pg = True
-                break
 
     if not encontrado_pg:
         print("  Pedido 54216 NAO está no PostgreSQL (é um pedido novo)")
@@ -54,15 +42,8 @@ try:
 except Exception as e:
     print(f"  Erro ao ler PostgreSQL: {e}")
 
-# Conectar ao Firebird
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Buscar pedido no Firebird
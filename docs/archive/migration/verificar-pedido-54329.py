@@ -6,14 +6,11 @@ Verifica o pedido 54329 no PostgreSQL e Firebird
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("VERIFICANDO PEDIDO 54329 - POSTGRESQL vs FIREBIRD")
@@ -86,14 +83,8 @@ else:
 print("\n>> 2. FIREBIRD:")
 print("-"*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Buscar na tabela PEDIDOS
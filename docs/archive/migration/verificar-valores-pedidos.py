@@ -6,27 +6,25 @@ Verifica se os valores dos pedidos estão corretos
 
 import sys, codecs
 
+from comparador_ordenado import comparar_ordenados, linhas_firebird, ordenar_por_chave
+from conexao_firebird import conectar
+from registros_dump import ler_tipados
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
+
+ARQUIVO_VENDAS = r'c:\Projeto\Academia\vendas-extraidas.sql'
+
+TIPOS_PEDIDOS = {'idpedido': 'int', 'vlnota': 'float', 'vlprod': 'float', 'data': 'data'}
+
 
 print("="*100)
 print("VERIFICACAO DOS VALORES DOS PEDIDOS")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Ver exemplos de pedidos no Firebird
@@ -54,42 +52,31 @@ try:
 
         print(f"{codigo:<10} {str(data):<12} R$ {vlr_total_real:>11,.2f} R$ {vlr_produtos_real:>11,.2f} R$ {vlr_desconto_real:>11,.2f} {qtde:>6.2f}")
 
-    # Comparar com PostgreSQL
-    print("\n\n>> EXEMPLOS DE PEDIDOS NO POSTGRESQL (mesmos códigos):")
+    # Comparar com PostgreSQL (mesma faixa dos dois lados, em ordem de codigo)
+    print("\n\n>> EXEMPLOS DE PEDIDOS NO POSTGRESQL x FIREBIRD (mesmos códigos):")
     print("-"*100)
 
-    with open(r'c:\Projeto\Academia\vendas-extraidas.sql', 'r', encoding='latin1') as f:
-        conteudo = f.read()
-
-    linhas = conteudo.split('\n')
-
-    # Pegar os mesmos pedidos do PostgreSQL
-    lendo_pedidos = False
-    pedidos_pg = {}
+    inicio, fim = 24840, 24850  # Pegar alguns exemplos
+    dump = ordenar_por_chave(
+        (pedido.idpedido, (pedido.data, pedido.vlnota or 0, pedido.vlprod or 0))
+        for _, pedido in ler_tipados(ARQUIVO_VENDAS, {'pedidos': TIPOS_PEDIDOS})
+        if pedido.idpedido is not None and inicio <= pedido.idpedido <= fim)
+    firebird = linhas_firebird(cur, """
+        SELECT CODIGO, DATA, VLR_TOTAL, VLR_PRODUTOS
+        FROM PEDIDOS
+        WHERE CODIGO BETWEEN ? AND ?
+        ORDER BY CODIGO
+    """, [inicio, fim])
 
-    for linha in linhas:
-        if 'COPY public.pedidos' in linha:
-            lendo_pedidos = True
-            continue
-        if linha.strip() == '\\.':
-            lendo_pedidos = False
-            if pedidos_pg:
-                break
-        if lendo_pedidos and linha.strip():
-            campos = linha.strip().split('\t')
-            idpedido = int(campos[0])
-            if 24840 <= idpedido <= 24850:  # Pegar alguns exemplos
-                pedidos_pg[idpedido] = {
-                    'vlnota': campos[4],
-                    'vlprod': campos[5],
-                    'data': campos[12]
-                }
-
-    print(f"{'CODIGO':<10} {'DATA':<12} {'VLNOTA':<15} {'VLPROD':<15}")
+    print(f"{'CODIGO':<10} {'DATA PG':<12} {'VLNOTA':<15} {'VLPROD':<15} {'VLR_TOTAL FB':<15} {'STATUS'}")
     print("-"*100)
-    for cod in sorted(pedidos_pg.keys()):
-        ped = pedidos_pg[cod]
-        print(f"{cod:<10} {ped['data']:<12} R$ {float(ped['vlnota']):>11,.2f} R$ {float(ped['vlprod']):>11,.2f}")
+    for evento in comparar_ordenados(dump, firebird, lambda pg, fb: []):
+        if evento.esquerda is None:
+            print(f"{evento.chave:<10} {'':<12} {'':<15} {'':<15} R$ {(evento.direita[1] or 0) / 100:>11,.2f}  SO NO FB")
+            continue
+        data, vlnota, vlprod = evento.esquerda
+        vlr_fb = f"R$ {(evento.direita[1] or 0) / 100:>11,.2f}" if evento.direita else "NAO ENCONTRADO"
+        print(f"{evento.chave:<10} {str(data):<12} R$ {vlnota:>11,.2f} R$ {vlprod:>11,.2f} {vlr_fb}")
 
     # Verificar pedidos nos próximos 30 dias
     print("\n\n>> PEDIDOS DOS PROXIMOS 30 DIAS NO FIREBIRD:")
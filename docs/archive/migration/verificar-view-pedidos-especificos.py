@@ -6,30 +6,21 @@ Verifica pedidos específicos através da view VW_RPT_PEDIDOSVENDAS
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("VERIFICANDO PEDIDOS ATRAVÉS DA VIEW VW_RPT_PEDIDOSVENDAS")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\QRSistema\db\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 # Pedidos que aparecem no relatório
 pedidos_verificar = [54216, 54257, 54261, 54272, 54276]
 
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar()
     cur = con.cursor()
 
     print("\n>> Buscando pedidos através da view (como o relatório faz):")
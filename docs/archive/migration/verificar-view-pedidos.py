@@ -6,27 +6,18 @@ Verifica a view VW_RPT_PEDIDOSVENDAS que está sendo usada no relatório
 
 import sys, codecs
 
+from conexao_firebird import conectar
+
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-try:
-    import fdb
-except ImportError:
-    print("[ERRO] Biblioteca 'fdb' nao encontrada!")
-    exit(1)
 
 print("="*100)
 print("VERIFICANDO VIEW VW_RPT_PEDIDOSVENDAS")
 print("="*100)
 
-fbConfig = {
-    'database': r'C:\\QRSistema\\db\\QRSISTEMA.FDB',
-    'user': 'sysdba',
-    'password': 'masterkey'
-}
-
 try:
-    con = fdb.connect(**fbConfig)
+    con = conectar('verificacao')
     cur = con.cursor()
 
     # Verificar se a view existe